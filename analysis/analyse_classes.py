@@ -3,7 +3,7 @@ from pathlib import Path
 
 from grammar.conjugation import Conjugation
 from grammar.conjugation_data import read_conjugations, verbs_matching_zaliznyak_class
-from utils.utils import group_into_dict, sanitize_text
+from utils.utils import count_by, sanitize_text
 
 
 def report_by_class(force: bool):
@@ -15,13 +15,10 @@ def report_by_class(force: bool):
             return a.groups()[0]
         return ""
 
-    by_class = group_into_dict(
-        conjugations,
-        short_name
-    )
-    classes = sorted(by_class.keys())
+    counts = count_by(conjugations, short_name)
+    classes = sorted(counts.keys())
     for c in classes:
-        print(f"{c}: {len(by_class[c])}")
+        print(f"{c}: {counts[c]}")
 
 def report_on_class(short_class: str, force: bool):
     conjugations = verbs_matching_zaliznyak_class(short_class, stem_filter=None, force=force)
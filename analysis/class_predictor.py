@@ -0,0 +1,207 @@
+"""
+Predicts the short Zaliznyak class and stress of an infinitive from the endings of verbs already conjugated.
+
+Verbs sharing a long ending nearly always share a class, which is what `report_on_class` shows when it lists
+reversed infinitives. The prediction for an infinitive is the most common class and stress among known verbs
+with its longest ending that enough of them share. The confidence is the fraction of those verbs that have the
+predicted class and stress.
+
+Usage:
+  python -m analysis.class_predictor benchmark --held-out 0.2
+  python -m analysis.class_predictor batch --output /tmp/predicted_classes.csv
+"""
+
+import argparse
+import csv
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Tuple, NamedTuple, Iterable
+
+from analysis.class_statistics import read_frequencies
+from grammar.conjugation import Conjugation
+from grammar.conjugation_data import read_conjugations
+from grammar.lexicon import LEMMA_PATH
+from utils.utils import lookup_key
+
+# Longest ending, in letters, that statistics are kept for
+MAX_ENDING_LENGTH = 7
+# Fewest known verbs that must share an ending for it to be used
+MIN_SUPPORT = 2
+
+# A short class and stress, e.g. ('4', 'b')
+ClassAndStress = Tuple[str, str]
+
+
+def prediction_key(infinitive: str) -> str:
+    """The infinitive's `lookup_key`, without its reflexive ending, as reflexive verbs conjugate like the verbs
+    they are formed from. Where Wiktionary gives alternatives, e.g. 'юркнуть, юркнуть', the first is used"""
+    text = lookup_key(infinitive).split(",")[0].strip().lower()
+    if text.endswith("ся") or text.endswith("сь"):
+        return text[:-2]
+    return text
+
+
+class Prediction(NamedTuple):
+    infinitive: str
+    short_class: str
+    short_stress: str
+    # Fraction of verbs with `ending` that have the predicted class and stress
+    confidence: float
+    # Number of known verbs with `ending`
+    support: int
+    ending: str
+    # True when the infinitive was itself one of the known verbs
+    is_known: bool
+
+
+class ClassPredictor:
+    def __init__(self, counts_by_ending: Dict[str, Dict[ClassAndStress, int]], known: Dict[str, ClassAndStress]):
+        # Counts of each class and stress among known verbs with each ending, including the empty ending
+        self.counts_by_ending: Dict[str, Dict[ClassAndStress, int]] = counts_by_ending
+        # Class and stress of each known verb, keyed by `prediction_key`, where all its conjugations agree
+        self.known: Dict[str, ClassAndStress] = known
+        # Most common class and stress, with its confidence and support, for each ending
+        self._best: Dict[str, Tuple[ClassAndStress, float, int]] = {}
+        for ending, counts in counts_by_ending.items():
+            label, count = max(counts.items(), key=lambda kv: (kv[1], kv[0]))
+            support = sum(counts.values())
+            self._best[ending] = (label, count / support, support)
+
+    @staticmethod
+    def from_conjugations(conjugations: Iterable[Conjugation]) -> 'ClassPredictor':
+        counts_by_ending: Dict[str, Dict[ClassAndStress, int]] = {}
+        labels_by_key: Dict[str, set] = {}
+        for c in conjugations:
+            key = prediction_key(c.infinitive)
+            label = (c.short_class, c.short_stress)
+            labels_by_key.setdefault(key, set()).add(label)
+            for length in range(min(len(key), MAX_ENDING_LENGTH) + 1):
+                counts = counts_by_ending.setdefault(key[len(key) - length:], {})
+                counts[label] = counts.get(label, 0) + 1
+        known = {key: next(iter(labels)) for key, labels in labels_by_key.items() if len(labels) == 1}
+        return ClassPredictor(counts_by_ending, known)
+
+    def predict(self, infinitive: str) -> Prediction:
+        key = prediction_key(infinitive)
+        if key in self.known:
+            short_class, short_stress = self.known[key]
+            return Prediction(infinitive, short_class, short_stress, 1.0, 1, key, is_known=True)
+        for length in range(min(len(key), MAX_ENDING_LENGTH), -1, -1):
+            ending = key[len(key) - length:]
+            best = self._best.get(ending)
+            if best is not None and (best[2] >= MIN_SUPPORT or length == 0):
+                (short_class, short_stress), confidence, support = best
+                return Prediction(infinitive, short_class, short_stress, confidence, support, ending, is_known=False)
+        raise ValueError("Predictor has no verbs")
+
+    def predict_all(self, infinitives: Iterable[str]) -> List[Prediction]:
+        return [self.predict(i) for i in infinitives]
+
+
+class BenchmarkResult(NamedTuple):
+    verbs: int
+    class_accuracy: float
+    stress_accuracy: float
+    accuracy: float
+    predictions_per_second: float
+    # Accuracy of class and stress together, by confidence band, as (band floor, verbs, accuracy)
+    accuracy_by_confidence: List[Tuple[float, int, float]]
+
+    def __str__(self):
+        lines = [
+            f"Held out verbs:   {self.verbs}",
+            f"Class accuracy:   {self.class_accuracy:.3f}",
+            f"Stress accuracy:  {self.stress_accuracy:.3f}",
+            f"Both accuracy:    {self.accuracy:.3f}",
+            f"Predictions/s:    {self.predictions_per_second:,.0f}",
+            "Confidence  Verbs  Accuracy",
+        ]
+        for floor, verbs, accuracy in self.accuracy_by_confidence:
+            lines.append(f"  >= {floor:.1f}  {verbs:6}  {accuracy:8.3f}")
+        return "\n".join(lines)
+
+
+def held_out_benchmark(conjugations: List[Conjugation], held_out: float = 0.2, seed: int = 0) -> BenchmarkResult:
+    """Trains on a random split of the conjugations and measures accuracy on the rest. Verbs are split by
+    `prediction_key`, so that a reflexive verb is never predicted from its non-reflexive form"""
+    keys = sorted({prediction_key(c.infinitive) for c in conjugations})
+    random.Random(seed).shuffle(keys)
+    test_keys = set(keys[:int(len(keys) * held_out)])
+    train = [c for c in conjugations if prediction_key(c.infinitive) not in test_keys]
+    test = [c for c in conjugations if prediction_key(c.infinitive) in test_keys]
+    predictor = ClassPredictor.from_conjugations(train)
+
+    start = time.perf_counter()
+    predictions = predictor.predict_all(c.infinitive for c in test)
+    elapsed = time.perf_counter() - start
+
+    class_correct = [p.short_class == c.short_class for p, c in zip(predictions, test)]
+    stress_correct = [p.short_stress == c.short_stress for p, c in zip(predictions, test)]
+    both_correct = [a and b for a, b in zip(class_correct, stress_correct)]
+    bands = []
+    for floor in [0.0, 0.5, 0.7, 0.9]:
+        in_band = [ok for ok, p in zip(both_correct, predictions) if p.confidence >= floor]
+        bands.append((floor, len(in_band), sum(in_band) / len(in_band) if in_band else 0.0))
+    n = len(test) or 1
+    return BenchmarkResult(
+        verbs=len(test),
+        class_accuracy=sum(class_correct) / n,
+        stress_accuracy=sum(stress_correct) / n,
+        accuracy=sum(both_correct) / n,
+        predictions_per_second=len(test) / elapsed if elapsed else 0.0,
+        accuracy_by_confidence=bands,
+    )
+
+
+def write_predictions(predictions: List[Prediction], output):
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(["infinitive", "class", "stress", "confidence", "support", "ending", "known"])
+    for p in predictions:
+        writer.writerow([
+            p.infinitive, p.short_class, p.short_stress, f"{p.confidence:.3f}", p.support, p.ending,
+            int(p.is_known)
+        ])
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Predict verb classes and stresses from their endings.")
+    sub = p.add_subparsers(dest="command", required=True)
+    benchmark = sub.add_parser("benchmark", help="Measure accuracy on verbs held out from the known conjugations.")
+    benchmark.add_argument("--held-out", type=float, default=0.2,
+                           help="Fraction of known verbs to hold out (default: 0.2).")
+    benchmark.add_argument("--seed", type=int, default=0,
+                           help="Seed for the random split (default: 0).")
+    batch = sub.add_parser("batch", help="Predict the class and stress of every verb in a frequency list.")
+    batch.add_argument("--frequencies", type=Path, default=LEMMA_PATH,
+                       help=f"Frequency list whose verbs are classified (default: {LEMMA_PATH.name}).")
+    batch.add_argument("--output", type=Path,
+                       help="CSV file to write predictions to (default: stdout).")
+    for parser in [benchmark, batch]:
+        parser.add_argument("--force", action="store_true",
+                            help="Re-read conjugations from the CSV files rather than the shelf.")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    conjugations = read_conjugations(args.force)
+    if args.command == "benchmark":
+        print(held_out_benchmark(conjugations, args.held_out, args.seed))
+        return
+    predictor = ClassPredictor.from_conjugations(conjugations)
+    start = time.perf_counter()
+    predictions = predictor.predict_all(read_frequencies(args.frequencies, "verb"))
+    elapsed = time.perf_counter() - start
+    if args.output is None:
+        write_predictions(predictions, sys.stdout)
+    else:
+        with open(args.output, 'wt', encoding='utf-8', newline='') as f:
+            write_predictions(predictions, f)
+    n_known = sum(p.is_known for p in predictions)
+    print(f"Classified {len(predictions)} verbs, {n_known} known, in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+Frequency weighted statistics on Zaliznyak classes and stress patterns.
+
+Each conjugation is joined with the frequency (instances per million words) of its infinitive, so that classes
+can be compared by how much real text they cover, rather than by how many verbs they have.
+
+Usage:
+  python -m analysis.class_statistics --table classes --format csv
+  python -m analysis.class_statistics --table top --top 5 --format json --output /tmp/top.json
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Callable, Tuple
+
+from grammar.conjugation import Conjugation
+from grammar.conjugation_data import read_conjugations
+from grammar.lexicon import PartOfSpeech, read_lexicon
+from grammar.read_verbs import VERBS_TEXT
+from utils.types import checked_list_type
+
+# A table is a list of rows, each mapping column name to value
+Table = List[Dict[str, object]]
+
+
+def read_frequencies(path: Path, part_of_speech: str = "verb") -> Dict[str, float]:
+    """Maps each lemma with the given part of speech to its frequency. Repeated lemmas have their frequencies
+    summed"""
+    return read_lexicon(path=path).frequencies_of(PartOfSpeech(part_of_speech))
+
+
+class VerbFrequencies:
+    """Conjugated verbs with their classes, stresses and frequencies, held column-wise and sorted by descending
+    frequency"""
+
+    def __init__(
+            self,
+            infinitives: List[str],
+            short_classes: List[str],
+            short_stresses: List[str],
+            frequencies: List[float],
+            unmatched_frequency: float,
+    ):
+        self.infinitives: List[str] = checked_list_type(infinitives, str)
+        self.short_classes: List[str] = checked_list_type(short_classes, str)
+        self.short_stresses: List[str] = checked_list_type(short_stresses, str)
+        self.frequencies: List[float] = checked_list_type(frequencies, float)
+        assert len({len(infinitives), len(short_classes), len(short_stresses), len(frequencies)}) == 1, \
+            "Columns differ in length"
+        # Total frequency of verbs in the frequency list with no conjugation
+        self.unmatched_frequency: float = unmatched_frequency
+        self.total_frequency: float = sum(frequencies)
+
+    def __len__(self):
+        return len(self.infinitives)
+
+    @staticmethod
+    def from_conjugations(conjugations: List[Conjugation], frequencies: Dict[str, float]) -> 'VerbFrequencies':
+        """Conjugations whose infinitives only differ in stress share their infinitive's frequency equally, so
+        that no text is counted twice"""
+        by_infinitive: Dict[str, List[Conjugation]] = {}
+        for c in conjugations:
+            by_infinitive.setdefault(c.infinitive_key, []).append(c)
+        rows: List[Tuple[float, str, str, str]] = []
+        for infinitive, cs in by_infinitive.items():
+            frequency = frequencies.get(infinitive, 0.0) / len(cs)
+            for c in cs:
+                rows.append((frequency, infinitive, c.short_class, c.short_stress))
+        rows.sort(key=lambda row: (-row[0], row[1]))
+        unmatched = sum(f for inf, f in frequencies.items() if inf not in by_infinitive)
+        return VerbFrequencies(
+            infinitives=[row[1] for row in rows],
+            short_classes=[row[2] for row in rows],
+            short_stresses=[row[3] for row in rows],
+            frequencies=[row[0] for row in rows],
+            unmatched_frequency=unmatched,
+        )
+
+    @staticmethod
+    def load(force: bool, frequencies_path: Path = VERBS_TEXT) -> 'VerbFrequencies':
+        return VerbFrequencies.from_conjugations(read_conjugations(force), read_frequencies(frequencies_path))
+
+    def _share(self, frequency: float) -> float:
+        return frequency / self.total_frequency if self.total_frequency else 0.0
+
+    def summary(self) -> Table:
+        matched = sum(1 for f in self.frequencies if f > 0)
+        all_frequency = self.total_frequency + self.unmatched_frequency
+        return [{
+            "verbs": len(self),
+            "verbs_with_frequency": matched,
+            "frequency": round(self.total_frequency, 2),
+            "unmatched_frequency": round(self.unmatched_frequency, 2),
+            "matched_share": round(self.total_frequency / all_frequency, 6) if all_frequency else 0.0,
+        }]
+
+    def weighted_shares(self, key_names: List[str], keys: List[Callable[[int], str]]) -> Table:
+        """Aggregates count and frequency per key in a single pass over the columns. Rows are in descending
+        order of frequency, with the cumulative share of all verb frequency covered"""
+        counts: Dict[Tuple[str, ...], List[float]] = {}
+        for i, frequency in enumerate(self.frequencies):
+            totals = counts.setdefault(tuple(k(i) for k in keys), [0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += frequency > 0
+            totals[2] += frequency
+        table = []
+        cumulative = 0.0
+        for key, (verbs, verbs_with_frequency, frequency) in sorted(counts.items(), key=lambda kv: -kv[1][2]):
+            cumulative += frequency
+            row: Dict[str, object] = dict(zip(key_names, key))
+            row.update({
+                "verbs": verbs,
+                "verbs_with_frequency": verbs_with_frequency,
+                "frequency": round(frequency, 2),
+                "share": round(self._share(frequency), 6),
+                "cumulative_share": round(self._share(cumulative), 6),
+            })
+            table.append(row)
+        return table
+
+    def class_shares(self) -> Table:
+        return self.weighted_shares(["class"], [lambda i: self.short_classes[i]])
+
+    def stress_shares(self) -> Table:
+        return self.weighted_shares(["stress"], [lambda i: self.short_stresses[i]])
+
+    def class_and_stress_shares(self) -> Table:
+        return self.weighted_shares(
+            ["class", "stress"],
+            [lambda i: self.short_classes[i], lambda i: self.short_stresses[i]]
+        )
+
+    def coverage_curve(self, points: Optional[List[int]] = None) -> Table:
+        """The share of all verb frequency covered by the n most frequent verbs. If `points` is given then only
+        those values of n are reported, otherwise every n is"""
+        wanted = None if points is None else set(points)
+        table = []
+        cumulative = 0.0
+        for n, frequency in enumerate(self.frequencies, start=1):
+            cumulative += frequency
+            if wanted is None or n in wanted or n == len(self):
+                table.append({
+                    "verbs": n,
+                    "infinitive": self.infinitives[n - 1],
+                    "class": self.short_classes[n - 1],
+                    "cumulative_share": round(self._share(cumulative), 6),
+                })
+        return table
+
+    def top_n(self, n: int) -> Table:
+        """The n most frequent verbs of each class. Classes are in descending order of frequency"""
+        class_totals: Dict[str, float] = {}
+        top: Dict[str, List[int]] = {}
+        # Columns are sorted by frequency, so the first n seen in each class are its top n
+        for i, short_class in enumerate(self.short_classes):
+            class_totals[short_class] = class_totals.get(short_class, 0.0) + self.frequencies[i]
+            indices = top.setdefault(short_class, [])
+            if len(indices) < n:
+                indices.append(i)
+        table = []
+        for short_class in sorted(top, key=lambda k: -class_totals[k]):
+            class_total = class_totals[short_class]
+            for rank, i in enumerate(top[short_class], start=1):
+                table.append({
+                    "class": short_class,
+                    "rank": rank,
+                    "infinitive": self.infinitives[i],
+                    "stress": self.short_stresses[i],
+                    "frequency": round(self.frequencies[i], 2),
+                    "share_of_class": round(self.frequencies[i] / class_total, 6) if class_total else 0.0,
+                })
+        return table
+
+
+def write_table(table: Table, fmt: str, output):
+    if fmt == "json":
+        json.dump(table, output, ensure_ascii=False, indent=2)
+        output.write("\n")
+    elif fmt == "csv":
+        if table:
+            writer = csv.DictWriter(output, fieldnames=list(table[0].keys()), lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(table)
+    else:
+        raise ValueError(f"Unknown format {fmt}")
+
+
+TABLES = ["summary", "classes", "stresses", "class-stress", "coverage", "top"]
+
+
+def build_table(stats: VerbFrequencies, name: str, top: int, points: Optional[List[int]]) -> Table:
+    if name == "summary":
+        return stats.summary()
+    if name == "classes":
+        return stats.class_shares()
+    if name == "stresses":
+        return stats.stress_shares()
+    if name == "class-stress":
+        return stats.class_and_stress_shares()
+    if name == "coverage":
+        return stats.coverage_curve(points)
+    if name == "top":
+        return stats.top_n(top)
+    raise ValueError(f"Unknown table {name}")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Frequency weighted statistics on verb classes and stresses.")
+    p.add_argument("--table", choices=TABLES, default="classes",
+                   help="Table to produce (default: classes).")
+    p.add_argument("--format", choices=["csv", "json"], default="csv",
+                   help="Output format (default: csv).")
+    p.add_argument("--output", type=Path,
+                   help="File to write the table to (default: stdout).")
+    p.add_argument("--frequencies", type=Path, default=VERBS_TEXT,
+                   help=f"Frequency list, in the format of lemma.txt (default: {VERBS_TEXT.name}).")
+    p.add_argument("--top", type=int, default=10,
+                   help="Number of verbs per class in the top table (default: 10).")
+    p.add_argument("--points", type=lambda s: [int(n) for n in s.split(",")],
+                   help="Comma separated numbers of verbs at which to report coverage (default: every number).")
+    p.add_argument("--force", action="store_true",
+                   help="Re-read conjugations from the CSV files rather than the shelf.")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    stats = VerbFrequencies.load(args.force, args.frequencies)
+    table = build_table(stats, args.table, args.top, args.points)
+    if args.output is None:
+        write_table(table, args.format, sys.stdout)
+    else:
+        with open(args.output, 'wt', encoding='utf-8', newline='') as f:
+            write_table(table, args.format, f)
+    print(f"Built {args.table} table in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
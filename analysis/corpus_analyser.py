@@ -0,0 +1,230 @@
+"""
+Counts which of our verbs and vocabulary items occur in plain text Russian corpora.
+
+Corpus files are read in large chunks, cut at whitespace so that no word is split, and each chunk is tokenised
+and lemmatised in a process pool using the form index. Counts from each chunk are merged, then ranked and
+compared with the ranks in lemma.txt.
+
+Usage:
+  python -m analysis.corpus_analyser corpus1.txt corpus2.txt --workers 8 --output /tmp/lemma_counts.csv
+"""
+
+import argparse
+import csv
+import os
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from pathlib import Path
+from typing import List, Dict, Iterator, Tuple, Optional, Deque
+
+from grammar.form_index import FormIndex, read_form_index, normalise_form, INDEX_PATH
+from grammar.lexicon import LEMMA_PATH
+from grammar.read_vocab import read_vocab_10000
+
+# Bytes read from a corpus file at a time
+CHUNK_SIZE = 4 << 20
+
+# Cyrillic words, including hyphenated words and stress marks
+_TOKEN_RE = re.compile("[а-яё́]+(?:-[а-яё́]+)*")
+_WHITESPACE = [b" ", b"\n", b"\t", b"\r"]
+
+# Our part of speech names, and those in lemma.txt. lemma.txt tags pronouns used as adjectives, e.g. тот, мой and
+# весь, as adjpron
+_LEMMA_TXT_POS = {"verb": ["verb"], "noun": ["noun"], "adjective": ["adj"], "pronoun": ["pron", "adjpron"]}
+
+# A lemma and its part of speech
+LemmaKey = Tuple[str, str]
+
+# Set in each worker process by `_init_worker`
+_INDEX: Optional[FormIndex] = None
+# Maps each normalised vocabulary item to the item as written in the vocab
+_VOCAB: Dict[str, str] = {}
+
+
+def read_chunks(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yields the file in blocks of about `chunk_size` bytes, each ending at whitespace. UTF-8 never encodes part of
+    a multi-byte character as whitespace, so each block decodes on its own"""
+    with open(path, 'rb') as f:
+        remainder = b""
+        while block := f.read(chunk_size):
+            block = remainder + block
+            cut = max(block.rfind(c) for c in _WHITESPACE)
+            if cut == -1:
+                remainder = block
+                continue
+            remainder = block[cut + 1:]
+            yield block[:cut + 1]
+        if remainder:
+            yield remainder
+
+
+def _init_worker(index_path: Path, vocab: Dict[str, str]):
+    global _INDEX, _VOCAB
+    _INDEX = FormIndex.load(index_path)
+    if _INDEX is None:
+        raise ValueError(f"{index_path} was saved in an older format, rebuild it")
+    _VOCAB = vocab
+
+
+class ChunkCounts:
+    def __init__(self, lemmas: Counter, tokens: int, recognised: int, n_bytes: int):
+        # Occurrences of each lemma. A form belonging to several lemmas counts a fraction towards each
+        self.lemmas: Counter = lemmas
+        self.tokens: int = tokens
+        self.recognised: int = recognised
+        self.n_bytes: int = n_bytes
+
+    def merge(self, other: 'ChunkCounts'):
+        self.lemmas.update(other.lemmas)
+        self.tokens += other.tokens
+        self.recognised += other.recognised
+        self.n_bytes += other.n_bytes
+
+
+def count_chunk(chunk: bytes) -> ChunkCounts:
+    """Counts the lemmas of each token. Tokens are counted first, so that each distinct token is looked up once"""
+    tokens = Counter(_TOKEN_RE.findall(chunk.decode('utf-8', errors='replace').lower()))
+    lemmas = Counter()
+    recognised = 0
+    for token, count in tokens.items():
+        tags = _INDEX.lookup(token)
+        if tags:
+            keys = list(dict.fromkeys((tag.lemma, tag.part_of_speech) for tag in tags))
+            for key in keys:
+                lemmas[key] += count / len(keys)
+            recognised += count
+        else:
+            item = _VOCAB.get(normalise_form(token))
+            if item is not None:
+                lemmas[(item, "vocab")] += count
+                recognised += count
+    return ChunkCounts(lemmas, sum(tokens.values()), recognised, len(chunk))
+
+
+def count_corpus(
+        paths: List[Path],
+        max_workers: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+        index_path: Path = INDEX_PATH,
+) -> ChunkCounts:
+    """Counts lemmas over all chunks of all files in a process pool. Only a bounded number of chunks is in flight
+    at once, so memory use doesn't grow with the corpus"""
+    if index_path == INDEX_PATH:
+        # Builds the index if it is missing or was saved in an older format
+        read_form_index(force=False)
+    vocab: Dict[str, str] = {}
+    for item in read_vocab_10000(force=False).items:
+        vocab.setdefault(normalise_form(item.russian), item.russian)
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = 2 * max_workers
+    total = ChunkCounts(Counter(), 0, 0, 0)
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(index_path, vocab)) as executor:
+        in_flight: Deque[Future] = deque()
+        for path in paths:
+            for chunk in read_chunks(path, chunk_size):
+                in_flight.append(executor.submit(count_chunk, chunk))
+                if len(in_flight) >= max_in_flight:
+                    total.merge(in_flight.popleft().result())
+        while in_flight:
+            total.merge(in_flight.popleft().result())
+    return total
+
+
+def read_ranks(path: Path = LEMMA_PATH) -> Dict[Tuple[str, str], int]:
+    """Maps (normalised lemma, part of speech) to its rank in a frequency list"""
+    ranks = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            rank, _, lemma, pos = line.split()
+            ranks.setdefault((normalise_form(lemma), pos), int(rank))
+    return ranks
+
+
+def rank_correlation(pairs: List[Tuple[int, int]]) -> float:
+    """Spearman's rank correlation of paired ranks, after re-ranking each side within the pairs"""
+    n = len(pairs)
+    if n < 2:
+        return 0.0
+
+    def re_rank(values: List[int]) -> List[int]:
+        order = sorted(range(n), key=lambda i: values[i])
+        ranks = [0] * n
+        for r, i in enumerate(order):
+            ranks[i] = r
+        return ranks
+
+    a = re_rank([p[0] for p in pairs])
+    b = re_rank([p[1] for p in pairs])
+    d_squared = sum((x - y) ** 2 for x, y in zip(a, b))
+    return 1 - 6 * d_squared / (n * (n * n - 1))
+
+
+# A lemma, its count, its rank in the corpus and its rank in lemma.txt, if it has one
+RankedLemma = Tuple[LemmaKey, float, int, Optional[int]]
+
+
+def ranked_lemmas(counts: ChunkCounts, ranks: Dict[Tuple[str, str], int]) -> List[RankedLemma]:
+    """Lemmas in descending order of count. Vocabulary items have no part of speech, so take their best rank"""
+    best_ranks: Dict[str, int] = {}
+    for (lemma, _), rank in ranks.items():
+        best_ranks[lemma] = min(rank, best_ranks.get(lemma, rank))
+    rows = []
+    for corpus_rank, (key, count) in enumerate(counts.lemmas.most_common(), start=1):
+        lemma, pos = key
+        # Lemmas are kept as written, and only normalised to look up their rank
+        form = normalise_form(lemma)
+        if pos == "vocab":
+            lemma_rank = best_ranks.get(form)
+        else:
+            found = [ranks[(form, p)] for p in _LEMMA_TXT_POS[pos] if (form, p) in ranks]
+            lemma_rank = min(found) if found else None
+        rows.append((key, count, corpus_rank, lemma_rank))
+    return rows
+
+
+def write_counts(rows: List[RankedLemma], path: Path):
+    with open(path, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["lemma", "part_of_speech", "count", "corpus_rank", "lemma_txt_rank"])
+        for (lemma, pos), count, corpus_rank, lemma_rank in rows:
+            writer.writerow([lemma, pos, f"{count:.1f}", corpus_rank, "" if lemma_rank is None else lemma_rank])
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Count occurrences of our verbs and vocabulary in text corpora.")
+    p.add_argument("corpus", nargs="+", type=Path,
+                   help="Plain text UTF-8 corpus files.")
+    p.add_argument("--workers", type=int, default=None,
+                   help="Number of worker processes (default: number of CPUs).")
+    p.add_argument("--chunk-mb", type=float, default=CHUNK_SIZE / (1 << 20),
+                   help=f"Size of each chunk of input, in MB (default: {CHUNK_SIZE >> 20}).")
+    p.add_argument("--output", type=Path,
+                   help="CSV file to write lemma counts and ranks to.")
+    p.add_argument("--top", type=int, default=20,
+                   help="Number of most frequent lemmas to print (default: 20).")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    counts = count_corpus(args.corpus, args.workers, int(args.chunk_mb * (1 << 20)))
+    elapsed = time.perf_counter() - start
+    rows = ranked_lemmas(counts, read_ranks())
+    if args.output is not None:
+        write_counts(rows, args.output)
+
+    mb = counts.n_bytes / 1e6
+    print(f"Read {mb:.1f} MB in {elapsed:.2f}s, {mb / elapsed:.1f} MB/s")
+    if counts.tokens:
+        print(f"{counts.tokens} tokens, {counts.recognised / counts.tokens:.1%} recognised")
+    pairs = [(corpus_rank, lemma_rank) for _, _, corpus_rank, lemma_rank in rows if lemma_rank is not None]
+    print(f"{len(pairs)} lemmas ranked in lemma.txt, rank correlation {rank_correlation(pairs):.3f}")
+    for (lemma, pos), count, corpus_rank, lemma_rank in rows[:args.top]:
+        print(f"{corpus_rank:5} {lemma:<20} {pos:<10} {count:10.1f} {lemma_rank or '':>6}")
+
+
+if __name__ == '__main__':
+    main()
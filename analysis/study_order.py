@@ -0,0 +1,236 @@
+"""
+Chooses and orders verbs, vocabulary items and declension samples to cover as much of a reference frequency list
+as possible within a budget of cards.
+
+Each candidate covers one or more lemmas of the reference list. A lemma covered by several candidates, such as a
+verb that is also a vocabulary item, or a pronoun in several declension tables, only counts once. Learning a verb
+also gives partial credit for its aspect partner. Candidates are chosen by lazy greedy weighted set cover: the
+gain of a candidate can only fall as others are chosen, so a stale gain at the top of the heap is recomputed and
+pushed back rather than recomputing every gain on every step.
+
+Usage:
+  python -m analysis.study_order --budget 3000 --output /tmp/study_order.csv
+  python -m analysis.study_order --reference /tmp/lemma_counts.csv --kinds verb
+"""
+
+import argparse
+import csv
+import heapq
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, NamedTuple, Iterable
+
+from grammar.conjugation import Conjugation, Aspect
+from grammar.conjugation_data import read_conjugations
+from grammar.form_index import normalise_form, declinable_forms, sample_declinables
+from grammar.lexicon import LEMMA_PATH
+from grammar.read_vocab import read_vocab_10000, Vocab
+
+# Fraction of an aspect partner's frequency credited by learning a verb
+ASPECT_PARTNER_CREDIT = 0.5
+
+# Prefixes that form perfectives from imperfectives, e.g. делать -> сделать
+PERFECTIVE_PREFIXES = [
+    "с", "со", "по", "на", "за", "про", "у", "о", "об", "обо", "вы", "при", "от", "ото", "раз", "рас", "из", "ис",
+    "в", "во", "под", "подо", "пере", "до",
+]
+
+KINDS = ["verb", "vocab", "declinable"]
+
+
+class Candidate(NamedTuple):
+    kind: str
+    key: str
+    # Number of cards the candidate adds to a deck
+    cost: int
+    # Credit, between 0 and 1, given to each reference lemma the candidate covers
+    credits: Dict[str, float]
+
+
+class StudyItem(NamedTuple):
+    kind: str
+    key: str
+    cost: int
+    gain: float
+    # Fraction of the reference frequency covered once this and all earlier items are learnt
+    coverage: float
+
+
+def read_reference(path: Path) -> Dict[str, float]:
+    """Maps normalised lemmas to their frequency. `path` is either a frequency list in the format of lemma.txt,
+    or a CSV of lemma counts written by `analysis.corpus_analyser`"""
+    frequencies: Dict[str, float] = {}
+    with open(path, encoding='utf-8', newline='') as f:
+        first_line = f.readline()
+        f.seek(0)
+        if first_line.startswith("lemma,"):
+            for row in csv.DictReader(f):
+                lemma = normalise_form(row["lemma"])
+                frequencies[lemma] = frequencies.get(lemma, 0.0) + float(row["count"])
+        else:
+            for line in f:
+                _, frequency, lemma, _ = line.split()
+                lemma = normalise_form(lemma)
+                frequencies[lemma] = frequencies.get(lemma, 0.0) + float(frequency)
+    return frequencies
+
+
+def aspect_partners(conjugations: List[Conjugation]) -> Dict[str, List[str]]:
+    """Pairs perfectives with the imperfectives they are formed from by a prefix, both ways, keyed by normalised
+    infinitive"""
+    imperfectives = {
+        normalise_form(c.infinitive) for c in conjugations if c.verb_type.aspect == Aspect.IMPERFECTIVE
+    }
+    partners: Dict[str, List[str]] = {}
+    for c in conjugations:
+        if c.verb_type.aspect != Aspect.PERFECTIVE:
+            continue
+        perfective = normalise_form(c.infinitive)
+        for prefix in PERFECTIVE_PREFIXES:
+            if perfective.startswith(prefix) and perfective[len(prefix):] in imperfectives:
+                imperfective = perfective[len(prefix):]
+                partners.setdefault(perfective, []).append(imperfective)
+                partners.setdefault(imperfective, []).append(perfective)
+    return partners
+
+
+def verb_candidates(conjugations: List[Conjugation], cost: int = 1) -> List[Candidate]:
+    partners = aspect_partners(conjugations)
+    candidates = []
+    for c in conjugations:
+        infinitive = normalise_form(c.infinitive)
+        credits = {partner: ASPECT_PARTNER_CREDIT for partner in partners.get(infinitive, [])}
+        credits[infinitive] = 1.0
+        candidates.append(Candidate("verb", c.infinitive, cost, credits))
+    return candidates
+
+
+def vocab_candidates(vocab: Vocab, cost: int = 1) -> List[Candidate]:
+    """Vocabulary items such as 'в (во)' cover the lemma of their first word"""
+    candidates = []
+    for item in vocab.items:
+        words = item.russian.split()
+        if words:
+            candidates.append(Candidate("vocab", item.russian, cost, {normalise_form(words[0]): 1.0}))
+    return candidates
+
+
+def declinable_candidates(cost: int = 1) -> List[Candidate]:
+    candidates = []
+    for declinable, part_of_speech in sample_declinables():
+        lemmas = {normalise_form(lemma): 1.0 for lemma, _, _ in declinable_forms(declinable)}
+        candidates.append(Candidate("declinable", f"{part_of_speech}: {declinable.root}", cost, lemmas))
+    return candidates
+
+
+def plan_study_order(
+        candidates: List[Candidate],
+        reference: Dict[str, float],
+        budget: int,
+) -> List[StudyItem]:
+    """Greedily picks the candidate with the highest gain in covered frequency per card until the budget is spent
+    or nothing more can be gained"""
+    total = sum(reference.values())
+    covered: Dict[str, float] = {}
+
+    def gain(candidate: Candidate) -> float:
+        return sum(
+            (credit - covered.get(lemma, 0.0)) * reference.get(lemma, 0.0)
+            for lemma, credit in candidate.credits.items()
+            if credit > covered.get(lemma, 0.0)
+        )
+
+    # Entries are (-gain per card, candidate index). Ties keep the input order
+    heap = [(-gain(c) / c.cost, i) for i, c in enumerate(candidates) if c.cost > 0]
+    heapq.heapify(heap)
+    plan = []
+    spent = 0
+    covered_frequency = 0.0
+    while heap and spent < budget:
+        _, i = heapq.heappop(heap)
+        candidate = candidates[i]
+        current = gain(candidate)
+        if current <= 0:
+            continue
+        if heap and current / candidate.cost < -heap[0][0]:
+            heapq.heappush(heap, (-current / candidate.cost, i))
+            continue
+        if spent + candidate.cost > budget:
+            continue
+        for lemma, credit in candidate.credits.items():
+            covered[lemma] = max(credit, covered.get(lemma, 0.0))
+        spent += candidate.cost
+        covered_frequency += current
+        plan.append(StudyItem(candidate.kind, candidate.key, candidate.cost, current,
+                              covered_frequency / total if total else 0.0))
+    return plan
+
+
+def study_ordered_verbs(
+        conjugations: List[Conjugation],
+        budget: int,
+        reference_path: Path = LEMMA_PATH,
+) -> List[Conjugation]:
+    """The verbs to learn, in order, to cover most of the reference list with `budget` verbs"""
+    by_infinitive = {c.infinitive: c for c in conjugations}
+    plan = plan_study_order(verb_candidates(conjugations), read_reference(reference_path), budget)
+    return [by_infinitive[item.key] for item in plan]
+
+
+def candidates_of_kinds(kinds: Iterable[str], force: bool) -> List[Candidate]:
+    candidates = []
+    for kind in kinds:
+        if kind == "verb":
+            candidates += verb_candidates(read_conjugations(force))
+        elif kind == "vocab":
+            candidates += vocab_candidates(read_vocab_10000(force))
+        elif kind == "declinable":
+            candidates += declinable_candidates()
+        else:
+            raise ValueError(f"Unknown kind {kind}")
+    return candidates
+
+
+def write_plan(plan: List[StudyItem], output):
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(["order", "kind", "item", "cost", "gain", "coverage"])
+    for i, item in enumerate(plan, start=1):
+        writer.writerow([i, item.kind, item.key, item.cost, f"{item.gain:.2f}", f"{item.coverage:.6f}"])
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Order verbs, vocabulary and declensions to maximise coverage.")
+    p.add_argument("--budget", type=int, default=3000,
+                   help="Maximum number of cards (default: 3000).")
+    p.add_argument("--reference", type=Path, default=LEMMA_PATH,
+                   help="Reference frequencies: lemma.txt, or lemma counts from analysis.corpus_analyser "
+                        f"(default: {LEMMA_PATH.name}).")
+    p.add_argument("--kinds", type=lambda s: s.split(","), default=KINDS,
+                   help=f"Comma separated kinds of item to choose from (default: {','.join(KINDS)}).")
+    p.add_argument("--output", type=Path,
+                   help="CSV file to write the study order to (default: stdout).")
+    p.add_argument("--force", action="store_true",
+                   help="Re-read conjugations and vocabulary from source rather than the shelves.")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    candidates = candidates_of_kinds(args.kinds, args.force)
+    reference = read_reference(args.reference)
+    start = time.perf_counter()
+    plan = plan_study_order(candidates, reference, args.budget)
+    elapsed = time.perf_counter() - start
+    if args.output is None:
+        write_plan(plan, sys.stdout)
+    else:
+        with open(args.output, 'wt', encoding='utf-8', newline='') as f:
+            write_plan(plan, f)
+    coverage = plan[-1].coverage if plan else 0.0
+    print(f"Chose {len(plan)} of {len(candidates)} items, covering {coverage:.1%} of the reference, "
+          f"in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
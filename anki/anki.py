@@ -1,16 +1,22 @@
 import csv
 from pathlib import Path
-from typing import List
+from typing import List, Iterable, Iterator, Optional
 
+from analysis.study_order import study_ordered_verbs
+from anki.apkg import write_anki_package, notes_from_import_lines
+from anki.incremental import write_incremental_package
+from anki.output import OUTPUT_DIR
+from anki.streaming import render_shared_in_chunks, write_lines
 from grammar.adjective import SampleAdjective
 from grammar.conjugation import Conjugation
-from grammar.conjugation_data import find_conjugation
+from grammar.conjugation_data import find_conjugation, read_conjugations
 from grammar.declinable import Declinable, SampleDeclinable
 from grammar.noun import SampleNoun
 from grammar.pronoun import SamplePronoun
 from grammar.read_verbs import read_verbs_in_usage_order
 from grammar.read_vocab import read_vocab_10000, Vocab
-from utils.utils import strip_stress_marks
+from grammar.shared_dataset import SharedDataset
+from utils.utils import stress_free_key
 
 CONJUGATIONS_DECK = "Conjugations"
 IMPERFECT_DECK = "Imperfect"
@@ -38,7 +44,7 @@ def present_or_future_conjugation_note(conjugation: Conjugation):
         ]
         terms = [f"{l}: {t}" for l, t in zip(labels, terms) if t is not None]
     verbs_to_conjugate_fully = {"быть", "есть", "дать", "бежать", "хотеть", "мочь"}
-    infinitive_sans_stress = strip_stress_marks(conjugation.infinitive)
+    infinitive_sans_stress = conjugation.infinitive_key
     conjugate_fully = infinitive_sans_stress in verbs_to_conjugate_fully or short_class == "irreg"
     if not conjugate_fully:
         terms = terms[:2] + terms[-1:]
@@ -73,37 +79,37 @@ def past_conjugation_note(conjugation: Conjugation) -> str:
     ])
 
 
-def russian_to_english_notes(vocab: Vocab) -> List[str]:
-    return [
+def russian_to_english_notes(vocab: Vocab) -> Iterator[str]:
+    return (
         ";".join([
             "Basic",
             RUSSIAN_TO_ENGLISH_DECK,
             f"{item.russian}<br><br>;{item.english}<br><br>{item.notes}"
         ])
         for item in vocab.items
-    ]
+    )
 
 
-def english_to_russian_notes(vocab: Vocab):
-    return [
+def english_to_russian_notes(vocab: Vocab) -> Iterator[str]:
+    return (
         ";".join([
             "Basic",
             ENGLISH_TO_RUSSIAN_DECK,
             f"{item.english};{item.russian}<br><br>{item.notes}<br><br>"
         ])
         for item in vocab.items
-    ]
+    )
 
 
-def vocab_10000_notes(vocab: Vocab):
-    return [
+def vocab_10000_notes(vocab: Vocab) -> Iterator[str]:
+    return (
         ";".join([
             "Basic (and reversed card)",
             VOCAB_10000_DECK,
             f"{item.english};{item.russian}<br><br>"
         ])
         for item in vocab.items
-    ]
+    )
 
 
 def _case_notes(deck: str, sample: SampleDeclinable):
@@ -204,15 +210,29 @@ def noun_notes(sample: SampleNoun):
     return declinable_notes(NOUN_DECK, sample)
 
 
-def write_anki_import_file(file_path: Path, notes: List[str], include_tag_column: bool):
-    with open(str(file_path), 'wt', newline='') as f:
-        f.write("#separator:;\n")
-        f.write("#notetype column:1\n")
-        f.write("#deck column:2\n")
-        if include_tag_column:
-            f.write("#tags column:3\n")
-        for n in notes:
-            f.write(n + "\n")
+def write_anki_import_file(
+        file_path: Path,
+        notes: Iterable[str],
+        include_tag_column: bool,
+        incremental: bool = False
+):
+    if incremental:
+        # Only a package can carry the stable guids that let Anki match re-imported notes
+        package_path = file_path.with_suffix(".apkg")
+        changes = write_incremental_package(package_path, notes_from_import_lines(notes, include_tag_column))
+        print(f"{package_path.name}: {changes}")
+        return
+    if file_path.suffix == ".apkg":
+        write_anki_package(file_path, notes_from_import_lines(notes, include_tag_column))
+        return
+    header = [
+        "#separator:;",
+        "#notetype column:1",
+        "#deck column:2",
+    ]
+    if include_tag_column:
+        header.append("#tags column:3")
+    write_lines(file_path, header, notes)
 
 
 def verb_conjugation_notes(c: Conjugation):
@@ -222,7 +242,7 @@ def verb_conjugation_notes(c: Conjugation):
     ]
 
 
-def create_common_conjugations():
+def create_common_conjugations(incremental: bool = False):
     infinitives = [
         "быть", "сказать", "мочь", "говорить", "знать", "стать",
         "есть", "хотеть", "видеть", "идти", "стоять", "думать",
@@ -235,68 +255,106 @@ def create_common_conjugations():
         "узнать", "заметить",
     ]
     conjugations = [find_conjugation(i, force=False) for i in infinitives]
-    notes = []
-    for c in conjugations:
-        notes += verb_conjugation_notes(c)
-    write_anki_import_file(Path("/Users/alex/tmp/verbs.txt"), notes, include_tag_column=False)
+    notes = (n for c in conjugations for n in verb_conjugation_notes(c))
+    write_anki_import_file(OUTPUT_DIR / "verbs.txt", notes, include_tag_column=True, incremental=incremental)
 
 
-def create_all_verb_conjugations():
+def create_all_verb_conjugations(incremental: bool = False, max_workers: Optional[int] = None):
+    """If `max_workers` is given, notes are rendered in parallel over chunks of the verbs"""
     verb_conjugations = read_verbs_in_usage_order(force=False)
-    notes = []
-    for c in verb_conjugations:
-        notes += verb_conjugation_notes(c)
-    write_anki_import_file(Path("/Users/alex/tmp/verbs.txt"), notes, include_tag_column=False)
-
-
-def create_verb_conjugations_for_class_and_stress():
-    verb_conjugations = read_verbs_in_usage_order(force=False)
-    verb_conjugations = verb_conjugations[:3000]
+    if max_workers is None:
+        notes = (n for c in verb_conjugations for n in verb_conjugation_notes(c))
+        write_anki_import_file(OUTPUT_DIR / "verbs.txt", notes, include_tag_column=True, incremental=incremental)
+        return
+    # Workers attach to one copy of the verbs in shared memory, rather than each being sent chunks of them
+    with SharedDataset.publish({"conjugations": [c.to_table() for c in verb_conjugations]}) as dataset:
+        notes = render_shared_in_chunks(
+            dataset, "conjugations", Conjugation.from_table, verb_conjugation_notes, max_workers=max_workers
+        )
+        write_anki_import_file(OUTPUT_DIR / "verbs.txt", notes, include_tag_column=True, incremental=incremental)
+
+
+def most_common_verbs(n: int, study_order: bool) -> List[Conjugation]:
+    """The first `n` verbs in usage order or, if `study_order`, the `n` verbs that together cover the most of
+    lemma.txt, in the order they should be learnt"""
+    if study_order:
+        return study_ordered_verbs(read_conjugations(force=False), budget=n)
+    return read_verbs_in_usage_order(force=False)[:n]
+
+
+def create_verb_conjugations_for_class_and_stress(incremental: bool = False, study_order: bool = False):
+    verb_conjugations = most_common_verbs(3000, study_order)
     # verb_conjugations = [v for v in verb_conjugations if v.short_class in short_classes]
-    notes = []
-    for c in verb_conjugations:
-        notes.append(present_or_future_conjugation_note(c))
-    write_anki_import_file(Path("/Users/alex/tmp/verbs.txt"), notes, include_tag_column=True)
+    notes = (present_or_future_conjugation_note(c) for c in verb_conjugations)
+    write_anki_import_file(OUTPUT_DIR / "verbs.txt", notes, include_tag_column=True, incremental=incremental)
 
 
-def create_vocab_10000_one_sided_decks(force: bool):
+def create_vocab_10000_one_sided_decks(force: bool, incremental: bool = False):
     vocab = read_vocab_10000(force=force)
     russian_to_english = russian_to_english_notes(vocab)
-    write_anki_import_file(Path("/Users/alex/tmp/russian_to_english.txt"), russian_to_english, include_tag_column=False)
+    write_anki_import_file(
+        OUTPUT_DIR / "russian_to_english.txt",
+        russian_to_english,
+        include_tag_column=False,
+        incremental=incremental
+    )
     english_to_russian = english_to_russian_notes(vocab)
-    write_anki_import_file(Path("/Users/alex/tmp/english_to_russian.txt"), english_to_russian, include_tag_column=False)
+    write_anki_import_file(
+        OUTPUT_DIR / "english_to_russian.txt",
+        english_to_russian,
+        include_tag_column=False,
+        incremental=incremental
+    )
 
 
-def create_vocab_10000_two_sided_deck(force: bool):
+def create_vocab_10000_two_sided_deck(force: bool, incremental: bool = False):
     vocab = read_vocab_10000(force=force)
     notes = vocab_10000_notes(vocab)
-    write_anki_import_file(Path("/Users/alex/tmp/vocab_10000.txt"), notes, include_tag_column=False)
+    write_anki_import_file(
+        OUTPUT_DIR / "vocab_10000.txt",
+        notes,
+        include_tag_column=False,
+        incremental=incremental
+    )
 
 
-def create_declinable_notes():
-    notes = []
+def declinable_deck_notes() -> Iterator[str]:
     for sample in SampleAdjective.samples():
-        notes += adjective_notes(sample)
+        yield from adjective_notes(sample)
     for sample in SampleNoun.samples():
-        notes += noun_notes(sample)
-    write_anki_import_file(Path("/Users/alex/tmp/declinables.txt"), notes, include_tag_column=False)
+        yield from noun_notes(sample)
 
 
-def create_pronoun_notes():
-    notes = []
+def pronoun_deck_notes() -> Iterator[str]:
     for sample in SamplePronoun.samples():
-        notes += pronoun_notes(sample)
-    write_anki_import_file(Path("/Users/alex/tmp/pronouns.txt"), notes, include_tag_column=False)
+        yield from pronoun_notes(sample)
 
-def write_most_common_verbs():
-    verb_conjugations = read_verbs_in_usage_order(force=False)
-    verb_conjugations = verb_conjugations[:3000]
-    file_path = Path("/Users/alex/tmp/3000-russian-verbs-by-class.csv")
+
+def create_declinable_notes(incremental: bool = False):
+    write_anki_import_file(
+        OUTPUT_DIR / "declinables.txt",
+        declinable_deck_notes(),
+        include_tag_column=False,
+        incremental=incremental
+    )
+
+
+def create_pronoun_notes(incremental: bool = False):
+    write_anki_import_file(
+        OUTPUT_DIR / "pronouns.txt",
+        pronoun_deck_notes(),
+        include_tag_column=False,
+        incremental=incremental
+    )
+
+def write_most_common_verbs(study_order: bool = False):
+    verb_conjugations = most_common_verbs(3000, study_order)
+    file_path = OUTPUT_DIR / "3000-russian-verbs-by-class.csv"
     with open(str(file_path), 'w', encoding='utf-8', newline='') as f:
         csvfile = csv.writer(f, delimiter=',', quotechar='|', quoting=csv.QUOTE_MINIMAL)
         csvfile.writerow(["lemma", "class", "stress"])
         for verb in verb_conjugations:
-            csvfile.writerow([strip_stress_marks(verb.infinitive), verb.short_class, verb.short_stress])
+            csvfile.writerow([stress_free_key(verb.infinitive), verb.short_class, verb.short_stress])
 
 
 if __name__ == '__main__':
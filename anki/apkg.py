@@ -0,0 +1,363 @@
+import hashlib
+import json
+import re
+import sqlite3
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import List, Dict, Iterable, Optional
+
+from utils.types import checked_type, checked_list_type
+
+# Writes Anki package (.apkg) files directly, rather than the text files which have to be imported by hand.
+# A package is a zip holding an SQLite collection, in the legacy (schema 11) layout that every Anki version
+# can import, together with an (empty) media manifest.
+
+_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+"""
+
+_FIELD_SEPARATOR = "\x1f"
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+DEFAULT_DECK_ID = 1
+DEFAULT_DECK_CONFIG_ID = 1
+
+_CSS = ".card { font-family: arial; font-size: 20px; text-align: center; color: black; background-color: white; }"
+
+
+def _stable_id(text: str) -> int:
+    # Ids must be stable across builds, so that re-importing a package updates rather than duplicates
+    return int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:12], 16)
+
+
+class CardTemplate:
+    def __init__(self, name: str, question_format: str, answer_format: str):
+        self.name: str = checked_type(name, str)
+        self.question_format: str = checked_type(question_format, str)
+        self.answer_format: str = checked_type(answer_format, str)
+
+
+class NoteType:
+    def __init__(self, name: str, fields: List[str], templates: List[CardTemplate], identity_fields: List[int]):
+        self.name: str = checked_type(name, str)
+        self.fields: List[str] = checked_list_type(fields, str)
+        self.templates: List[CardTemplate] = checked_list_type(templates, CardTemplate)
+        # The fields which identify the verb or declinable a note is for, e.g. 'делать (impf)', or the
+        # infinitive and aspect. Used to derive a note's guid, so that it survives changes to the other fields
+        self.identity_fields: List[int] = checked_list_type(identity_fields, int)
+
+    @property
+    def id(self) -> int:
+        return _stable_id(f"note type:{self.name}")
+
+    def as_json(self, modified: int) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "type": 0,
+            "mod": modified,
+            "usn": -1,
+            "sortf": 0,
+            "did": DEFAULT_DECK_ID,
+            "tmpls": [
+                {
+                    "name": t.name,
+                    "ord": i,
+                    "qfmt": t.question_format,
+                    "afmt": t.answer_format,
+                    "did": None,
+                    "bqfmt": "",
+                    "bafmt": "",
+                }
+                for i, t in enumerate(self.templates)
+            ],
+            "flds": [
+                {"name": f, "ord": i, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+                for i, f in enumerate(self.fields)
+            ],
+            "css": _CSS,
+            "latexPre": "",
+            "latexPost": "",
+            "tags": [],
+            "vers": [],
+            "req": [
+                [i, "any", [j for j, f in enumerate(self.fields) if f"{{{{{f}}}}}" in t.question_format]]
+                for i, t in enumerate(self.templates)
+            ],
+        }
+
+
+_FRONT_BACK_ANSWER = "{{FrontSide}}<hr id=answer>{{Back}}"
+
+BASIC = NoteType(
+    "Basic",
+    ["Front", "Back"],
+    [CardTemplate("Card 1", "{{Front}}", _FRONT_BACK_ANSWER)],
+    identity_fields=[0]
+)
+BASIC_AND_REVERSED = NoteType(
+    "Basic (and reversed card)",
+    ["Front", "Back"],
+    [
+        CardTemplate("Card 1", "{{Front}}", _FRONT_BACK_ANSWER),
+        CardTemplate("Card 2", "{{Back}}", "{{FrontSide}}<hr id=answer>{{Front}}"),
+    ],
+    identity_fields=[0]
+)
+VERBS_3000 = NoteType(
+    "3000 Verbs",
+    ["Infinitive", "Aspect", "Class", "Conjugation", "Definitions", "Examples", "Correspondents"],
+    [
+        CardTemplate(
+            "Card 1",
+            "{{Infinitive}} ({{Aspect}})",
+            "{{FrontSide}}<hr id=answer>{{Class}} {{Correspondents}}"
+            "<br>{{Conjugation}}{{Definitions}}{{Examples}}"
+        )
+    ],
+    identity_fields=[0, 1]
+)
+
+NOTE_TYPES: Dict[str, NoteType] = {nt.name: nt for nt in [BASIC, BASIC_AND_REVERSED, VERBS_3000]}
+
+
+def note_type_named(name: str) -> NoteType:
+    note_type = NOTE_TYPES.get(name)
+    if note_type is None:
+        raise ValueError(f"Unknown note type {name}")
+    return note_type
+
+
+class AnkiNote:
+    def __init__(self, note_type: str, deck: str, fields: List[str], tags: List[str], occurrence: int = 0):
+        self.note_type: str = checked_type(note_type, str)
+        self.deck: str = checked_type(deck, str)
+        self.fields: List[str] = checked_list_type(fields, str)
+        self.tags: List[str] = checked_list_type(tags, str)
+        # Distinguishes notes with the same identity, e.g. homonyms in the vocab deck
+        self.occurrence: int = checked_type(occurrence, int)
+
+    @property
+    def identity(self) -> str:
+        # Only the top level deck is included, as the class and stress sub-decks may change on re-scraping
+        note_type = note_type_named(self.note_type)
+        terms = [self.note_type, self.deck.split("::")[0]] + [self.fields[i] for i in note_type.identity_fields]
+        if self.occurrence > 0:
+            terms.append(str(self.occurrence))
+        return _FIELD_SEPARATOR.join(terms)
+
+    @property
+    def guid(self) -> str:
+        return hashlib.sha1(self.identity.encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def content_hash(self) -> str:
+        content = _FIELD_SEPARATOR.join([self.note_type, self.deck, " ".join(self.tags)] + self.fields)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def __str__(self):
+        return f"{self.note_type} [{self.deck}] {self.fields[0]}"
+
+
+def notes_from_import_lines(lines: Iterable[str], include_tag_column: bool) -> List[AnkiNote]:
+    """Converts notes in the semicolon separated import format written by `write_anki_import_file`. The split
+    is the same one that Anki's text importer would make. Every line is checked against its note type before
+    any note is returned, so a wrong `include_tag_column` fails before a file is written"""
+    notes = []
+    occurrences: Dict[str, int] = {}
+    for line in lines:
+        terms = line.split(";")
+        note_type, deck = terms[:2]
+        if include_tag_column:
+            tags = terms[2].split()
+            fields = terms[3:]
+        else:
+            tags = []
+            fields = terms[2:]
+        expected = len(note_type_named(note_type).fields)
+        if len(fields) != expected:
+            hint = "" if include_tag_column else " (does the line have a tag column?)"
+            raise ValueError(f"Note '{line}' has {len(fields)} fields, expected {expected}{hint}")
+        note = AnkiNote(note_type, deck, fields, tags)
+        identity = note.identity
+        note.occurrence = occurrences.get(identity, 0)
+        occurrences[identity] = note.occurrence + 1
+        notes.append(note)
+    return notes
+
+
+def _deck_json(deck_id: int, name: str, modified: int) -> Dict:
+    return {
+        "id": deck_id,
+        "name": name,
+        "desc": "",
+        "mod": modified,
+        "usn": -1,
+        "collapsed": False,
+        "browserCollapsed": False,
+        "newToday": [0, 0],
+        "revToday": [0, 0],
+        "lrnToday": [0, 0],
+        "timeToday": [0, 0],
+        "conf": DEFAULT_DECK_CONFIG_ID,
+        "dyn": 0,
+        "extendNew": 0,
+        "extendRev": 0,
+    }
+
+
+def _deck_ids(notes: List[AnkiNote]) -> Dict[str, int]:
+    # Anki needs every parent of a '::' separated deck name to exist as a deck too
+    names = set()
+    for note in notes:
+        parts = note.deck.split("::")
+        for i in range(1, len(parts) + 1):
+            names.add("::".join(parts[:i]))
+    return {name: _stable_id(f"deck:{name}") for name in sorted(names)}
+
+
+def _deck_config_json(modified: int) -> Dict:
+    return {
+        "id": DEFAULT_DECK_CONFIG_ID,
+        "name": "Default",
+        "mod": modified,
+        "usn": -1,
+        "maxTaken": 60,
+        "autoplay": True,
+        "timer": 0,
+        "replayq": True,
+        "dyn": False,
+        "new": {
+            "bury": True, "delays": [1.0, 10.0], "initialFactor": 2500, "ints": [1, 4, 7],
+            "order": 1, "perDay": 20, "separate": True,
+        },
+        "lapse": {"delays": [10.0], "leechAction": 0, "leechFails": 8, "minInt": 1, "mult": 0.0},
+        "rev": {
+            "bury": True, "ease4": 1.3, "fuzz": 0.05, "ivlFct": 1.0, "maxIvl": 36500,
+            "minSpace": 1, "perDay": 100,
+        },
+    }
+
+
+def _collection_config() -> Dict:
+    return {
+        "activeDecks": [DEFAULT_DECK_ID],
+        "curDeck": DEFAULT_DECK_ID,
+        "newSpread": 0,
+        "collapseTime": 1200,
+        "timeLim": 0,
+        "estTimes": True,
+        "dueCounts": True,
+        "curModel": None,
+        "nextPos": 1,
+        "sortType": "noteFld",
+        "sortBackwards": False,
+        "addToCur": True,
+    }
+
+
+def _sort_field(text: str) -> str:
+    return _HTML_TAG_RE.sub("", text)
+
+
+def _checksum(text: str) -> int:
+    return int(hashlib.sha1(_sort_field(text).encode('utf-8')).hexdigest()[:8], 16)
+
+
+def write_collection(db_path: Path, notes: List[AnkiNote]):
+    modified = int(time.time())
+    note_types = {}
+    for note in notes:
+        note_type = note_type_named(note.note_type)
+        if len(note.fields) != len(note_type.fields):
+            raise ValueError(f"Note {note} has {len(note.fields)} fields, expected {len(note_type.fields)}")
+        note_types[note_type.name] = note_type
+
+    deck_ids = _deck_ids(notes)
+    decks = {str(DEFAULT_DECK_ID): _deck_json(DEFAULT_DECK_ID, "Default", modified)}
+    for name, deck_id in deck_ids.items():
+        decks[str(deck_id)] = _deck_json(deck_id, name, modified)
+    models = {str(nt.id): nt.as_json(modified) for nt in note_types.values()}
+
+    note_rows = []
+    card_rows = []
+    # Note and card ids only need to be unique within the collection; they are otherwise used as creation times
+    first_id = modified * 1000
+    for i_note, note in enumerate(notes):
+        note_id = first_id + i_note
+        note_type = note_types[note.note_type]
+        note_rows.append((
+            note_id, note.guid, note_type.id, modified, -1,
+            f" {' '.join(note.tags)} " if note.tags else "",
+            _FIELD_SEPARATOR.join(note.fields), _sort_field(note.fields[0]), _checksum(note.fields[0]), 0, ""
+        ))
+        for i_template in range(len(note_type.templates)):
+            card_id = first_id + len(card_rows)
+            card_rows.append((
+                card_id, note_id, deck_ids[note.deck], i_template, modified, -1,
+                0, 0, i_note + 1, 0, 0, 0, 0, 0, 0, 0, 0, ""
+            ))
+
+    connection = sqlite3.connect(str(db_path))
+    try:
+        with connection:
+            connection.executescript(_SCHEMA)
+        with connection:
+            connection.execute(
+                "INSERT INTO col VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    1, modified, modified * 1000, modified * 1000, 11, 0, 0, 0,
+                    json.dumps(_collection_config()),
+                    json.dumps(models),
+                    json.dumps(decks),
+                    json.dumps({str(DEFAULT_DECK_CONFIG_ID): _deck_config_json(modified)}),
+                    json.dumps({}),
+                )
+            )
+            connection.executemany("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", note_rows)
+            connection.executemany(
+                "INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", card_rows
+            )
+    finally:
+        connection.close()
+
+
+def write_anki_package(file_path: Path, notes: List[AnkiNote], temp_dir: Optional[Path] = None):
+    """Writes `notes` as an Anki package, which can be opened directly with Anki"""
+    with tempfile.TemporaryDirectory(dir=temp_dir) as tmp:
+        db_path = Path(tmp) / "collection.anki2"
+        write_collection(db_path, notes)
+        with zipfile.ZipFile(file_path, 'w', compression=zipfile.ZIP_DEFLATED) as z:
+            z.write(db_path, "collection.anki2")
+            z.writestr("media", "{}")
@@ -0,0 +1,88 @@
+"""
+Build Anki decks from the command line.
+
+Usage:
+  python -m anki.build \
+      --decks conjugations,vocab-10000 \
+      --outdir /tmp/decks \
+      --workers 4
+
+Decks written after the last change to all of their source files are skipped, unless --force is given.
+--check-packages writes each deck as an .apkg package in a temporary directory instead, which checks every note
+against its note type, and exits non-zero if any deck fails.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from anki.export_job import DECKS, DatasetSources, run_export, print_timings, check_packages
+from anki.output import OUTPUT_DIR
+
+
+def deck_names(text: str) -> List[str]:
+    names = [n.strip() for n in text.split(",") if n.strip()]
+    unknown = [n for n in names if n not in DECKS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown decks {unknown}. Available: {', '.join(DECKS)}")
+    return names
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Build Anki decks, loading each dataset they need once.")
+    p.add_argument("--decks", type=deck_names, default=list(DECKS),
+                   help=f"Comma separated decks to build (default: all of {', '.join(DECKS)}).")
+    p.add_argument("--outdir", type=Path, default=OUTPUT_DIR,
+                   help=f"Directory to write decks to (default: $ANKI_OUTPUT_DIR or {OUTPUT_DIR}).")
+    p.add_argument("--conjugations-dir", type=Path,
+                   help="Directory of conjugation CSV files (default: the repo's resources, via the shelf cache).")
+    p.add_argument("--verbs-txt", type=Path,
+                   help="Verb frequency list, which orders the conjugation decks (default: resources/verbs.txt).")
+    p.add_argument("--vocab-csv", type=Path,
+                   help="Vocabulary CSV file (default: the repo's 10 000 word list, via the shelf cache).")
+    p.add_argument("--pages-dir", type=Path,
+                   help="Directory of downloaded Wiktionary pages (default: scraper/wikipedia_pages, via the shelf "
+                        "cache).")
+    p.add_argument("--workers", type=int, default=None,
+                   help="Maximum number of jobs to run at once (default: chosen by the thread pool).")
+    p.add_argument("--force", action="store_true",
+                   help="Re-read all datasets from source and rebuild every deck, even those up to date.")
+    p.add_argument("--incremental", action="store_true",
+                   help="Write .apkg packages holding only notes added or changed since the last build.")
+    p.add_argument("--check-packages", action="store_true",
+                   help="Write each deck as a package in a temporary directory, to check its notes, and exit "
+                        "non-zero if any fails.")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    sources = DatasetSources(
+        conjugations_dir=args.conjugations_dir,
+        verbs_text=args.verbs_txt,
+        vocab_csv=args.vocab_csv,
+        pages_dir=args.pages_dir,
+    )
+    if args.check_packages:
+        failures = check_packages(args.decks, sources)
+        for name in args.decks:
+            print(f"{name}: {failures.get(name, 'ok')}")
+        if failures:
+            sys.exit(1)
+        return
+    timings = run_export(
+        args.decks,
+        args.outdir,
+        force=args.force,
+        incremental=args.incremental,
+        max_workers=args.workers,
+        sources=sources,
+        skip_up_to_date=True,
+    )
+    if timings:
+        print_timings(timings)
+
+
+if __name__ == "__main__":
+    main()
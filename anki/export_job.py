@@ -0,0 +1,281 @@
+import tempfile
+from functools import cached_property
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Iterable, List, Dict, Optional
+
+from anki.anki import write_anki_import_file, present_or_future_conjugation_note, past_conjugation_note, \
+    russian_to_english_notes, english_to_russian_notes, vocab_10000_notes, adjective_notes, noun_notes, \
+    pronoun_notes
+from anki.job_graph import Job, run_jobs
+from anki.output import OUTPUT_DIR
+from grammar.adjective import SampleAdjective
+from grammar.conjugation import Conjugation
+from grammar.conjugation_data import read_conjugations, load_conjugation_files, CONJUGATIONS_CSV_PATH
+from grammar.noun import SampleNoun
+from grammar.pronoun import SamplePronoun, PRONOUNS_PATH
+from grammar.read_verbs import verbs_in_usage_order, VERBS_TEXT
+from grammar.read_vocab import read_vocab_10000, parse_vocab_csv, Vocab, VOCAB_CSV_PATH
+from scraper.verb_info_shelf import PAGES_PATH, read_verb_infos
+from utils.types import checked_type, checked_list_type
+
+RESOURCES_PATH = Path(__file__).parent.parent / "resources"
+
+
+class DatasetSources:
+    """Where each dataset is read from. A source left as None is read from the repo's resources, through the usual
+    shelf cache; one that is given is always read afresh"""
+
+    def __init__(
+            self,
+            conjugations_dir: Optional[Path] = None,
+            verbs_text: Optional[Path] = None,
+            vocab_csv: Optional[Path] = None,
+            pages_dir: Optional[Path] = None,
+    ):
+        self.conjugations_dir: Optional[Path] = conjugations_dir
+        self.verbs_text: Optional[Path] = verbs_text
+        self.vocab_csv: Optional[Path] = vocab_csv
+        self.pages_dir: Optional[Path] = pages_dir
+
+    def files(self, dataset: str) -> List[Path]:
+        """The files that `dataset` is read from, not counting those of the datasets it depends on"""
+        if dataset == "conjugations":
+            return list((self.conjugations_dir or CONJUGATIONS_CSV_PATH).rglob('*.csv'))
+        if dataset == "verbs_in_usage_order":
+            return [self.verbs_text or VERBS_TEXT]
+        if dataset == "vocab":
+            return [self.vocab_csv or VOCAB_CSV_PATH]
+        if dataset == "adjective_samples":
+            return list((RESOURCES_PATH / "adjectives").iterdir())
+        if dataset == "noun_samples":
+            return list((RESOURCES_PATH / "nouns").iterdir())
+        if dataset == "pronoun_samples":
+            return list(PRONOUNS_PATH.iterdir())
+        if dataset == "verb_infos":
+            return list((self.pages_dir or PAGES_PATH).glob('*.html'))
+        raise ValueError(f"Unknown dataset {dataset}")
+
+
+# Datasets built from other datasets
+DATASET_DEPENDENCIES: Dict[str, List[str]] = {
+    "verbs_in_usage_order": ["conjugations"],
+}
+
+
+class ExportDatasets:
+    """The source data for all decks. Each dataset is loaded at most once, however many decks use it"""
+
+    def __init__(self, force: bool, sources: Optional[DatasetSources] = None):
+        self.force: bool = checked_type(force, bool)
+        self.sources: DatasetSources = checked_type(sources or DatasetSources(), DatasetSources)
+
+    @cached_property
+    def conjugations(self) -> List[Conjugation]:
+        if self.sources.conjugations_dir is None:
+            return read_conjugations(force=self.force)
+        return load_conjugation_files(sorted(self.sources.conjugations_dir.rglob('*.csv')))
+
+    @cached_property
+    def verbs_in_usage_order(self) -> List[Conjugation]:
+        return verbs_in_usage_order(self.conjugations, self.sources.verbs_text or VERBS_TEXT)
+
+    @cached_property
+    def vocab(self) -> Vocab:
+        if self.sources.vocab_csv is None:
+            return read_vocab_10000(force=self.force)
+        return parse_vocab_csv(self.sources.vocab_csv)
+
+    @cached_property
+    def adjective_samples(self) -> List[SampleAdjective]:
+        return SampleAdjective.samples()
+
+    @cached_property
+    def noun_samples(self) -> List[SampleNoun]:
+        return SampleNoun.samples()
+
+    @cached_property
+    def pronoun_samples(self) -> List[SamplePronoun]:
+        return SamplePronoun.samples()
+
+    @cached_property
+    def verb_infos(self) -> list:
+        if self.sources.pages_dir is None:
+            return read_verb_infos(force=self.force)
+        # Imported here, as only parsing pages needs the Wiktionary parser
+        from scraper.wikipedia_verb_info_parser import WikipediaVerbInfoParser
+        return WikipediaVerbInfoParser.from_pages(self.sources.pages_dir)
+
+    def load(self, dataset: str):
+        getattr(self, dataset)
+
+
+class DeckSpec:
+    def __init__(
+            self,
+            name: str,
+            file_name: str,
+            datasets: List[str],
+            write: Callable[[ExportDatasets, Path, bool], None],
+    ):
+        self.name: str = checked_type(name, str)
+        self.file_name: str = checked_type(file_name, str)
+        self.datasets: List[str] = checked_list_type(datasets, str)
+        # Writes the deck, given the datasets, the output path and whether the build is incremental
+        self.write: Callable[[ExportDatasets, Path, bool], None] = write
+
+
+def _notes_deck(notes: Callable[[ExportDatasets], Iterable[str]], include_tag_column: bool = False):
+    def write(datasets: ExportDatasets, path: Path, incremental: bool):
+        write_anki_import_file(path, notes(datasets), include_tag_column=include_tag_column, incremental=incremental)
+
+    return write
+
+
+def _write_3000_verbs(datasets: ExportDatasets, path: Path, incremental: bool):
+    from scripts.write_verb_anki_deck import write_anki_import_file as write_verb_deck
+    write_verb_deck(path, datasets.verb_infos, incremental=incremental)
+
+
+def _write_3000_verbs_by_class(datasets: ExportDatasets, path: Path, incremental: bool):
+    from scripts.write_verb_anki_deck import write_sharded_decks, print_shard_summary
+    summary = write_sharded_decks(datasets.verb_infos, path.parent, incremental, suffix=path.suffix)
+    print_shard_summary(summary, suffix=".apkg" if incremental else path.suffix)
+
+
+DECKS: Dict[str, DeckSpec] = {
+    spec.name: spec
+    for spec in [
+        DeckSpec(
+            "conjugations", "conjugations.txt", ["verbs_in_usage_order"],
+            _notes_deck(lambda d: (present_or_future_conjugation_note(c) for c in d.verbs_in_usage_order),
+                        include_tag_column=True)
+        ),
+        DeckSpec(
+            "imperfect", "imperfect.txt", ["verbs_in_usage_order"],
+            _notes_deck(lambda d: (past_conjugation_note(c) for c in d.verbs_in_usage_order),
+                        include_tag_column=True)
+        ),
+        DeckSpec(
+            "russian-to-english", "russian_to_english.txt", ["vocab"],
+            _notes_deck(lambda d: russian_to_english_notes(d.vocab))
+        ),
+        DeckSpec(
+            "english-to-russian", "english_to_russian.txt", ["vocab"],
+            _notes_deck(lambda d: english_to_russian_notes(d.vocab))
+        ),
+        DeckSpec(
+            "vocab-10000", "vocab_10000.txt", ["vocab"],
+            _notes_deck(lambda d: vocab_10000_notes(d.vocab))
+        ),
+        DeckSpec(
+            "declinables", "declinables.txt", ["adjective_samples", "noun_samples"],
+            _notes_deck(lambda d: chain(
+                (n for s in d.adjective_samples for n in adjective_notes(s)),
+                (n for s in d.noun_samples for n in noun_notes(s)),
+            ))
+        ),
+        DeckSpec(
+            "pronouns", "pronouns.txt", ["pronoun_samples"],
+            _notes_deck(lambda d: (n for s in d.pronoun_samples for n in pronoun_notes(s)))
+        ),
+        DeckSpec("3000-verbs", "verbs.csv", ["verb_infos"], _write_3000_verbs),
+        # A verbs_<class>.csv deck per Zaliznyak class. The file of class 1 stands for them all in checking whether
+        # the decks are up to date
+        DeckSpec("3000-verbs-by-class", "verbs_1.csv", ["verb_infos"], _write_3000_verbs_by_class),
+    ]
+}
+
+
+def dataset_closure(datasets: Iterable[str]) -> List[str]:
+    """The given datasets, and all those they are built from"""
+    closure = {}
+
+    def add(dataset: str):
+        if dataset not in closure:
+            for d in DATASET_DEPENDENCIES.get(dataset, []):
+                add(d)
+            closure[dataset] = None
+
+    for dataset in datasets:
+        add(dataset)
+    return list(closure)
+
+
+def is_up_to_date(spec: DeckSpec, output_path: Path, sources: DatasetSources, incremental: bool = False) -> bool:
+    """Whether the deck was written after the last change to any of the files it is built from"""
+    if incremental:
+        # Incremental builds always write a package
+        output_path = output_path.with_suffix(".apkg")
+    if not output_path.exists():
+        return False
+    output_time = output_path.stat().st_mtime
+    return all(
+        f.stat().st_mtime <= output_time
+        for dataset in dataset_closure(spec.datasets)
+        for f in sources.files(dataset)
+    )
+
+
+def run_export(
+        deck_names: List[str],
+        output_dir: Path,
+        force: bool = False,
+        incremental: bool = False,
+        max_workers: Optional[int] = None,
+        sources: Optional[DatasetSources] = None,
+        skip_up_to_date: bool = False,
+) -> Dict[str, float]:
+    """Builds a job graph of the requested decks and the datasets they need, and runs it, so that each dataset
+    is loaded once and decks are written as soon as their datasets are ready. If `skip_up_to_date`, decks whose
+    output is newer than all their source files are skipped, along with any datasets only they need. Returns
+    the time taken, in seconds, to load each dataset and to write each deck"""
+    sources = sources or DatasetSources()
+    specs = [DECKS[name] for name in deck_names]
+    if skip_up_to_date and not force:
+        up_to_date = [
+            spec for spec in specs if is_up_to_date(spec, output_dir / spec.file_name, sources, incremental)
+        ]
+        for spec in up_to_date:
+            print(f"{spec.name} is up to date")
+        specs = [spec for spec in specs if spec not in up_to_date]
+    datasets = ExportDatasets(force, sources)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    def load(dataset: str) -> Callable[[], None]:
+        return lambda: datasets.load(dataset)
+
+    def write(spec: DeckSpec) -> Callable[[], None]:
+        return lambda: spec.write(datasets, output_dir / spec.file_name, incremental)
+
+    jobs = [
+        Job(f"load {dataset}", load(dataset), [f"load {d}" for d in DATASET_DEPENDENCIES.get(dataset, [])])
+        for dataset in dataset_closure(d for spec in specs for d in spec.datasets)
+    ]
+    jobs += [Job(spec.name, write(spec), [f"load {d}" for d in spec.datasets]) for spec in specs]
+    return run_jobs(jobs, max_workers)
+
+
+def check_packages(deck_names: List[str], sources: Optional[DatasetSources] = None) -> Dict[str, str]:
+    """Writes each deck as an .apkg package in a temporary directory. Writing a package checks every note against
+    its note type, which a text import file doesn't. Returns the error of each deck that fails"""
+    datasets = ExportDatasets(False, sources or DatasetSources())
+    failures: Dict[str, str] = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name in deck_names:
+            spec = DECKS[name]
+            try:
+                spec.write(datasets, Path(output_dir) / Path(spec.file_name).with_suffix(".apkg"), False)
+            except ValueError as e:
+                failures[name] = str(e)
+    return failures
+
+
+def print_timings(timings: Dict[str, float]):
+    width = max(len(name) for name in timings)
+    for name, elapsed in timings.items():
+        print(f"{name:<{width}}  {elapsed:7.2f}s")
+
+
+if __name__ == '__main__':
+    print_timings(run_export(list(DECKS.keys()), OUTPUT_DIR))
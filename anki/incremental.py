@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+from typing import List, Dict
+
+from anki.apkg import AnkiNote, write_anki_package
+from utils.types import checked_list_type
+
+# Incremental deck builds. Each build records a manifest of note guid -> (content hash, first field), and the
+# next build writes only the notes that were added or changed since, so that unchanged notes (and their review
+# history) are left alone on import.
+
+
+class ChangeSet:
+    def __init__(self, added: List[AnkiNote], changed: List[AnkiNote], removed: List[str]):
+        self.added: List[AnkiNote] = checked_list_type(added, AnkiNote)
+        self.changed: List[AnkiNote] = checked_list_type(changed, AnkiNote)
+        # First fields of notes in the previous build that are no longer produced
+        self.removed: List[str] = checked_list_type(removed, str)
+
+    @property
+    def notes_to_write(self) -> List[AnkiNote]:
+        return self.added + self.changed
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+    def __str__(self):
+        return f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed"
+
+
+def manifest_path_for(file_path: Path) -> Path:
+    return file_path.with_name(file_path.stem + ".manifest.json")
+
+
+def read_manifest(path: Path) -> Dict[str, List[str]]:
+    if not path.exists():
+        return {}
+    with open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(path: Path, notes: List[AnkiNote]):
+    manifest = {note.guid: [note.content_hash, note.fields[0]] for note in notes}
+    with open(path, 'wt', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+
+
+def change_set(notes: List[AnkiNote], previous_manifest: Dict[str, List[str]]) -> ChangeSet:
+    added = []
+    changed = []
+    current_guids = set()
+    for note in notes:
+        guid = note.guid
+        current_guids.add(guid)
+        previous = previous_manifest.get(guid)
+        if previous is None:
+            added.append(note)
+        elif previous[0] != note.content_hash:
+            changed.append(note)
+    removed = [
+        first_field
+        for guid, (_, first_field) in previous_manifest.items()
+        if guid not in current_guids
+    ]
+    return ChangeSet(added, changed, removed)
+
+
+def write_incremental_package(file_path: Path, notes: List[AnkiNote]) -> ChangeSet:
+    """Writes a package holding only the notes added or changed since the last build to `file_path`, and
+    updates the manifest stored beside it. Anki cannot delete notes through an import, so the first fields of
+    removed notes are written to a '.removed.txt' file alongside, for deleting by hand"""
+    manifest_path = manifest_path_for(file_path)
+    changes = change_set(notes, read_manifest(manifest_path))
+    write_anki_package(file_path, changes.notes_to_write)
+    removed_path = file_path.with_name(file_path.stem + ".removed.txt")
+    if changes.removed:
+        with open(removed_path, 'wt', encoding='utf-8') as f:
+            for first_field in changes.removed:
+                f.write(first_field + "\n")
+    elif removed_path.exists():
+        removed_path.unlink()
+    write_manifest(manifest_path, notes)
+    return changes
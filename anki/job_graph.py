@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Callable, List, Dict, Optional
+
+from utils.types import checked_type, checked_list_type
+
+
+class Job:
+    def __init__(self, name: str, run: Callable[[], None], dependencies: List[str]):
+        self.name: str = checked_type(name, str)
+        self.run: Callable[[], None] = run
+        # Names of the jobs that must finish before this one starts
+        self.dependencies: List[str] = checked_list_type(dependencies, str)
+
+
+def _check_graph(jobs: List[Job]):
+    names = {job.name for job in jobs}
+    if len(names) != len(jobs):
+        raise ValueError("Duplicate job names")
+    for job in jobs:
+        missing = [d for d in job.dependencies if d not in names]
+        if missing:
+            raise ValueError(f"Job {job.name} depends on unknown jobs {missing}")
+    by_name = {job.name: job for job in jobs}
+    visited = set()
+    on_path = set()
+
+    def visit(name: str):
+        if name in on_path:
+            raise ValueError(f"Dependency cycle through {name}")
+        if name in visited:
+            return
+        on_path.add(name)
+        for d in by_name[name].dependencies:
+            visit(d)
+        on_path.remove(name)
+        visited.add(name)
+
+    for job in jobs:
+        visit(job.name)
+
+
+def run_jobs(jobs: List[Job], max_workers: Optional[int] = None) -> Dict[str, float]:
+    """Runs each job once all of its dependencies have finished, running independent jobs concurrently.
+    Returns the time taken by each job, in seconds, in the order they finished. The first failure is re-raised,
+    after the jobs already running have finished"""
+    _check_graph(jobs)
+    waiting_on = {job.name: set(job.dependencies) for job in jobs}
+    dependants: Dict[str, List[Job]] = {job.name: [] for job in jobs}
+    for job in jobs:
+        for d in job.dependencies:
+            dependants[d].append(job)
+    timings = {}
+
+    def timed(job: Job) -> float:
+        start = time.perf_counter()
+        job.run()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running: Dict[Future, Job] = {
+            executor.submit(timed, job): job for job in jobs if not job.dependencies
+        }
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                timings[job.name] = future.result()
+                for dependant in dependants[job.name]:
+                    waiting_on[dependant.name].discard(job.name)
+                    if not waiting_on[dependant.name]:
+                        running[executor.submit(timed, dependant)] = dependant
+    return timings
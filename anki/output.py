@@ -0,0 +1,5 @@
+import os
+from pathlib import Path
+
+# Directory that decks are written to, unless a build says otherwise. Set ANKI_OUTPUT_DIR to override it
+OUTPUT_DIR = Path(os.environ.get("ANKI_OUTPUT_DIR", "/Users/alex/tmp"))
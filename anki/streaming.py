@@ -0,0 +1,88 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Callable, TypeVar, List, Optional, Deque
+
+from grammar.shared_dataset import SharedDataset, Table, attach_worker, worker_dataset
+
+T = TypeVar("T")
+
+# Size of the write buffer used for import files, so that notes are written in large blocks as they are rendered
+WRITE_BUFFER_SIZE = 1 << 16
+
+
+def chunked(iterable: Iterable[T], chunk_size: int) -> Iterator[List[T]]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _render_chunk(render: Callable[[T], Iterable[str]], chunk: List[T]) -> List[str]:
+    return [note for item in chunk for note in render(item)]
+
+
+def _render_shared_chunk(
+        render: Callable[[T], Iterable[str]],
+        decode: Callable[[Table], T],
+        section: str,
+        positions: range,
+) -> List[str]:
+    dataset = worker_dataset()
+    return [note for i in positions for note in render(decode(dataset.table(section, i)))]
+
+
+def _in_order(executor: ProcessPoolExecutor, tasks: Iterable[tuple], max_in_flight: int) -> Iterator[str]:
+    """Submits each task, a function and its arguments, and yields the notes of each in order, with no more than
+    `max_in_flight` tasks submitted but not yet yielded"""
+    in_flight: Deque[Future] = deque()
+    for function, *args in tasks:
+        in_flight.append(executor.submit(function, *args))
+        if len(in_flight) >= max_in_flight:
+            yield from in_flight.popleft().result()
+    while in_flight:
+        yield from in_flight.popleft().result()
+
+
+def render_in_chunks(
+        items: Iterable[T],
+        render: Callable[[T], Iterable[str]],
+        chunk_size: int = 500,
+        max_workers: Optional[int] = None,
+) -> Iterator[str]:
+    """Yields the notes rendered from each item, in the order of `items`, rendering chunks of items in a process
+    pool. Only a bounded number of chunks is in flight at once, so memory use doesn't grow with the input.
+    `render` must be a module level function, so that it can be pickled"""
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        tasks = ((_render_chunk, render, chunk) for chunk in chunked(items, chunk_size))
+        yield from _in_order(executor, tasks, 2 * max_workers)
+
+
+def render_shared_in_chunks(
+        dataset: SharedDataset,
+        section: str,
+        decode: Callable[[Table], T],
+        render: Callable[[T], Iterable[str]],
+        chunk_size: int = 500,
+        max_workers: Optional[int] = None,
+) -> Iterator[str]:
+    """As `render_in_chunks`, over the tables of a section of a shared dataset, each decoded into an item by
+    `decode`, e.g. `Conjugation.from_table`. The workers attach to the dataset, so a task carries only a range of
+    positions rather than pickled items"""
+    max_workers = max_workers or os.cpu_count() or 1
+    size = dataset.section_size(section)
+    with ProcessPoolExecutor(max_workers, initializer=attach_worker, initargs=(dataset.name,)) as executor:
+        tasks = (
+            (_render_shared_chunk, render, decode, section, range(start, min(start + chunk_size, size)))
+            for start in range(0, size, chunk_size)
+        )
+        yield from _in_order(executor, tasks, 2 * max_workers)
+
+
+def write_lines(file_path: Path, header: List[str], lines: Iterable[str]):
+    """Writes each line as soon as it is produced, through a large buffer"""
+    with open(str(file_path), 'wt', newline='', buffering=WRITE_BUFFER_SIZE) as f:
+        f.writelines(h + "\n" for h in header)
+        f.writelines(line + "\n" for line in lines)
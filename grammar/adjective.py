@@ -1,6 +1,6 @@
-from pathlib import Path
 from typing import List
 
+from grammar.declension_store import read_declension_store
 from grammar.declinable import Declinable, SampleDeclinable
 from utils.types import checked_type
 
@@ -24,14 +24,10 @@ class SampleAdjective(SampleDeclinable):
 
     @staticmethod
     def samples() -> List['SampleAdjective']:
-        path = Path(__file__).parent.parent / "resources" / "adjectives"
-        files = path.glob("*.txt")
-        files = sorted(files)
-        adjectives = []
-        for file in files:
-            heading, terms = Declinable.parse_file(file)
-            adjectives.append(SampleAdjective(Adjective(terms), heading))
-        return adjectives
+        return [
+            SampleAdjective(Adjective(terms), heading)
+            for heading, terms in read_declension_store().tables_in("adjectives")
+        ]
 
 if __name__ == '__main__':
     foo = SampleAdjective.samples()
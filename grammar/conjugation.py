@@ -1,8 +1,10 @@
 import re
 from enum import StrEnum
-from typing import Optional, List
+from functools import lru_cache, cached_property
+from typing import Optional, List, Dict, NamedTuple
 
 from utils.types import checked_type, checked_list_type, checked_optional_type
+from utils.utils import canonical_text, lookup_key
 
 
 class Aspect(StrEnum):
@@ -24,13 +26,80 @@ IRREG_1_RE = re.compile(r"(irreg-[abc][']*)")
 IRREG_2_RE = re.compile(r"(irreg-[abc][']*/[abc][']*)")
 
 IMPERFECT_STRESS_RE = re.compile(r"[^/]+/([abc].*)")
+SHORT_CLASS_NUMBER_RE = re.compile(r"(\d+)[abc]")
+SHORT_STRESS_RE = re.compile(r"\d+([abc/])")
 
-# Utility used in converting CSV representations of Conjugations
-def _find_table_value(table: List[List[str]], key: str) -> Optional[str]:
+# Utility used in converting CSV representations of Conjugations. Decodes the table in a single
+# pass, so that each `from_values` lookup is a dict access rather than a scan of the table
+def _table_values(table: List[List[str]]) -> Dict[str, str]:
+    values = {}
     for row in table:
-        if row[0] == key:
-            return row[1]
-    return None
+        values.setdefault(row[0], row[1])
+    return values
+
+
+class ZaliznyakClassInfo(NamedTuple):
+    short_class_and_stress: str
+    short_class: str
+    short_stress: str
+    imperfect_stress_pattern: str
+    is_irregular: bool
+
+
+@lru_cache(maxsize=None)
+def parse_zaliznyak_class(class_name: str) -> ZaliznyakClassInfo:
+    """Parses a class name as it appears in Wiktionary, e.g. '4b // 4a'. Each distinct name is parsed once"""
+
+    def strip_other_characters(txt: str) -> str:
+        stripped = ''.join(filter(lambda char: str.isalnum(char) or char in ['/', '-', '\''], txt))
+        return stripped
+
+    text = strip_other_characters(class_name)
+    for regex in [SHORT_CLASS_2_RE, SHORT_CLASS_1_RE, IRREG_2_RE, IRREG_1_RE]:
+        if a := regex.match(text):
+            scs = a.groups()[0]
+            break
+    else:
+        raise ValueError(f"Unexpected class name: {text}")
+
+    if a := IMPERFECT_STRESS_RE.match(scs):
+        imperfect_stress_pattern = a.groups()[0]
+    else:
+        imperfect_stress_pattern = "a"
+
+    if scs.startswith("irreg"):
+        short_class = "irreg"
+    elif a := SHORT_CLASS_NUMBER_RE.match(scs):
+        short_class = a.groups()[0]
+    else:
+        raise ValueError(f"Unexpected short class and stress: {scs}")
+
+    if scs.startswith("irreg-"):
+        short_stress = scs[6]
+    elif a := SHORT_STRESS_RE.match(scs):
+        short_stress = a.groups()[0]
+    else:
+        raise ValueError(f"Unexpected short class and stress: {scs}")
+
+    return ZaliznyakClassInfo(
+        short_class_and_stress=scs,
+        short_class=short_class,
+        short_stress=short_stress,
+        imperfect_stress_pattern=imperfect_stress_pattern,
+        is_irregular=short_class == "irreg",
+    )
+
+
+_INTERNED_CLASSES: Dict[str, 'ZaliznyakClass'] = {}
+
+
+def intern_zaliznyak_class(class_name: str) -> 'ZaliznyakClass':
+    """Returns the single shared ZaliznyakClass for `class_name`. There are only a few hundred distinct
+    classes across all verbs"""
+    z_class = _INTERNED_CLASSES.get(class_name)
+    if z_class is None:
+        z_class = _INTERNED_CLASSES.setdefault(class_name, ZaliznyakClass(class_name))
+    return z_class
 
 
 class ZaliznyakClass:
@@ -45,12 +114,20 @@ class ZaliznyakClass:
     def __str__(self):
         return f"{self.class_name}"
 
+    def __reduce__(self):
+        # Re-intern when loaded from a shelf
+        return intern_zaliznyak_class, (self.class_name,)
+
     def to_table(self) -> List[List[str]]:
         return [[self.CLASS_LABEL, self.class_name]]
 
     @staticmethod
     def from_table(table: List[List[str]]) -> 'ZaliznyakClass':
-        return ZaliznyakClass(_find_table_value(table, ZaliznyakClass.CLASS_LABEL))
+        return ZaliznyakClass.from_values(_table_values(table))
+
+    @staticmethod
+    def from_values(values: Dict[str, str]) -> 'ZaliznyakClass':
+        return intern_zaliznyak_class(checked_type(values.get(ZaliznyakClass.CLASS_LABEL), str))
 
     def __hash__(self):
         return hash(self.class_name)
@@ -58,47 +135,29 @@ class ZaliznyakClass:
     def __eq__(self, other):
         return self.class_name == other.class_name
 
+    @property
+    def info(self) -> ZaliznyakClassInfo:
+        return parse_zaliznyak_class(self.class_name)
+
     @property
     def short_class_and_stress(self):
-        def strip_other_characters(txt: str) -> str:
-            stripped = ''.join(filter(lambda char: str.isalnum(char) or char in ['/', '-', '\''], txt))
-            return stripped
-
-        text = strip_other_characters(self.class_name)
-        for regex in [SHORT_CLASS_2_RE, SHORT_CLASS_1_RE, IRREG_2_RE, IRREG_1_RE]:
-            if a := regex.match(text):
-                return a.groups()[0]
-        raise ValueError(f"Unexpected class name: {text}")
+        return self.info.short_class_and_stress
 
     @property
     def imperfect_stress_pattern(self):
-        if a := IMPERFECT_STRESS_RE.match(self.short_class_and_stress):
-            return a.groups()[0]
-        return "a"
+        return self.info.imperfect_stress_pattern
 
     @property
     def short_class(self) -> str:
-        scs = self.short_class_and_stress
-        if scs.startswith("irreg"):
-            return "irreg"
-        regex = re.compile(r"(\d+)[abc]")
-        if a := regex.match(scs):
-            return a.groups()[0]
-        raise ValueError(f"Unexpected short class and stress: {scs}")
+        return self.info.short_class
 
     @property
     def is_irregular(self):
-        return self.short_class == "irreg"
+        return self.info.is_irregular
 
     @property
     def short_stress(self):
-        scs = self.short_class_and_stress
-        if scs.startswith("irreg-"):
-            return scs[6]
-        regex = re.compile(r"\d+([abc/])")
-        if a := regex.match(scs):
-            return a.groups()[0]
-        raise ValueError(f"Unexpected short class and stress: {scs}")
+        return self.info.short_stress
 
 
 class Tense(StrEnum):
@@ -157,10 +216,14 @@ class Participle:
 
     @staticmethod
     def from_table(table: List[List[str]]) -> 'Participle':
-        text = _find_table_value(table, Participle.PARTICIPLE_TEXT)
-        participle_type = ParticipleType(_find_table_value(table, Participle.PARTICIPLE_TYPE))
-        tense = Tense(_find_table_value(table, Participle.PARTICIPLE_TENSE))
-        long_or_short = LongOrShort(_find_table_value(table, Participle.PARTICIPLE_LONG_OR_SHORT))
+        return Participle.from_values(_table_values(table))
+
+    @staticmethod
+    def from_values(values: Dict[str, str]) -> 'Participle':
+        text = values.get(Participle.PARTICIPLE_TEXT)
+        participle_type = ParticipleType(values.get(Participle.PARTICIPLE_TYPE))
+        tense = Tense(values.get(Participle.PARTICIPLE_TENSE))
+        long_or_short = LongOrShort(values.get(Participle.PARTICIPLE_LONG_OR_SHORT))
         return Participle(text, participle_type, tense, long_or_short)
 
     def __eq__(self, other):
@@ -196,17 +259,18 @@ class Participles:
 
     @staticmethod
     def from_table(table: List[List[str]]) -> 'Participles':
-        participle_table = [row for row in table if row[0].startswith("PART:")]
-        sub_tables = {}
-        for row in participle_table:
-            _, i, key = row[0].split(":")
-            row = [key, row[1]]
-            if i not in sub_tables:
-                sub_tables[i] = []
-            sub_tables[i].append(row)
+        return Participles.from_values(_table_values(table))
+
+    @staticmethod
+    def from_values(values: Dict[str, str]) -> 'Participles':
+        sub_values = {}
+        for label, value in values.items():
+            if label.startswith("PART:"):
+                _, i, key = label.split(":")
+                sub_values.setdefault(i, {})[key] = value
         participles = [
-            Participle.from_table(value_table)
-            for value_table in sub_tables.values()
+            Participle.from_values(participle_values)
+            for participle_values in sub_values.values()
         ]
         return Participles(participles)
 
@@ -268,12 +332,16 @@ class PresentOrFutureConjugation:
 
     @staticmethod
     def from_table(table: List[List[str]]) -> 'PresentOrFutureConjugation':
-        first_person_singular = _find_table_value(table, PresentOrFutureConjugation.POF_1S)
-        second_person_singular = _find_table_value(table, PresentOrFutureConjugation.POF_2S)
-        third_person_singular = _find_table_value(table, PresentOrFutureConjugation.POF_3S)
-        first_person_plural = _find_table_value(table, PresentOrFutureConjugation.POF_1P)
-        second_person_plural = _find_table_value(table, PresentOrFutureConjugation.POF_2P)
-        third_person_plural = _find_table_value(table, PresentOrFutureConjugation.POF_3P)
+        return PresentOrFutureConjugation.from_values(_table_values(table))
+
+    @staticmethod
+    def from_values(values: Dict[str, str]) -> 'PresentOrFutureConjugation':
+        first_person_singular = values.get(PresentOrFutureConjugation.POF_1S)
+        second_person_singular = values.get(PresentOrFutureConjugation.POF_2S)
+        third_person_singular = values.get(PresentOrFutureConjugation.POF_3S)
+        first_person_plural = values.get(PresentOrFutureConjugation.POF_1P)
+        second_person_plural = values.get(PresentOrFutureConjugation.POF_2P)
+        third_person_plural = values.get(PresentOrFutureConjugation.POF_3P)
         return PresentOrFutureConjugation(
             first_person_singular,
             second_person_singular,
@@ -351,10 +419,14 @@ class PastConjugation:
 
     @staticmethod
     def from_table(table: List[List[str]]) -> 'PastConjugation':
-        masculine = _find_table_value(table, PastConjugation.PAST_M)
-        feminine = _find_table_value(table, PastConjugation.PAST_F)
-        neuter = _find_table_value(table, PastConjugation.PAST_N)
-        plural = _find_table_value(table, PastConjugation.PAST_PL)
+        return PastConjugation.from_values(_table_values(table))
+
+    @staticmethod
+    def from_values(values: Dict[str, str]) -> 'PastConjugation':
+        masculine = values.get(PastConjugation.PAST_M)
+        feminine = values.get(PastConjugation.PAST_F)
+        neuter = values.get(PastConjugation.PAST_N)
+        plural = values.get(PastConjugation.PAST_PL)
         return PastConjugation(masculine, feminine, neuter, plural)
 
     def __eq__(self, other):
@@ -397,8 +469,12 @@ class Imperative:
 
     @staticmethod
     def from_table(table: List[List[str]]) -> 'Optional[Imperative]':
-        singular = _find_table_value(table, Imperative.IMP_S)
-        plural = _find_table_value(table, Imperative.IMP_PL)
+        return Imperative.from_values(_table_values(table))
+
+    @staticmethod
+    def from_values(values: Dict[str, str]) -> 'Optional[Imperative]':
+        singular = values.get(Imperative.IMP_S)
+        plural = values.get(Imperative.IMP_PL)
         if singular is None and plural is None:
             return None
         return Imperative(singular, plural)
@@ -443,10 +519,14 @@ class VerbType:
 
     @staticmethod
     def from_table(table: List[List[str]]) -> 'VerbType':
-        zaliznyak_class = ZaliznyakClass.from_table(table)
-        aspect = Aspect(_find_table_value(table, VerbType.ASPECT))
-        transitive = _find_table_value(table, VerbType.TRANSITIVE) == "True"
-        reflexive = _find_table_value(table, VerbType.REFLEXIVE) == "True"
+        return VerbType.from_values(_table_values(table))
+
+    @staticmethod
+    def from_values(values: Dict[str, str]) -> 'VerbType':
+        zaliznyak_class = ZaliznyakClass.from_values(values)
+        aspect = Aspect(values.get(VerbType.ASPECT))
+        transitive = values.get(VerbType.TRANSITIVE) == "True"
+        reflexive = values.get(VerbType.REFLEXIVE) == "True"
         return VerbType(zaliznyak_class, aspect, transitive, reflexive)
 
     def __eq__(self, other):
@@ -478,6 +558,22 @@ class Conjugation:
         self.past: PastConjugation = checked_type(past, PastConjugation)
         self.imperative: Optional[Imperative] = checked_optional_type(imperative, Imperative)
 
+    @cached_property
+    def canonical_infinitive(self) -> str:
+        """The infinitive with stress marks, NFC normalised and with Latin look-alike letters fixed"""
+        return canonical_text(self.infinitive)
+
+    @cached_property
+    def infinitive_key(self) -> str:
+        """The infinitive as matched against frequency lists and user input, see `lookup_key`"""
+        return lookup_key(self.infinitive)
+
+    # Cached keys, which are derived from the infinitive, so are left out of the shelves and recomputed when used
+    _CACHED_KEYS = ("canonical_infinitive", "infinitive_key")
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k not in self._CACHED_KEYS}
+
     @property
     def short_aspect(self):
         if self.verb_type.aspect == Aspect.PERFECTIVE:
@@ -532,12 +628,16 @@ class Conjugation:
 
     @staticmethod
     def from_table(table: List[List[str]]) -> 'Conjugation':
-        infinitive = _find_table_value(table, "Infinitive")
-        verb_type = VerbType.from_table(table)
-        participles = Participles.from_table(table)
-        present_or_future = PresentOrFutureConjugation.from_table(table)
-        past = PastConjugation.from_table(table)
-        imperative = Imperative.from_table(table)
+        return Conjugation.from_values(_table_values(table))
+
+    @staticmethod
+    def from_values(values: Dict[str, str]) -> 'Conjugation':
+        infinitive = values.get("Infinitive")
+        verb_type = VerbType.from_values(values)
+        participles = Participles.from_values(values)
+        present_or_future = PresentOrFutureConjugation.from_values(values)
+        past = PastConjugation.from_values(values)
+        imperative = Imperative.from_values(values)
         return Conjugation(infinitive, verb_type, participles, present_or_future, past, imperative)
 
     def __eq__(self, other):
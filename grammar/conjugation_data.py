@@ -1,31 +1,106 @@
+import csv
+import io
+import json
 import shelve
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterable, Tuple
 
 from grammar.conjugation import Conjugation
 from utils.csv_utils import read_csv_file
-from utils.utils import sanitize_text
+from utils.utils import group_into_dict, lookup_key
 
 CONJUGATIONS_CSV_PATH = Path(__file__).parent.parent / 'resources' / 'conjugations'
 SHELF_PATH = Path(__file__).parent / "_conjugations.shelf"
 
+# Conjugations grouped by short Zaliznyak class, and by stress free infinitive, built on first use
+_BY_SHORT_CLASS: Dict[str, List[Conjugation]] = {}
+_BY_INFINITIVE_KEY: Dict[str, List[Conjugation]] = {}
 
-def read_conjugations(force: bool) -> List[Conjugation]:
+# Layout of a packed conjugations file: an 8 byte little-endian length, then a JSON index
+# mapping each verb to the (offset, length) of its CSV table, then the concatenated UTF-8 tables.
+# Offsets are relative to the start of the data section.
+_PACK_HEADER = struct.Struct("<Q")
+
+
+def conjugation_from_csv_text(text: str) -> Conjugation:
+    table = list(csv.reader(io.StringIO(text, newline='')))
+    return Conjugation.from_table(table)
+
+
+def conjugation_from_csv_file(path: Path) -> Conjugation:
+    return Conjugation.from_table(read_csv_file(path))
+
+
+def load_conjugation_files(csv_files: Iterable[Path], max_workers: Optional[int] = None) -> List[Conjugation]:
+    """Reads and decodes each CSV table concurrently. Results are in the same order as `csv_files`"""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(conjugation_from_csv_file, csv_files))
+
+
+def pack_conjugation_files(csv_files: Iterable[Path], pack_path: Path):
+    index: Dict[str, Tuple[int, int]] = {}
+    blobs = []
+    offset = 0
+    for f in csv_files:
+        blob = f.read_bytes()
+        assert f.stem not in index, f"Duplicate conjugation {f.stem}"
+        index[f.stem] = (offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+    index_bytes = json.dumps(index, ensure_ascii=False).encode('utf-8')
+    with open(pack_path, 'wb') as f:
+        f.write(_PACK_HEADER.pack(len(index_bytes)))
+        f.write(index_bytes)
+        for blob in blobs:
+            f.write(blob)
+
+
+def read_pack_index(pack_path: Path) -> Tuple[Dict[str, Tuple[int, int]], int]:
+    """Returns the index of a packed conjugations file, and the file position at which its data section starts"""
+    with open(pack_path, 'rb') as f:
+        (index_length,) = _PACK_HEADER.unpack(f.read(_PACK_HEADER.size))
+        index = json.loads(f.read(index_length).decode('utf-8'))
+    return index, _PACK_HEADER.size + index_length
+
+
+def read_packed_conjugations(pack_path: Path, verbs: Optional[Iterable[str]] = None) -> List[Conjugation]:
+    """Decodes the conjugations stored in a packed file. If `verbs` is given, then only those tables are read,
+    using the offset index"""
+    index, data_start = read_pack_index(pack_path)
+    keys = list(index.keys()) if verbs is None else list(verbs)
+    conjugations = []
+    with open(pack_path, 'rb') as f:
+        for key in keys:
+            offset, length = index[key]
+            f.seek(data_start + offset)
+            conjugations.append(conjugation_from_csv_text(f.read(length).decode('utf-8')))
+    return conjugations
+
+
+def read_conjugations(force: bool, pack_path: Optional[Path] = None) -> List[Conjugation]:
     key = "Conjugations"
     with shelve.open(str(SHELF_PATH)) as shelf:
         if key not in shelf or force:
-            csv_files = list(CONJUGATIONS_CSV_PATH.rglob('*.csv'))
-            conjugations = []
-            for f in csv_files:
-                table = read_csv_file(f)
-                conjugations.append(Conjugation.from_table(table))
+            if pack_path is not None:
+                conjugations = read_packed_conjugations(pack_path)
+            else:
+                csv_files = sorted(CONJUGATIONS_CSV_PATH.rglob('*.csv'))
+                conjugations = load_conjugation_files(csv_files)
             shelf[key] = conjugations
         return shelf[key]
 
 
+def conjugations_by_infinitive_key(force: bool) -> Dict[str, List[Conjugation]]:
+    if force or not _BY_INFINITIVE_KEY:
+        _BY_INFINITIVE_KEY.clear()
+        _BY_INFINITIVE_KEY.update(group_into_dict(read_conjugations(force), lambda c: c.infinitive_key))
+    return _BY_INFINITIVE_KEY
+
+
 def find_conjugation(infinitive: str, force: bool, fail_if_missing: bool = True) -> Optional[Conjugation]:
-    conjugations = read_conjugations(force)
-    cs = [c for c in conjugations if sanitize_text(c.infinitive) == sanitize_text(infinitive)]
+    cs = conjugations_by_infinitive_key(force).get(lookup_key(infinitive), [])
     if len(cs) == 1:
         return cs[0]
     if fail_if_missing:
@@ -35,16 +110,34 @@ def find_conjugation(infinitive: str, force: bool, fail_if_missing: bool = True)
     raise ValueError(f"Multiple conjugations found for {infinitive}")
 
 
+def conjugations_by_short_class(force: bool) -> Dict[str, List[Conjugation]]:
+    if force or not _BY_SHORT_CLASS:
+        _BY_SHORT_CLASS.clear()
+        _BY_SHORT_CLASS.update(group_into_dict(read_conjugations(force), lambda c: c.short_class))
+    return _BY_SHORT_CLASS
+
+
 def verbs_matching_zaliznyak_class(short_class: str, stem_filter: Optional[str], force: bool):
-    conjugations = read_conjugations(force)
-    matching = [c for c in conjugations if c.verb_type.zaliznyak_class.short_class == short_class]
+    matching = list(conjugations_by_short_class(force).get(short_class, []))
     if stem_filter is None:
         return matching
 
+    stem_filter = lookup_key(stem_filter)
     reflexive_stem = stem_filter + "ся"
-    matching_stem = [c for c in matching if
-                     sanitize_text(c.infinitive).endswith(stem_filter) or sanitize_text(c.infinitive).endswith(
-                         reflexive_stem)]
+    matching_stem = [c for c in matching if c.infinitive_key.endswith((stem_filter, reflexive_stem))]
     return matching_stem
 
 
+if __name__ == '__main__':
+    import time
+    csv_files = sorted(CONJUGATIONS_CSV_PATH.rglob('*.csv'))
+    start = time.perf_counter()
+    from_files = load_conjugation_files(csv_files)
+    print(f"Loaded {len(from_files)} CSV tables in {time.perf_counter() - start:.2f}s")
+
+    pack = Path(__file__).parent / "_conjugations.pack"
+    pack_conjugation_files(csv_files, pack)
+    start = time.perf_counter()
+    from_pack = read_packed_conjugations(pack)
+    print(f"Loaded {len(from_pack)} packed tables in {time.perf_counter() - start:.2f}s")
+    assert from_files == from_pack
@@ -0,0 +1,358 @@
+"""
+Generates present/future, past and imperative forms, with stress marks, from a stressed infinitive and its
+Zaliznyak class, without scraping.
+
+Classes 1 to 6 are generated by rule, with present stress a, b or c and past stress a or c. Other classes, the
+'°' variants of 3 and 6 and Wiktionary's irregular verbs are not, and fall back to stored conjugations where
+there are any.
+"""
+
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from grammar.conjugation import PresentOrFutureConjugation, PastConjugation, Imperative, ZaliznyakClass, \
+    Conjugation
+from grammar.conjugation_data import read_conjugations
+from grammar.constants import IRREGULAR_VERBS
+from utils.types import checked_type, checked_optional_type
+from utils.utils import lookup_key
+
+STRESS_MARK = "́"
+VOWELS = set("аеёиоуыэюя")
+SIBILANTS = set("жшчщ")
+LABIALS = set("бпвфм")
+
+GENERATED_CLASSES = {"1", "2", "3", "4", "5", "6"}
+GENERATED_PAST_STRESSES = {"a", "c"}
+
+_IRREGULAR_INFINITIVES = set(IRREGULAR_VERBS)
+
+# Consonant alternations, longest first. Classes 4 and 5 alternate only in the first person singular, class 6
+# throughout the present
+_ALTERNATIONS_4_5 = [("ст", "щ"), ("с", "ш"), ("з", "ж"), ("т", "ч"), ("д", "ж")]
+_ALTERNATIONS_6 = [("ск", "щ"), ("ст", "щ"), ("с", "ш"), ("з", "ж"), ("т", "ч"), ("д", "ж"), ("к", "ч"),
+                   ("г", "ж"), ("х", "ш")]
+
+# Endings of the first and second conjugations, for the six persons. The first person singular and third person
+# plural are given after consonants; after vowels, and soft consonants, у becomes ю and а becomes я
+_FIRST_CONJUGATION = ["у", "ешь", "ет", "ем", "ете", "ут"]
+_SECOND_CONJUGATION = ["у", "ишь", "ит", "им", "ите", "ат"]
+
+
+class GeneratedForms:
+    def __init__(
+            self,
+            present_or_future: PresentOrFutureConjugation,
+            past: PastConjugation,
+            imperative: Optional[Imperative],
+    ):
+        self.present_or_future: PresentOrFutureConjugation = checked_type(
+            present_or_future, PresentOrFutureConjugation
+        )
+        self.past: PastConjugation = checked_type(past, PastConjugation)
+        self.imperative: Optional[Imperative] = checked_optional_type(imperative, Imperative)
+
+    @staticmethod
+    def from_conjugation(conjugation: Conjugation) -> 'GeneratedForms':
+        return GeneratedForms(conjugation.present_or_future, conjugation.past, conjugation.imperative)
+
+
+def _with_stress(text: str, index: Optional[int]) -> str:
+    if index is None or text[index] == "ё":
+        return text
+    return text[:index + 1] + STRESS_MARK + text[index + 1:]
+
+
+def _last_vowel(text: str) -> Optional[int]:
+    for i in range(len(text) - 1, -1, -1):
+        if text[i] in VOWELS:
+            return i
+    return None
+
+
+def _add_reflexive(form: str) -> str:
+    return form + ("сь" if form[-1] in VOWELS or form[-1] == STRESS_MARK else "ся")
+
+
+def _split_infinitive(infinitive: str) -> Optional[Tuple[str, int, bool]]:
+    """The infinitive without stress mark or reflexive ending, the index of its stressed vowel, and whether it is
+    reflexive. None if the stress is missing or ambiguous"""
+    if "," in infinitive or infinitive.count(STRESS_MARK) > 1:
+        return None
+    reflexive = infinitive.endswith("ся") or infinitive.endswith("сь")
+    if reflexive:
+        infinitive = infinitive[:-2]
+    if STRESS_MARK in infinitive:
+        index = infinitive.index(STRESS_MARK) - 1
+        plain = infinitive.replace(STRESS_MARK, "")
+    elif "ё" in infinitive:
+        plain = infinitive
+        index = plain.index("ё")
+    else:
+        plain = infinitive
+        vowels = [i for i, c in enumerate(plain) if c in VOWELS]
+        if len(vowels) != 1:
+            return None
+        index = vowels[0]
+    return plain, index, reflexive
+
+
+def _alternate(stem: str, alternations: List[Tuple[str, str]]) -> str:
+    if stem and stem[-1] in LABIALS:
+        return stem + "л"
+    for before, after in alternations:
+        if stem.endswith(before):
+            return stem[:-len(before)] + after
+    return stem
+
+
+def _soften(ending: str) -> str:
+    """The ending as written after a vowel or soft consonant"""
+    return {"у": "ю", "а": "я"}.get(ending[0], ending[0]) + ending[1:]
+
+
+def _endings(stem: str, endings: List[str]) -> List[str]:
+    """The endings as written after `stem`. Consonants before second conjugation endings are soft, other than
+    sibilants"""
+    if endings is _SECOND_CONJUGATION:
+        soft = stem[-1] not in SIBILANTS
+    else:
+        soft = stem[-1] in VOWELS or stem[-1] == "л"
+    return [_soften(e) for e in endings] if soft else list(endings)
+
+
+def _present_stem(plain: str, short_class: str, class_name: str) -> Optional[Tuple[str, List[str]]]:
+    """The present stem and the (unstressed) endings for each person"""
+    if short_class == "1":
+        if not plain.endswith(("ать", "ять", "еть")):
+            return None
+        stem = plain[:-2]
+        return stem, _endings(stem, _FIRST_CONJUGATION)
+    if short_class == "2":
+        if plain.endswith("овать"):
+            stem = plain[:-5] + "у"
+        elif plain.endswith("евать"):
+            stem = plain[:-5] + ("у" if plain[-6] in SIBILANTS or plain[-6] == "ц" else "ю")
+        else:
+            return None
+        return stem, _endings(stem, _FIRST_CONJUGATION)
+    if short_class == "3":
+        if not plain.endswith("нуть"):
+            return None
+        stem = plain[:-3]
+        return stem, _endings(stem, _FIRST_CONJUGATION)
+    if short_class in ("4", "5"):
+        if short_class == "4" and not plain.endswith("ить"):
+            return None
+        if short_class == "5" and not plain.endswith(("еть", "ать", "ять")):
+            return None
+        stem = plain[:-3]
+        return stem, _endings(stem, _SECOND_CONJUGATION)
+    if short_class == "6":
+        if not plain.endswith(("ать", "ять")):
+            return None
+        stem = plain[:-3]
+        if stem[-1] in VOWELS:
+            return stem, _endings(stem, _FIRST_CONJUGATION)
+        stem = _alternate(stem, _ALTERNATIONS_6)
+        if "(-щ-)" in class_name and stem.endswith("ч"):
+            stem = stem[:-1] + "щ"
+        return stem, _endings(stem, _FIRST_CONJUGATION)
+    return None
+
+
+def _first_person_stem(stem: str, short_class: str, class_name: str) -> str:
+    """Classes 4 and 5 alternate the final consonant of the stem in the first person singular only"""
+    if short_class not in ("4", "5") or stem[-1] in VOWELS:
+        return stem
+    if "(-щ-)" in class_name and stem.endswith("т"):
+        return stem[:-1] + "щ"
+    return _alternate(stem, _ALTERNATIONS_4_5)
+
+
+def _stressed_ending(ending: str) -> Tuple[str, int]:
+    """Stresses the first vowel of an ending, which becomes ё where an unstressed е would be written"""
+    index = next(i for i, c in enumerate(ending) if c in VOWELS)
+    if ending[index] == "е":
+        ending = ending[:index] + "ё" + ending[index + 1:]
+    return ending, index
+
+
+def _imperative(
+        stem: str, stem_stress: Optional[int], stress: str, plain: str, second_conjugation: bool
+) -> Optional[str]:
+    if stem[-1] in VOWELS and (stress == "a" or not second_conjugation):
+        return _with_stress(stem + "й", stem_stress)
+    if stress != "a":
+        return _with_stress(stem + "и", len(stem))
+    if stem_stress is None:
+        return None
+    consonants = stem.rstrip("ь")
+    if plain.startswith("вы") and stem_stress == 1 or len(consonants) > 1 and consonants[-2] not in VOWELS:
+        return _with_stress(stem + "и", stem_stress)
+    return _with_stress(stem + "ь", stem_stress)
+
+
+def generate_forms(infinitive: str, zaliznyak_class: ZaliznyakClass) -> Optional[GeneratedForms]:
+    """Generates the forms of a regular verb from its stressed infinitive. None if the class isn't one the
+    generator handles, or the infinitive doesn't fit its class"""
+    info = zaliznyak_class.info
+    class_name = zaliznyak_class.class_name.split("//")[0]
+    if (info.short_class not in GENERATED_CLASSES or info.is_irregular or "°" in class_name
+            or info.imperfect_stress_pattern not in GENERATED_PAST_STRESSES):
+        return None
+    split = _split_infinitive(infinitive)
+    if split is None:
+        return None
+    plain, stress_index, reflexive = split
+    present = _present_stem(plain, info.short_class, class_name)
+    if present is None:
+        return None
+    stem, endings = present
+    stress = info.short_stress
+
+    # The vowel stressed when the stress is on the stem. Stress on a suffix the present stem drops, as in
+    # торгова́ть -> торгу́ю, moves to the last vowel of the stem
+    stem_stress = stress_index if stress_index < len(stem) and stem[stress_index] in VOWELS else _last_vowel(stem)
+    if stem_stress is None and stress != "b":
+        return None
+
+    def form(form_stem: str, ending: str, ending_stressed: bool) -> str:
+        if ending_stressed and any(c in VOWELS for c in ending):
+            ending, index = _stressed_ending(ending)
+            text = _with_stress(form_stem + ending, len(form_stem) + index)
+        else:
+            text = _with_stress(form_stem + ending, stem_stress if stress != "c" else _last_vowel(form_stem))
+        return _add_reflexive(text) if reflexive else text
+
+    persons = []
+    for person, ending in enumerate(endings):
+        form_stem = _first_person_stem(stem, info.short_class, class_name) if person == 0 else stem
+        if form_stem != stem:
+            ending = "у" if form_stem[-1] in SIBILANTS else "ю"
+        persons.append(form(form_stem, ending, stress == "b" or stress == "c" and person == 0))
+    present_or_future = PresentOrFutureConjugation(*persons)
+
+    past_stem = plain[:-2] + "л"
+    past_forms = []
+    for ending in ["", "а", "о", "и"]:
+        if ending == "а" and info.imperfect_stress_pattern == "c":
+            text = _with_stress(past_stem + ending, len(past_stem))
+        else:
+            text = _with_stress(past_stem + ending, stress_index)
+        past_forms.append(_add_reflexive(text) if reflexive else text)
+    past = PastConjugation(*past_forms)
+
+    singular = _imperative(stem, stem_stress, stress, plain, info.short_class in ("4", "5"))
+    if singular is None:
+        return GeneratedForms(present_or_future, past, None)
+    plural = singular + "те"
+    if reflexive:
+        singular, plural = _add_reflexive(singular), _add_reflexive(plural)
+    return GeneratedForms(present_or_future, past, Imperative(singular, plural))
+
+
+class ConjugationGenerator:
+    """Generates forms by rule, falling back to stored conjugations for irregular verbs"""
+
+    def __init__(self, stored: Dict[str, Conjugation]):
+        # Stored conjugations of irregular verbs, keyed by `lookup_key` of the infinitive
+        self.stored: Dict[str, Conjugation] = stored
+
+    @staticmethod
+    def from_stored_conjugations(force: bool) -> 'ConjugationGenerator':
+        stored = {}
+        for c in read_conjugations(force):
+            if c.verb_type.zaliznyak_class.is_irregular or lookup_key(c.infinitive) in _IRREGULAR_INFINITIVES:
+                stored[lookup_key(c.infinitive)] = c
+        return ConjugationGenerator(stored)
+
+    def forms(self, infinitive: str, zaliznyak_class: ZaliznyakClass) -> Optional[GeneratedForms]:
+        key = lookup_key(infinitive)
+        if zaliznyak_class.is_irregular or key in _IRREGULAR_INFINITIVES:
+            stored = self.stored.get(key)
+            return None if stored is None else GeneratedForms.from_conjugation(stored)
+        return generate_forms(infinitive, zaliznyak_class)
+
+
+# Fields compared when validating, as (name, getter)
+_VALIDATED_FIELDS = (
+    [(title, lambda f, i=i: f.present_or_future.terms[i])
+     for i, title in enumerate(PresentOrFutureConjugation.TITLES)]
+    + [(title, lambda f, i=i: f.past.terms[i])
+       for i, title in enumerate([PastConjugation.PAST_M, PastConjugation.PAST_F, PastConjugation.PAST_N,
+                                  PastConjugation.PAST_PL])]
+    + [(Imperative.IMP_S, lambda f: f.imperative and f.imperative.singular),
+       (Imperative.IMP_PL, lambda f: f.imperative and f.imperative.plural)]
+)
+
+
+class ValidationReport:
+    def __init__(self):
+        # Per short class and stress: [verbs, verbs generated, verbs with every form matching]
+        self.counts: Dict[str, List[int]] = {}
+        # (infinitive, class name, field, scraped form, generated form)
+        self.mismatches: List[Tuple[str, str, str, str, str]] = []
+        self.seconds: float = 0.0
+
+    def add(self, conjugation: Conjugation, forms: Optional[GeneratedForms]):
+        z_class = conjugation.verb_type.zaliznyak_class
+        counts = self.counts.setdefault(z_class.short_class_and_stress, [0, 0, 0])
+        counts[0] += 1
+        if forms is None:
+            return
+        counts[1] += 1
+        expected = GeneratedForms.from_conjugation(conjugation)
+        matched = True
+        for field, getter in _VALIDATED_FIELDS:
+            scraped, generated = getter(expected), getter(forms)
+            if scraped != generated:
+                matched = False
+                self.mismatches.append(
+                    (conjugation.infinitive, z_class.class_name, field, str(scraped), str(generated))
+                )
+        counts[2] += matched
+
+    def write_mismatches(self, path: Path):
+        with open(path, 'wt', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["infinitive", "class", "field", "scraped", "generated"])
+            writer.writerows(self.mismatches)
+
+    def __str__(self):
+        lines = [f"{'class':<10} {'verbs':>6} {'generated':>10} {'matching':>9}"]
+        totals = [0, 0, 0]
+        for short_class_and_stress, counts in sorted(self.counts.items(), key=lambda kv: -kv[1][0]):
+            if counts[1]:
+                lines.append(f"{short_class_and_stress:<10} {counts[0]:>6} {counts[1]:>10} {counts[2]:>9}")
+            totals = [t + c for t, c in zip(totals, counts)]
+        lines.append(f"{'all':<10} {totals[0]:>6} {totals[1]:>10} {totals[2]:>9}")
+        lines.append(f"Generated forms in {self.seconds * 1000:.0f}ms")
+        return "\n".join(lines)
+
+
+def validate(conjugations: List[Conjugation]) -> ValidationReport:
+    """Generates forms for every conjugation, from its infinitive and class alone, and compares them with the
+    scraped forms. Stored irregular verbs are excluded, as they would trivially match"""
+    regular = [
+        c for c in conjugations
+        if not (c.verb_type.zaliznyak_class.is_irregular or lookup_key(c.infinitive) in _IRREGULAR_INFINITIVES)
+    ]
+    start = time.perf_counter()
+    generated = [generate_forms(c.infinitive, c.verb_type.zaliznyak_class) for c in regular]
+    report = ValidationReport()
+    report.seconds = time.perf_counter() - start
+    for c, forms in zip(regular, generated):
+        report.add(c, forms)
+    return report
+
+
+if __name__ == '__main__':
+    report = validate(read_conjugations(force=False))
+    print(report)
+    if len(sys.argv) > 1:
+        report.write_mismatches(Path(sys.argv[1]))
+        print(f"Wrote {len(report.mismatches)} mismatches to {sys.argv[1]}")
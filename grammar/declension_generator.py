@@ -0,0 +1,607 @@
+"""
+Generates the full declension of an adjective or noun from its lemma, by classifying it into one of the paradigms
+of the sample tables in resources/adjectives and resources/nouns and applying that paradigm's endings to its stem.
+
+Each paradigm is read from its sample table: the stem is what the forms of the sample's first column share, and
+each form is that stem, less any letters it drops, as the fleeting vowel of ры́нок -> ры́нка, plus an ending.
+
+Stress marks are only generated where the paradigm fixes them, i.e. where the lemma is stressed in the same
+place, stem or ending, as every form of the sample, or for an unstressed adjective in -ой, which is always end
+stressed. Otherwise the forms are left unstressed, as are the lemmas of lemma.txt.
+
+Fleeting vowels that the sample doesn't show are added by rule: the vowel of a genitive plural with no ending, as
+окно́ -> о́кон, and that of masculine nouns known to lose it, as день -> дня. Listed nouns take a nominative plural
+in -а or -я, as дом -> дома́, or a genitive plural without an ending, as раз -> раз. Nouns whose forms can't be told
+from the ending, such as the -ль nouns of either gender, or whose plural has another stem, as друг -> друзья́, are
+left out rather than guessed.
+
+The generated forms are checked against the hand checked declensions of resources/declension_checks.txt.
+
+Usage:
+  python -m grammar.declension_generator [--output declensions.csv] [--repeats 3]
+"""
+
+import argparse
+import csv
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, NamedTuple, Iterable, Iterator
+
+from grammar.adjective import Adjective
+from grammar.declension_store import read_declension_store, DeclensionStore, CASE_NAMES, RESOURCES_PATH
+from grammar.declinable import Declinable
+from grammar.lexicon import read_lexicon, PartOfSpeech, LexiconEntry
+from grammar.noun import Noun
+from utils.utils import stress_free_key, lookup_key
+
+STRESS_MARK = "́"
+VOWELS = set("аеёиоуыэюя")
+SIBILANTS = set("жшчщ")
+VELARS = set("гкх")
+
+DECLINED_PARTS_OF_SPEECH = [PartOfSpeech.ADJ, PartOfSpeech.NOUN]
+
+CHECKS_PATH = RESOURCES_PATH / "declension_checks.txt"
+
+# Gender of nouns in -ь by ending, longest first, unless listed below. The endings not here, as -ль and -онь, are
+# too mixed to guess
+_SOFT_GENDERS = [
+    ("тель", "m"), ("ость", "f"), ("есть", "f"), ("знь", "f"), ("ень", "m"), ("ань", "f"), ("янь", "f"),
+    ("ынь", "f"), ("инь", "f"), ("снь", "f"), ("рнь", "f"), ("унь", "m"), ("рь", "m"), ("сть", "f"),
+    ("ть", "f"), ("дь", "f"), ("сь", "f"), ("зь", "f"), ("чь", "f"), ("шь", "f"), ("щь", "f"), ("жь", "f"),
+    ("вь", "f"), ("бь", "f"), ("пь", "f"), ("мь", "f"), ("фь", "f"),
+]
+_FEMININE_SOFT_NOUNS = {
+    "мысль", "боль", "цель", "роль", "соль", "пыль", "даль", "шинель", "деталь", "щель", "модель", "гибель",
+    "мебель", "прибыль", "медаль", "печаль", "заросль", "падаль", "мораль", "канифоль", "опухоль", "усталь",
+    "отрасль", "водоросль", "дуэль", "сталь", "педаль", "панель", "гастроль", "магистраль", "мозоль", "бутыль",
+    "погибель", "моль", "спираль", "карусель", "мель", "ель", "форель", "параллель", "колыбель", "отмель",
+    "антресоль", "эмаль", "вертикаль", "оттепель", "поросль", "трель", "фасоль", "бандероль", "вермишель",
+    "акварель", "гниль", "диагональ", "убыль", "виолончель", "удаль", "вуаль", "невидаль", "быль", "цитадель",
+    "горизонталь", "свирель", "прель", "пищаль", "карамель", "самоцель", "постель", "обитель", "метель", "купель",
+    "ладонь", "вонь", "гармонь", "тень", "степень", "осень", "зелень", "печень", "ступень", "лень", "сень",
+    "мишень", "темень", "плесень", "голень", "сажень", "дребедень", "мигрень", "сирень", "дверь", "тварь", "гарь",
+    "дурь", "утварь", "корь", "бездарь", "ширь", "одурь", "хворь", "лазурь", "киноварь", "сибирь", "тверь",
+}
+_MASCULINE_SOFT_NOUNS = {
+    "рубль", "король", "корабль", "автомобиль", "контроль", "стиль", "портфель", "руль", "госпиталь", "спектакль",
+    "кремль", "уголь", "апрель", "июль", "ноль", "нуль", "февраль", "бинокль", "вопль", "алкоголь", "кашель",
+    "профиль", "рояль", "тополь", "костыль", "вестибюль", "стебель", "патруль", "фестиваль", "тоннель", "туннель",
+    "ансамбль", "картофель", "коктейль", "кабель", "хмель", "кисель", "флигель", "шмель", "скальпель", "журавль",
+    "хрусталь", "пароль", "никель", "дубль", "кафель", "фитиль", "штемпель", "гель", "крендель", "дирижабль",
+    "вексель", "циркуль", "штиль", "модуль", "вентиль", "миндаль", "ковыль", "отель", "конь", "огонь", "зять",
+    "локоть", "ноготь", "коготь", "ломоть", "деготь", "лапоть", "гусь", "карась", "лось", "лосось", "витязь",
+    "ферзь", "дождь", "вождь", "медведь", "гвоздь", "лебедь", "желудь", "груздь", "червь", "голубь",
+}
+# Masculine nouns that lose the vowel before their last consonant, as у́голь -> у́гля. So do those in -ень, but
+# for the ones in _FIXED_VOWEL_NOUNS
+_FLEETING_NOUNS = {
+    "уголь", "кашель", "стебель", "угорь", "огонь", "локоть", "ноготь", "коготь", "ломоть", "деготь", "лапоть",
+    "рот", "сон", "лоб", "лед", "лев", "пес", "мох", "ров", "шов", "ветер", "угол", "узел", "котел", "козел",
+    "орел", "осел", "пепел", "дятел", "ковер", "хребет", "агнец",
+}
+# Nouns in -ень, -ок and -ец that keep their vowel, as оле́нь -> оле́ня and уро́к -> уро́ка
+_FIXED_VOWEL_NOUNS = {
+    "олень", "тюлень", "ячмень", "бюллетень", "пельмень", "женьшень", "ревень", "ясень", "урок", "срок", "поток",
+    "восток", "исток", "приток", "сток", "порок", "пророк", "игрок", "знаток", "курок", "брелок", "блок", "шок",
+    "гордец",
+}
+# Masculine nouns whose nominative plural is a stressed -а, or -я after a soft stem, as го́род -> города́ and
+# учи́тель -> учителя́
+_A_PLURAL_NOUNS = {
+    "дом", "город", "голос", "глаз", "лес", "вечер", "берег", "поезд", "адрес", "век", "цвет", "снег", "остров",
+    "номер", "паспорт", "доктор", "директор", "профессор", "инспектор", "мастер", "повар", "сорт", "рог", "бок",
+    "борт", "луг", "рукав", "пояс", "погреб", "купол", "колокол", "катер", "трактор", "тормоз", "хутор", "череп",
+    "отпуск", "округ", "парус", "провод", "корпус", "сторож", "тенор", "шелк", "счет", "учитель", "якорь",
+    "тополь", "вексель", "штемпель", "егерь", "край",
+}
+# Nouns with no ending in the genitive plural, as раз -> раз and солда́т -> солда́т
+_BARE_GENITIVE_PLURAL_NOUNS = {"раз", "глаз", "солдат", "сапог", "партизан", "гусар", "чулок"}
+# Nouns in -ец of two syllables that are stressed on the stem, as та́нец -> та́нца. The others, and those of one
+# syllable, are end stressed, as коне́ц -> конца́
+_STEM_STRESSED_EC_NOUNS = {
+    "палец", "немец", "танец", "братец", "перец", "хлопец", "старец", "ранец", "агнец", "хлебец", "глянец",
+    "таец", "ситец", "горец", "думец",
+}
+# Nouns in -ня that keep the ь of their genitive plural, as дере́вня -> дереве́нь
+_SOFT_GENITIVE_PLURAL_NOUNS = {"деревня", "кухня", "барышня", "боярышня"}
+# Nouns in -е after a consonant other than a sibilant or ц that decline, as мо́ре. Others, as ко́фе, don't
+_SOFT_NEUTER_NOUNS = {"море", "горе", "поле", "биополе"}
+_INDECLINABLE_NOUNS = {
+    "кино", "метро", "пальто", "бюро", "депо", "казино", "пианино", "эскимо", "кимоно", "домино", "лото", "танго",
+    "ранчо", "манто", "трико", "жабо", "фото", "авто", "болеро", "сомбреро",
+}
+# Nouns whose forms no sample shows, as путь, or whose plural has another stem, as челове́к -> лю́ди and
+# друг -> друзья́. So do those in -анин and -янин, as крестья́нин -> крестья́не
+_IRREGULAR_NOUNS = {
+    "путь", "мать", "дочь", "матерь", "праматерь", "богоматерь", "любовь", "нелюбовь", "церковь", "свекровь",
+    "господь", "рожь", "ложь", "вошь", "человек", "ребенок", "дитя", "друг", "сын", "брат", "муж", "князь", "стул",
+    "хозяин", "господин", "сосед", "черт", "дерево", "перо", "крыло", "небо", "чудо", "плечо", "колено", "ухо",
+    "око", "яблоко", "веко",
+}
+
+
+class Paradigm(NamedTuple):
+    # Path of the sample table relative to the resources, e.g. 'adjectives/1-hard-ending-stem-stressed.txt'
+    source: str
+    heading: str
+    # Ending of the sample's lemma after its stem
+    lemma_ending: str
+    # 'stem' or 'end' if every stressed form of the sample is stressed there, otherwise 'mixed'
+    stress: str
+    # Rows of cells, in the order of CASE_NAMES. Each cell is the number of letters dropped from the end of the
+    # stem, and the ending after it, without and with its stress mark
+    cells: Tuple[Tuple[Tuple[int, str, str], ...], ...]
+
+    @property
+    def name(self) -> str:
+        return self.source.rpartition("/")[2].removesuffix(".txt")
+
+    @property
+    def part_of_speech(self) -> PartOfSpeech:
+        return PartOfSpeech.ADJ if self.source.startswith("adjectives/") else PartOfSpeech.NOUN
+
+    @property
+    def is_masculine(self) -> bool:
+        return "masculine" in self.name
+
+    @staticmethod
+    def from_table(source: str, heading: str, terms: List[List[str]]) -> 'Paradigm':
+        rows = [[_split_stress(form) for form in row] for row in terms]
+        lemma = rows[Declinable.NOM][0][0]
+        stem_length = min(_common_prefix_length(lemma, row[0][0]) for row in rows)
+        positions = set()
+        cells = []
+        for row in rows:
+            row_cells = []
+            for plain, index in row:
+                common = min(stem_length, _common_prefix_length(plain, lemma))
+                ending = plain[common:]
+                stressed_ending = ending
+                if index is not None:
+                    positions.add("end" if index >= common else "stem")
+                    if index >= common:
+                        stressed_ending = _with_stress(ending, index - common)
+                row_cells.append((stem_length - common, ending, stressed_ending))
+            cells.append(tuple(row_cells))
+        stress = positions.pop() if len(positions) == 1 else "mixed"
+        return Paradigm(source, heading, lemma[stem_length:], stress, tuple(cells))
+
+
+def _split_stress(text: str) -> Tuple[str, Optional[int]]:
+    """The text without stress marks, and the index of its stressed vowel, if marked or ё"""
+    if STRESS_MARK in text:
+        return text.replace(STRESS_MARK, ""), text.index(STRESS_MARK) - 1
+    if "ё" in text:
+        return text, text.index("ё")
+    return text, None
+
+
+def _with_stress(text: str, index: Optional[int]) -> str:
+    if index is None or index >= len(text) or text[index] == "ё":
+        return text
+    return text[:index + 1] + STRESS_MARK + text[index + 1:]
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def _spelled(base: str, ending: str, stressed: bool) -> str:
+    """The ending as spelled after `base`: ы becomes и after velars and sibilants, я and ю become а and у after
+    sibilants, and unstressed о becomes е after sibilants and ц"""
+    if not ending or not base:
+        return ending
+    last = base[-1]
+    if ending[0] == "ы" and (last in VELARS or last in SIBILANTS):
+        return "и" + ending[1:]
+    if ending[0] in ("я", "ю") and last in SIBILANTS:
+        return ("а" if ending[0] == "я" else "у") + ending[1:]
+    if ending[0] == "о" and not stressed and (last in SIBILANTS or last == "ц"):
+        return "е" + ending[1:]
+    return ending
+
+
+def _stress_mode(paradigm: Paradigm, stem_length: int, index: Optional[int]) -> Optional[str]:
+    """Where the forms are stressed, 'stem' or 'end', or None if the paradigm doesn't fix it"""
+    if index is None:
+        end_stressed = paradigm.stress == "end" and paradigm.part_of_speech == PartOfSpeech.ADJ
+        return "end" if end_stressed else None
+    position = "stem" if index < stem_length else "end"
+    return position if position == paradigm.stress else None
+
+
+def _soft_gender(plain: str) -> Optional[str]:
+    """'m' or 'f' for a noun in -ь, or None if its ending doesn't tell"""
+    if plain in _FEMININE_SOFT_NOUNS:
+        return "f"
+    if plain in _MASCULINE_SOFT_NOUNS:
+        return "m"
+    for ending, gender in _SOFT_GENDERS:
+        if plain.endswith(ending):
+            return gender
+    return None
+
+
+def _has_fleeting_vowel(plain: str) -> bool:
+    if plain in _FIXED_VOWEL_NOUNS:
+        return False
+    return plain in _FLEETING_NOUNS or plain.endswith("ень")
+
+
+def _keeps_sample_vowel(plain: str, stem: str) -> bool:
+    """Whether a noun keeps the е that the sample drops, as кузне́ц -> кузнеца́ but коне́ц -> конца́: where dropping it
+    would leave no vowel, or a consonant then р, л, н or в before the ending"""
+    if plain in _FIXED_VOWEL_NOUNS:
+        return True
+    if plain in _FLEETING_NOUNS:
+        return False
+    return (not any(c in VOWELS for c in stem)
+            or len(stem) > 1 and stem[-1] in "рлнв" and stem[-2] not in VOWELS and stem[-2] not in "ьй")
+
+
+def _without_vowel(stem: str) -> str:
+    """The stem without the vowel before its last consonant. An е after a vowel becomes й, and after л becomes ь,
+    as бое́ц -> бойца́ and па́лец -> па́льца"""
+    if stem[-3:-2] in VOWELS:
+        return stem[:-2] + "й" + stem[-1]
+    if stem[-3:-2] == "л" and stem[-2] in ("е", "ё"):
+        return stem[:-2] + "ь" + stem[-1]
+    return stem[:-2] + stem[-1]
+
+
+def _with_inserted_vowel(plain: str, base: str, ending: str) -> Tuple[str, str]:
+    """The base and ending of a genitive plural without a vowel ending, with a vowel between the last two
+    consonants of the base where they would be hard to say, as окно́ -> о́кон, письмо́ -> пи́сем, земля́ -> земе́ль.
+    The vowel is о after a velar, or before к but for after a sibilant, and otherwise е"""
+    if len(base) < 3 or base[-1] in VOWELS or base[-1] in "ьй" or base[-2] in VOWELS or base[-2] in "лрнй":
+        return base, ending
+    first, last = base[-2], base[-1]
+    if first == "ь":
+        return base[:-2] + "е" + last, ending
+    if last not in "клнц" or first == "г" and last == "л":
+        return base, ending
+    vowel = "о" if first in VELARS or last == "к" and first not in SIBILANTS else "е"
+    # The ь of -ня goes, as пе́сня -> пе́сен, but for a few nouns, as дере́вня -> дереве́нь
+    if last == "н" and ending == "ь" and plain not in _SOFT_GENITIVE_PLURAL_NOUNS:
+        ending = ""
+    return base[:-1] + vowel + last, ending
+
+
+def decline(word: str, paradigm: Paradigm, animate: bool = False) -> Optional[Declinable]:
+    """The declension of `word` by `paradigm`, as an Adjective or a Noun. None if `word` doesn't have the ending
+    of the paradigm's lemma"""
+    plain, index = _split_stress(word)
+    stem = plain[:len(plain) - len(paradigm.lemma_ending)]
+    lemma_ending = plain[len(stem):]
+    # An unstressed о after a sibilant or ц is spelled е, as се́рдце, so a lemma spelled with о is end stressed
+    unstressed_ending = _spelled(stem, paradigm.lemma_ending, False)
+    if not stem or lemma_ending not in (paradigm.lemma_ending, unstressed_ending):
+        return None
+    end_spelled = lemma_ending != unstressed_ending
+    is_noun = paradigm.part_of_speech == PartOfSpeech.NOUN
+    fleeting = (is_noun and paradigm.is_masculine and paradigm.lemma_ending in ("", "ь")
+                and _has_fleeting_vowel(plain))
+    if fleeting and index is not None and index >= len(stem) - 2:
+        # The stress moves off the fleeting vowel, to where the paradigm doesn't say
+        index = None
+    mode = _stress_mode(paradigm, len(stem), index)
+    # Whether the sample's lemma ends in a fleeting е, as та́нец -> та́нца
+    sample_fleeting = paradigm.lemma_ending[:1] == "е" and len(paradigm.lemma_ending) == 2
+    kept_vowel = sample_fleeting and _keeps_sample_vowel(plain, stem)
+    terms = []
+    for row in paradigm.cells:
+        forms = []
+        for drop, ending, stressed_ending in row:
+            base = stem[:len(stem) - drop]
+            is_lemma_cell = drop == 0 and ending == paradigm.lemma_ending
+            if fleeting and not is_lemma_cell:
+                base = _without_vowel(base)
+            elif sample_fleeting and not drop and ending[:1] != "е":
+                if kept_vowel:
+                    base += paradigm.lemma_ending[0]
+                elif base[-1] in VOWELS:
+                    base += "й"
+                elif base[-1] == "л":
+                    base += "ь"
+            elif is_noun and not drop and not is_lemma_cell and ending in ("", "ь"):
+                base, ending = _with_inserted_vowel(plain, base, ending)
+                stressed_ending = ending
+            if mode == "end":
+                ending = stressed_ending
+            elif mode == "stem":
+                ending = ending.replace("ё", "е")
+            # A vowel inserted after й is е, as копе́йка -> копе́ек
+            if drop and base[-1] == "й" and ending[:1] in ("о", "е"):
+                base, ending = base[:-1], "е" + ending[1:]
+            # Where the stress isn't known, the ending is spelled as in the sample
+            ending = _spelled(base, ending, mode == "end" or mode is None and (paradigm.stress == "end" or end_spelled))
+            if mode == "stem":
+                base = _with_stress(base, index)
+            form = base + ending
+            # As in the tables, forms of one syllable aren't marked
+            if mode is not None and sum(c in VOWELS for c in form) < 2:
+                form = form.replace(STRESS_MARK, "")
+            forms.append(form)
+        terms.append(forms)
+    if paradigm.part_of_speech == PartOfSpeech.ADJ:
+        return Adjective(terms)
+    if plain in _A_PLURAL_NOUNS:
+        # The plural is stressed on the ending, which the paradigm doesn't say, so is left unstressed
+        for row in terms:
+            row[1] = row[1].replace(STRESS_MARK, "")
+        dative = terms[Declinable.DAT][1]
+        terms[Declinable.NOM][1] = terms[Declinable.ACC][1] = dative[:-2] + dative[-2]
+    if plain in _BARE_GENITIVE_PLURAL_NOUNS:
+        terms[Declinable.GEN][1] = terms[Declinable.NOM][0]
+    if animate:
+        # Animate nouns take the genitive for the accusative plural, and masculine nouns in the singular too
+        terms[Declinable.ACC][1] = terms[Declinable.GEN][1]
+        if paradigm.is_masculine:
+            terms[Declinable.ACC][0] = terms[Declinable.GEN][0]
+    return Noun(terms)
+
+
+def classify_adjective(plain: str) -> Optional[str]:
+    """The name of the adjective paradigm of a lemma without stress marks, or None if it is not a long form
+    adjective"""
+    if len(plain) < 3:
+        return None
+    before = plain[-3]
+    if plain.endswith("ый"):
+        return "1-hard-ending-stem-stressed"
+    if plain.endswith("ой"):
+        if before in VELARS:
+            return "5-mixed-1-end-stress"
+        return "7-mixed-2-end-stressed" if before in SIBILANTS else "2-hard-ending-end-stressed"
+    if plain.endswith("ий"):
+        if before in VELARS:
+            return "4-mixed-1-stem-stressed"
+        return "6-mixed-2-stem-stressed" if before in SIBILANTS else "3-soft-ending"
+    return None
+
+
+def classify_noun(plain: str, index: Optional[int] = None, animate: bool = False) -> Optional[str]:
+    """The name of the noun paradigm of a lemma without stress marks, from its ending. `index` is the stressed
+    vowel, if known. Gender and fleeting vowels are guessed from the ending, with lists of the nouns it misleads,
+    so the guess can still be wrong for nouns not listed. None for nouns that look indeclinable, that no paradigm
+    fits, or whose gender or genitive plural the ending doesn't tell, as па́роль or сестра́ -> сестёр"""
+    if len(plain) < 2 or plain in _INDECLINABLE_NOUNS or plain in _IRREGULAR_NOUNS:
+        return None
+    if plain.endswith(("анин", "янин")):
+        return None
+    last, before = plain[-1], plain[-2]
+    # Whether a vowel comes into a genitive plural in -р, as сестра́ -> сестёр but игра́ -> игр, varies too much
+    if last in ("а", "о", "я") and before == "р" and len(plain) > 2 and plain[-3] not in VOWELS | set("лрнйь"):
+        return None
+    if last == "я":
+        if plain.endswith("мя") and len(plain) > 2:
+            return "23-neuter-4"
+        if before == "и":
+            return "19-feminine-7"
+        if before == "ь":
+            return "16-feminine-6"
+        return "22-feminine-8" if before in VOWELS else "14-feminine-5"
+    if last == "а":
+        if before in VELARS:
+            # A consonant before -ка takes a vowel in the genitive plural, as ба́нка -> ба́нок
+            after_consonant = before == "к" and len(plain) > 2 and plain[-3] not in VOWELS and plain[-3] != "ь"
+            return "13-feminine-4" if after_consonant else "11-feminine-3"
+        return "06-feminine-2-animate" if animate else "02-feminine-1"
+    if last == "о":
+        return None if before in VOWELS else "03-neuter-1"
+    if last == "е":
+        if before == "и":
+            return "20-neuter-3"
+        # Spelled for an unstressed -о, as се́рдце
+        if before in SIBILANTS or before == "ц":
+            return "03-neuter-1"
+        return "04-neuter-2" if plain in _SOFT_NEUTER_NOUNS else None
+    if last == "ь":
+        gender = _soft_gender(plain)
+        if gender is None:
+            return None
+        return "10-feminine-soft" if gender == "f" else "09-masculine-soft-2"
+    if last == "й":
+        return "08-masculine-soft-1" if before in VOWELS else None
+    if last in VOWELS:
+        return None
+    if plain.endswith("ец") and len(plain) > 3:
+        if index is None:
+            # Most nouns in -ец of one or two syllables are end stressed
+            end_stressed = sum(c in VOWELS for c in plain) <= 2 and plain not in _STEM_STRESSED_EC_NOUNS
+        else:
+            end_stressed = index >= len(plain) - 2
+        return "17-masculine-5-end-stressed" if end_stressed else "18-masculine-5-stem-stressed"
+    if plain.endswith("ок") and len(plain) > 3 and plain not in _FIXED_VOWEL_NOUNS:
+        return "15-masculine-4"
+    if last in VELARS:
+        return "12-masculine-3"
+    if last in SIBILANTS:
+        return "21-masculine-6"
+    return "05-masculine-2-animate" if animate else "01-masculine-1"
+
+
+class DeclensionGenerator:
+    """Classifies lemmas into the paradigms of the sample tables and declines them"""
+
+    def __init__(self, paradigms: Dict[str, Paradigm]):
+        # Paradigms by name, e.g. '01-masculine-1'
+        self.paradigms: Dict[str, Paradigm] = paradigms
+
+    @staticmethod
+    def from_store(store: Optional[DeclensionStore] = None) -> 'DeclensionGenerator':
+        store = store or read_declension_store()
+        paradigms = {}
+        for table in store.tables:
+            if table.source.startswith(("adjectives/", "nouns/")):
+                heading, terms = store.table(table.source)
+                paradigm = Paradigm.from_table(table.source, heading, terms)
+                paradigms[paradigm.name] = paradigm
+        return DeclensionGenerator(paradigms)
+
+    def paradigm_of(self, word: str, part_of_speech: PartOfSpeech, animate: bool = False) -> Optional[Paradigm]:
+        plain, index = _split_stress(word)
+        if part_of_speech == PartOfSpeech.ADJ:
+            name = classify_adjective(plain)
+        elif part_of_speech == PartOfSpeech.NOUN:
+            name = classify_noun(plain, index, animate)
+        else:
+            name = None
+        return None if name is None else self.paradigms.get(name)
+
+    def decline(self, word: str, part_of_speech: PartOfSpeech, animate: bool = False) -> Optional[Declinable]:
+        paradigm = self.paradigm_of(word, part_of_speech, animate)
+        return None if paradigm is None else decline(word, paradigm, animate)
+
+    def decline_all(self, entries: Iterable[LexiconEntry]) -> Iterator[Tuple[LexiconEntry, Paradigm, Declinable]]:
+        """Declines each entry that can be classified. Nouns are taken as inanimate, as lemma.txt doesn't say"""
+        for entry in entries:
+            paradigm = self.paradigm_of(entry.lemma, entry.part_of_speech)
+            if paradigm is None:
+                continue
+            declinable = decline(entry.lemma, paradigm)
+            if declinable is not None:
+                yield entry, paradigm, declinable
+
+
+def validate(generator: DeclensionGenerator) -> Tuple[List[Tuple[str, str, str]], int]:
+    """Classifies and declines the lemma of each sample table, which checks the paradigms are read from their
+    tables, though not how they fit other lemmas, for which see `check`. Returns the (paradigm, expected,
+    generated) forms that differ from the table, and the number of other forms left unstressed as their stress
+    isn't fixed"""
+    store = read_declension_store()
+    mismatches = []
+    unstressed = 0
+    for paradigm in generator.paradigms.values():
+        _, terms = store.table(paradigm.source)
+        lemma = terms[Declinable.NOM][0]
+        declinable = generator.decline(lemma, paradigm.part_of_speech, "animate" in paradigm.name)
+        generated = declinable.terms if declinable is not None else [[""] * len(row) for row in terms]
+        for expected_row, generated_row in zip(terms, generated):
+            for expected, form in zip(expected_row, generated_row):
+                if expected == form:
+                    continue
+                if stress_free_key(expected) == form:
+                    unstressed += 1
+                else:
+                    mismatches.append((paradigm.name, expected, form))
+    return mismatches, unstressed
+
+
+class DeclensionCheck(NamedTuple):
+    lemma: str
+    part_of_speech: PartOfSpeech
+    animate: bool
+    # Rows in the order of CASE_NAMES, of cells holding each accepted form
+    terms: List[List[List[str]]]
+
+
+def read_declension_checks(path: Path = CHECKS_PATH) -> List[DeclensionCheck]:
+    """The hand checked declensions, after a heading line: lemma; part of speech; animacy; then a field per case
+    of its forms, separated by ',', with alternatives separated by '/'"""
+    checks = []
+    with open(path, encoding="utf-8") as f:
+        for line in f.read().splitlines()[1:]:
+            if not line.strip():
+                continue
+            lemma, part_of_speech, animacy, *rows = [field.strip() for field in line.split(";")]
+            terms = [[[form.strip() for form in cell.split("/")] for cell in row.split(",")] for row in rows]
+            checks.append(DeclensionCheck(lemma, PartOfSpeech(part_of_speech), animacy == "animate", terms))
+    return checks
+
+
+def check(generator: DeclensionGenerator, checks: Iterable[DeclensionCheck]
+          ) -> Tuple[List[str], List[str], List[Tuple[str, str, str, str]]]:
+    """Declines the lemma of each check, and compares its forms with the checked ones, without stress marks or ё.
+    Returns the lemmas left undeclined, those declined right, and the (lemma, case, expected, generated) forms of
+    those declined wrongly"""
+    undeclined, right, wrong = [], [], []
+    for lemma, part_of_speech, animate, terms in checks:
+        declinable = generator.decline(lemma, part_of_speech, animate)
+        if declinable is None:
+            undeclined.append(lemma)
+            continue
+        wrong_forms = [
+            (lemma, case, "/".join(expected), form)
+            for case, expected_row, row in zip(CASE_NAMES, terms, declinable.terms)
+            for expected, form in zip(expected_row, row)
+            if lookup_key(form) not in [lookup_key(e) for e in expected]
+        ]
+        if wrong_forms:
+            wrong.extend(wrong_forms)
+        else:
+            right.append(lemma)
+    return undeclined, right, wrong
+
+
+def write_declensions(path: Path, declined: List[Tuple[LexiconEntry, Paradigm, Declinable]]):
+    with open(path, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["lemma", "part of speech", "paradigm", "case", "forms"])
+        for entry, paradigm, declinable in declined:
+            for case, row in zip(CASE_NAMES, declinable.terms):
+                writer.writerow([entry.lemma, entry.part_of_speech, paradigm.name, case, ", ".join(row)])
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Decline every adjective and noun in lemma.txt, and time it.")
+    p.add_argument("--output", type=Path, default=None, help="CSV file to write the declensions to.")
+    p.add_argument("--repeats", type=int, default=3, help="Timed runs, the best is reported (default: 3).")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    generator = DeclensionGenerator.from_store()
+    print(f"Read {len(generator.paradigms)} paradigms in {(time.perf_counter() - start) * 1000:.1f}ms")
+    mismatches, unstressed = validate(generator)
+    print(f"{len(mismatches)} forms of the sample lemmas differ from their tables, "
+          f"{unstressed} more only by stress marks")
+    for name, expected, form in mismatches:
+        print(f"    {name}: expected {expected}, generated {form}")
+
+    checks = read_declension_checks()
+    for part_of_speech in DECLINED_PARTS_OF_SPEECH:
+        of_part = [c for c in checks if c.part_of_speech == part_of_speech]
+        undeclined, right, wrong = check(generator, of_part)
+        forms = sum(len(row) for c in of_part if c.lemma not in undeclined for row in c.terms)
+        print(f"\n{part_of_speech}: of {len(of_part)} checked lemmas, {len(right)} declined right, "
+              f"{len(of_part) - len(right) - len(undeclined)} wrongly and {len(undeclined)} left out. "
+              f"{forms - len(wrong)} of {forms} forms right ({(forms - len(wrong)) / max(forms, 1):.1%})")
+        if undeclined:
+            print(f"    left out: {', '.join(undeclined)}")
+        for lemma, case, expected, form in wrong:
+            print(f"    {lemma} {case}: expected {expected}, generated {form}")
+
+    lexicon = read_lexicon()
+    for part_of_speech in DECLINED_PARTS_OF_SPEECH:
+        entries = list(lexicon.entries(part_of_speech))
+        best = None
+        declined = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            declined = list(generator.decline_all(entries))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        by_paradigm: Dict[str, int] = {}
+        for _, paradigm, _ in declined:
+            by_paradigm[paradigm.name] = by_paradigm.get(paradigm.name, 0) + 1
+        print(f"\n{part_of_speech}: declined {len(declined)} of {len(entries)} lemmas in {best * 1000:.1f}ms, "
+              f"{len(entries) / best:,.0f} lemmas/s")
+        for name, count in sorted(by_paradigm.items()):
+            print(f"    {name:<30} {count:>6}")
+        if args.output is not None:
+            path = args.output.with_stem(f"{args.output.stem}_{part_of_speech}")
+            write_declensions(path, declined)
+            print(f"Wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import gzip
+import os
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Tuple, NamedTuple, Optional, Union
+
+from grammar.declinable import Declinable
+from utils.utils import stress_free_key
+
+RESOURCES_PATH = Path(__file__).parent.parent / "resources"
+STORE_PATH = Path(__file__).parent / "_declensions.pickle.gz"
+
+# Directories of declension tables, relative to RESOURCES_PATH
+DECLENSION_DIRS = ["adjectives", "nouns", "pronouns"]
+
+CASE_NAMES = ["nom", "acc", "gen", "dat", "inst", "prep"]
+
+# Relative path, size and mtime in ns of each source file, in path order
+Fingerprint = Tuple[Tuple[str, int, int], ...]
+
+# Stores already read in this process, by resources path
+_STORES: Dict[Path, 'DeclensionStore'] = {}
+# Held while a store is checked, compiled or saved, so that threads of one process read it at most once
+_STORES_LOCK = threading.Lock()
+
+
+class TableInfo(NamedTuple):
+    # Path of the source file relative to RESOURCES_PATH, e.g. 'nouns/01-masculine-1.txt'
+    source: str
+    heading: str
+    # The forms of row i are `forms[row_offsets[i]:row_offsets[i + 1]]`
+    row_offsets: Tuple[int, ...]
+
+
+def fingerprint(resources_path: Path = RESOURCES_PATH) -> Fingerprint:
+    files = sorted(f for d in DECLENSION_DIRS for f in (resources_path / d).rglob("*.txt"))
+    return tuple(
+        (f.relative_to(resources_path).as_posix(), f.stat().st_size, f.stat().st_mtime_ns) for f in files
+    )
+
+
+class DeclensionStore:
+    """Every declension table in the resources, compiled into one flat list of forms. A form is found by table,
+    case and column, and tables by lemma, without reading the source files"""
+
+    def __init__(self, fingerprint: Fingerprint, tables: List[TableInfo], forms: List[str]):
+        self.fingerprint: Fingerprint = fingerprint
+        self.tables: List[TableInfo] = tables
+        self.forms: List[str] = forms
+        self._by_source: Dict[str, int] = {t.source: i for i, t in enumerate(tables)}
+        # Each stress free lemma maps to the (table, column) pairs it heads. Each column of the personal pronoun
+        # table is its own lemma, otherwise the lemma is the first nominative form and the column is None
+        self._by_lemma: Dict[str, List[Tuple[int, Optional[int]]]] = {}
+        for table_id, table in enumerate(tables):
+            nominatives = self._row(table, Declinable.NOM)
+            if table.source == "pronouns/personal.txt":
+                for column, lemma in enumerate(nominatives):
+                    self._by_lemma.setdefault(stress_free_key(lemma), []).append((table_id, column))
+            elif nominatives:
+                self._by_lemma.setdefault(stress_free_key(nominatives[0]), []).append((table_id, None))
+
+    def __len__(self):
+        return len(self.tables)
+
+    def _row(self, table: TableInfo, case: int) -> List[str]:
+        return self.forms[table.row_offsets[case]:table.row_offsets[case + 1]]
+
+    def table(self, source: str) -> Tuple[str, List[List[str]]]:
+        """The heading and rows of the table read from `source`, as returned by `Declinable.parse_file`"""
+        table = self.tables[self._by_source[source]]
+        return table.heading, [self._row(table, case) for case in range(len(table.row_offsets) - 1)]
+
+    def tables_in(self, directory: str) -> List[Tuple[str, List[List[str]]]]:
+        """The heading and rows of each table directly in `directory`, in path order"""
+        return [
+            self.table(t.source) for t in self.tables
+            if t.source.rpartition("/")[0] == directory
+        ]
+
+    def sources_of(self, lemma: str) -> List[str]:
+        return [self.tables[table_id].source for table_id, _ in self._by_lemma.get(stress_free_key(lemma), [])]
+
+    def form(self, lemma: str, case: Union[int, str], column: Optional[int] = None) -> List[str]:
+        """The form of `lemma` in `case` and `column`, from each table it heads. `case` is an index or one of
+        CASE_NAMES, and `column` indexes the table's columns, e.g. m., f., n., pl. for adjectives. The column of a
+        personal pronoun is fixed by the pronoun"""
+        case_index = CASE_NAMES.index(case) if isinstance(case, str) else case
+        forms = []
+        for table_id, lemma_column in self._by_lemma.get(stress_free_key(lemma), []):
+            row = self._row(self.tables[table_id], case_index)
+            i = lemma_column if lemma_column is not None else column or 0
+            if i < len(row):
+                forms.append(row[i])
+        return forms
+
+    @staticmethod
+    def compile(resources_path: Path = RESOURCES_PATH) -> 'DeclensionStore':
+        tables = []
+        forms: List[str] = []
+        for source, _, _ in fingerprint(resources_path):
+            heading, terms = Declinable.parse_file(resources_path / source)
+            row_offsets = [len(forms)]
+            for row in terms:
+                forms.extend(row)
+                row_offsets.append(len(forms))
+            tables.append(TableInfo(source, heading, tuple(row_offsets)))
+        return DeclensionStore(fingerprint(resources_path), tables, forms)
+
+    def save(self, path: Path):
+        """Writes to a temporary file beside `path`, then renames it into place, so that a process loading the
+        store never sees a partly written file"""
+        descriptor, temporary_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, 'wb') as file, gzip.open(file, 'wb') as f:
+                tables = [tuple(t) for t in self.tables]
+                pickle.dump((self.fingerprint, tables, self.forms), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    @staticmethod
+    def load(path: Path) -> 'DeclensionStore':
+        with gzip.open(path, 'rb') as f:
+            stored_fingerprint, tables, forms = pickle.load(f)
+        return DeclensionStore(stored_fingerprint, [TableInfo(*t) for t in tables], forms)
+
+
+def read_declension_store(force: bool = False, resources_path: Path = RESOURCES_PATH) -> DeclensionStore:
+    """The compiled store, recompiled if any source file has been added, removed or changed since it was saved.
+    Checking freshness only stats the source files, and is done once per process"""
+    with _STORES_LOCK:
+        store = _STORES.get(resources_path)
+        if store is not None and not force:
+            return store
+        current = fingerprint(resources_path)
+        store = None
+        if STORE_PATH.exists() and not force and resources_path == RESOURCES_PATH:
+            store = DeclensionStore.load(STORE_PATH)
+            if store.fingerprint != current:
+                store = None
+        if store is None:
+            store = DeclensionStore.compile(resources_path)
+            if resources_path == RESOURCES_PATH:
+                store.save(STORE_PATH)
+        _STORES[resources_path] = store
+        return store
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    store = DeclensionStore.compile()
+    print(f"Compiled {len(store)} tables of {len(store.forms)} forms in {time.perf_counter() - start:.3f}s")
+    store.save(STORE_PATH)
+    start = time.perf_counter()
+    store = DeclensionStore.load(STORE_PATH)
+    print(f"Loaded in {time.perf_counter() - start:.4f}s")
+    print(store.form("белый", "gen", 1), store.form("он", "dat"), store.form("зал", "inst", 1))
+    print(store.sources_of("мой"), store.sources_of("я"))
@@ -2,8 +2,6 @@ from abc import abstractmethod
 from pathlib import Path
 from typing import List, Tuple
 
-from tabulate import tabulate
-
 from utils.types import checked_type
 
 
@@ -17,6 +15,8 @@ class Declinable:
         return [t[i_type] for t in self.terms]
 
     def __str__(self):
+        # Imported here, as only printing a table needs tabulate
+        from tabulate import tabulate
         rows = [self.type_names] + self.terms
         return tabulate(rows)
 
@@ -0,0 +1,181 @@
+import gzip
+import pickle
+import time
+from pathlib import Path
+from typing import List, Dict, Tuple, NamedTuple, Iterable, Optional
+
+from grammar.adjective import SampleAdjective
+from grammar.conjugation import Conjugation, PresentOrFutureConjugation, PastConjugation, Imperative
+from grammar.conjugation_data import read_conjugations
+from grammar.declension_store import CASE_NAMES
+from grammar.declinable import Declinable
+from grammar.noun import SampleNoun
+from grammar.pronoun import SamplePronoun, PersonalPronoun
+from utils.utils import lookup_key
+
+INDEX_PATH = Path(__file__).parent / "_form_index.pickle.gz"
+
+# Saved with each index, and bumped whenever `normalise_form` changes, so that older indexes are rebuilt
+_INDEX_FORMAT = 2
+
+_PAST_TITLES = [PastConjugation.PAST_M, PastConjugation.PAST_F, PastConjugation.PAST_N, PastConjugation.PAST_PL]
+
+
+def normalise_form(text: str) -> str:
+    """The key a form is indexed under: `lookup_key` in lower case, so without stress marks and with ё written as
+    е. Unlike `sanitize_text`, й is kept, so that e.g. мой and мои stay apart"""
+    return lookup_key(text).strip().lower()
+
+
+def _alternatives(text: Optional[str]) -> List[str]:
+    """Tables give alternative forms separated by ',' or '/', and '—' where there is no form"""
+    if text is None:
+        return []
+    return [t.strip() for t in text.replace("/", ",").split(",") if t.strip() and t.strip() != "—"]
+
+
+class FormTag(NamedTuple):
+    lemma: str
+    part_of_speech: str
+    # The grammatical slot, e.g. 'present/future 1st Sing', 'participle active past long' or 'gen pl.'
+    slot: str
+
+
+def conjugation_forms(conjugation: Conjugation) -> Iterable[Tuple[str, str]]:
+    """Each (form, slot) in a conjugation"""
+    for title, term in zip(PresentOrFutureConjugation.TITLES, conjugation.present_or_future.terms):
+        for form in _alternatives(term):
+            yield form, f"present/future {title}"
+    for title, term in zip(_PAST_TITLES, conjugation.past.terms):
+        for form in _alternatives(term):
+            yield form, f"past {title}"
+    if conjugation.imperative is not None:
+        for title, term in [(Imperative.IMP_S, conjugation.imperative.singular),
+                            (Imperative.IMP_PL, conjugation.imperative.plural)]:
+            for form in _alternatives(term):
+                yield form, f"imperative {title}"
+    for p in conjugation.participles.participles:
+        for form in _alternatives(p.text):
+            yield form, f"participle {p.participle_type} {p.tense} {p.long_or_short}"
+
+
+def declinable_forms(declinable: Declinable) -> Iterable[Tuple[str, str, str]]:
+    """Each (lemma, form, slot) in a declension table. Each column of a personal pronoun table is its own lemma,
+    otherwise the lemma is the first nominative form"""
+    personal = isinstance(declinable, PersonalPronoun)
+    type_names = declinable.type_names
+    nominatives = declinable.nominative
+    for case, row in zip(CASE_NAMES, declinable.terms):
+        # Rows can have trailing empty cells
+        for i, term in enumerate(row[:len(nominatives)]):
+            lemma_forms = _alternatives(nominatives[i] if personal else declinable.root)
+            if not lemma_forms:
+                continue
+            type_name = "" if personal or i >= len(type_names) else type_names[i]
+            slot = f"{case} {type_name}".strip()
+            for form in _alternatives(term):
+                yield lemma_forms[0], form, slot
+
+
+class FormIndex:
+    """Maps each normalised form to the tags of every (lemma, slot) it fills. Lemmas and slots are stored once
+    each, and a tag is a single integer, `lemma_id * len(slots) + slot_id`, which keeps the index compact"""
+
+    def __init__(self, lemmas: List[Tuple[str, str]], slots: List[str], forms: Dict[str, Tuple[int, ...]]):
+        # (lemma, part of speech) pairs
+        self.lemmas: List[Tuple[str, str]] = lemmas
+        self.slots: List[str] = slots
+        self.forms: Dict[str, Tuple[int, ...]] = forms
+
+    def __len__(self):
+        return len(self.forms)
+
+    def __contains__(self, form: str):
+        return normalise_form(form) in self.forms
+
+    def _tag(self, tag_id: int) -> FormTag:
+        lemma_id, slot_id = divmod(tag_id, len(self.slots))
+        lemma, part_of_speech = self.lemmas[lemma_id]
+        return FormTag(lemma, part_of_speech, self.slots[slot_id])
+
+    def lookup(self, form: str) -> List[FormTag]:
+        return [self._tag(t) for t in self.forms.get(normalise_form(form), ())]
+
+    def lemmas_of(self, form: str) -> List[str]:
+        """The distinct lemmas `form` belongs to, in index order"""
+        tags = self.forms.get(normalise_form(form), ())
+        return list(dict.fromkeys(self.lemmas[t // len(self.slots)][0] for t in tags))
+
+    @staticmethod
+    def build(
+            conjugations: List[Conjugation],
+            declinables: List[Tuple[Declinable, str]],
+    ) -> 'FormIndex':
+        """`declinables` pairs each declension table with its part of speech"""
+        entries: List[Tuple[Tuple[str, str], str, str]] = []
+        for c in conjugations:
+            lemma = (c.infinitive, "verb")
+            for form, slot in conjugation_forms(c):
+                entries.append((lemma, form, slot))
+        for declinable, part_of_speech in declinables:
+            for lemma, form, slot in declinable_forms(declinable):
+                entries.append(((lemma, part_of_speech), form, slot))
+
+        lemma_ids: Dict[Tuple[str, str], int] = {}
+        slot_ids: Dict[str, int] = {}
+        for lemma, _, slot in entries:
+            lemma_ids.setdefault(lemma, len(lemma_ids))
+            slot_ids.setdefault(slot, len(slot_ids))
+        n_slots = len(slot_ids)
+        forms: Dict[str, Dict[int, None]] = {}
+        for lemma, form, slot in entries:
+            forms.setdefault(normalise_form(form), {})[lemma_ids[lemma] * n_slots + slot_ids[slot]] = None
+        return FormIndex(
+            list(lemma_ids),
+            list(slot_ids),
+            {form: tuple(tags) for form, tags in forms.items()},
+        )
+
+    def save(self, path: Path):
+        with gzip.open(path, 'wb') as f:
+            pickle.dump((_INDEX_FORMAT, self.lemmas, self.slots, self.forms), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: Path) -> Optional['FormIndex']:
+        """The saved index, or None if it was saved in another format"""
+        with gzip.open(path, 'rb') as f:
+            saved = pickle.load(f)
+        if len(saved) != 4 or saved[0] != _INDEX_FORMAT:
+            return None
+        _, lemmas, slots, forms = saved
+        return FormIndex(lemmas, slots, forms)
+
+
+def sample_declinables() -> List[Tuple[Declinable, str]]:
+    return (
+            [(s.adjective, "adjective") for s in SampleAdjective.samples()]
+            + [(s.noun, "noun") for s in SampleNoun.samples()]
+            + [(s.pronoun, "pronoun") for s in SamplePronoun.samples()]
+    )
+
+
+def read_form_index(force: bool) -> FormIndex:
+    index = FormIndex.load(INDEX_PATH) if INDEX_PATH.exists() and not force else None
+    if index is not None:
+        return index
+    index = FormIndex.build(read_conjugations(force), sample_declinables())
+    index.save(INDEX_PATH)
+    return index
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    index = FormIndex.build(read_conjugations(force=False), sample_declinables())
+    print(f"Built index of {len(index)} forms in {time.perf_counter() - start:.2f}s")
+    index.save(INDEX_PATH)
+    print(f"Saved {INDEX_PATH.stat().st_size / 1e6:.1f} MB")
+    start = time.perf_counter()
+    index = FormIndex.load(INDEX_PATH)
+    print(f"Loaded in {time.perf_counter() - start:.2f}s")
+    for form in ["пишу", "писавший", "белого", "нас"]:
+        print(form, index.lookup(form))
@@ -0,0 +1,268 @@
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from enum import StrEnum
+from functools import cached_property
+from itertools import accumulate
+from pathlib import Path
+from typing import List, Dict, NamedTuple, Optional, Iterator
+
+LEMMA_PATH = Path(__file__).parent.parent / 'lemma.txt'
+
+
+class PartOfSpeech(StrEnum):
+    ADJ = "adj"
+    ADJPRON = "adjpron"
+    ADV = "adv"
+    CARD = "card"
+    MISC = "misc"
+    NOUN = "noun"
+    ORD = "ord"
+    PREP = "prep"
+    PRON = "pron"
+    VERB = "verb"
+
+
+_PARTS_OF_SPEECH = list(PartOfSpeech)
+
+# Layout of a lexicon cache: a header of magic, source size, source mtime in ns, number of entries, number of
+# distinct lemmas and the length of the string pool, then the arrays below in native byte order, then the pool.
+# The cache is only used if the source's size and mtime match
+_CACHE_MAGIC = b"LEX1"
+_CACHE_HEADER = struct.Struct("<4sQQIII")
+
+
+class LexiconEntry(NamedTuple):
+    rank: int
+    # Instances per million words
+    frequency: float
+    lemma: str
+    part_of_speech: PartOfSpeech
+
+
+class Lexicon:
+    """A frequency list in the format of lemma.txt, 'rank frequency lemma part-of-speech', held in typed arrays
+    in file order. Lemmas are stored once each in a sorted string pool, with a hash index from lemma to its
+    entries, so lookups are O(1) and the whole list loads from its binary cache in milliseconds"""
+
+    def __init__(
+            self,
+            ranks: array,
+            frequencies: array,
+            parts_of_speech: array,
+            lemma_ids: array,
+            pool_offsets: array,
+            pool: str,
+    ):
+        self.ranks: array = ranks
+        self.frequencies: array = frequencies
+        # Index of each entry's part of speech in PartOfSpeech
+        self.parts_of_speech: array = parts_of_speech
+        # Index of each entry's lemma in the pool
+        self.lemma_ids: array = lemma_ids
+        # The i'th lemma of the pool is `pool[pool_offsets[i]:pool_offsets[i + 1]]`
+        self.pool_offsets: array = pool_offsets
+        self.pool: str = pool
+
+    # The indexes below are built on first use, so that loading from the cache only reads the arrays
+
+    @cached_property
+    def lemmas(self) -> List[str]:
+        offsets = self.pool_offsets
+        return [self.pool[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    @cached_property
+    def _lemma_index(self) -> Dict[str, int]:
+        return {lemma: i for i, lemma in enumerate(self.lemmas)}
+
+    @cached_property
+    def _entries_of_lemma(self) -> Dict[int, List[int]]:
+        entries: Dict[int, List[int]] = {}
+        for i, lemma_id in enumerate(self.lemma_ids):
+            entries.setdefault(lemma_id, []).append(i)
+        return entries
+
+    @cached_property
+    def _entries_of_pos(self) -> Dict[int, array]:
+        """Entries of each part of speech, in file order"""
+        entries = {i: array('I') for i in range(len(_PARTS_OF_SPEECH))}
+        for i, pos in enumerate(self.parts_of_speech):
+            entries[pos].append(i)
+        return entries
+
+    @cached_property
+    def _cumulative(self) -> array:
+        """Running totals of frequency over all entries"""
+        return array('d', accumulate(self.frequencies))
+
+    @cached_property
+    def _cumulative_of_pos(self) -> Dict[int, array]:
+        """Running totals of frequency over the entries of each part of speech"""
+        return {
+            pos: array('d', accumulate(self.frequencies[i] for i in entries))
+            for pos, entries in self._entries_of_pos.items()
+        }
+
+    def __len__(self):
+        return len(self.ranks)
+
+    def __contains__(self, lemma: str):
+        return lemma in self._lemma_index
+
+    def entry(self, i: int) -> LexiconEntry:
+        return LexiconEntry(
+            self.ranks[i],
+            self.frequencies[i],
+            self.lemmas[self.lemma_ids[i]],
+            _PARTS_OF_SPEECH[self.parts_of_speech[i]],
+        )
+
+    def entries(self, part_of_speech: Optional[PartOfSpeech] = None) -> Iterator[LexiconEntry]:
+        """All entries, or those with the given part of speech, in file order"""
+        if part_of_speech is None:
+            return (self.entry(i) for i in range(len(self)))
+        return (self.entry(i) for i in self._entries_of_pos[_PARTS_OF_SPEECH.index(part_of_speech)])
+
+    def _entry_ids(self, lemma: str, part_of_speech: Optional[PartOfSpeech]) -> List[int]:
+        lemma_id = self._lemma_index.get(lemma)
+        if lemma_id is None:
+            return []
+        ids = self._entries_of_lemma[lemma_id]
+        if part_of_speech is None:
+            return ids
+        pos = _PARTS_OF_SPEECH.index(part_of_speech)
+        return [i for i in ids if self.parts_of_speech[i] == pos]
+
+    def rank(self, lemma: str, part_of_speech: Optional[PartOfSpeech] = None) -> Optional[int]:
+        """The best rank of `lemma`, or None if it isn't in the list"""
+        ids = self._entry_ids(lemma, part_of_speech)
+        return min(self.ranks[i] for i in ids) if ids else None
+
+    def frequency(self, lemma: str, part_of_speech: Optional[PartOfSpeech] = None) -> float:
+        """The frequency of `lemma`, summed over its entries"""
+        return sum(self.frequencies[i] for i in self._entry_ids(lemma, part_of_speech))
+
+    def frequencies_of(self, part_of_speech: PartOfSpeech) -> Dict[str, float]:
+        """Maps each lemma with the given part of speech to its frequency. Repeated lemmas have their frequencies
+        summed"""
+        result: Dict[str, float] = {}
+        for i in self._entries_of_pos[_PARTS_OF_SPEECH.index(part_of_speech)]:
+            lemma = self.lemmas[self.lemma_ids[i]]
+            result[lemma] = result.get(lemma, 0.0) + self.frequencies[i]
+        return result
+
+    def top(self, n: int, part_of_speech: Optional[PartOfSpeech] = None) -> List[LexiconEntry]:
+        if part_of_speech is None:
+            return [self.entry(i) for i in range(min(n, len(self)))]
+        return [self.entry(i) for i in self._entries_of_pos[_PARTS_OF_SPEECH.index(part_of_speech)][:n]]
+
+    def _cumulative_for(self, part_of_speech: Optional[PartOfSpeech]) -> array:
+        if part_of_speech is None:
+            return self._cumulative
+        return self._cumulative_of_pos[_PARTS_OF_SPEECH.index(part_of_speech)]
+
+    def percentile(self, lemma: str, part_of_speech: Optional[PartOfSpeech] = None) -> Optional[float]:
+        """The fraction of the total frequency, of all entries or of those with the given part of speech, covered
+        by entries up to and including the best ranked entry of `lemma`"""
+        ids = self._entry_ids(lemma, part_of_speech)
+        if not ids:
+            return None
+        cumulative = self._cumulative_for(part_of_speech)
+        if part_of_speech is None:
+            position = ids[0]
+        else:
+            position = bisect_left(self._entries_of_pos[_PARTS_OF_SPEECH.index(part_of_speech)], ids[0])
+        return cumulative[position] / cumulative[-1]
+
+    def size_for_coverage(self, fraction: float, part_of_speech: Optional[PartOfSpeech] = None) -> int:
+        """The number of top entries, of all entries or of those with the given part of speech, needed to cover
+        `fraction` of their total frequency"""
+        cumulative = self._cumulative_for(part_of_speech)
+        if not cumulative:
+            return 0
+        return min(bisect_left(cumulative, fraction * cumulative[-1]) + 1, len(cumulative))
+
+    @staticmethod
+    def from_text(path: Path) -> 'Lexicon':
+        ranks = array('I')
+        frequencies = array('d')
+        parts_of_speech = array('B')
+        lemmas: List[str] = []
+        pos_ids = {str(pos): i for i, pos in enumerate(_PARTS_OF_SPEECH)}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) != 4 or fields[3] not in pos_ids:
+                    raise ValueError(f"Bad line {line}")
+                rank, frequency, lemma, pos = fields
+                ranks.append(int(rank))
+                frequencies.append(float(frequency))
+                lemmas.append(lemma)
+                parts_of_speech.append(pos_ids[pos])
+        pool_lemmas = sorted(set(lemmas))
+        pool_index = {lemma: i for i, lemma in enumerate(pool_lemmas)}
+        lemma_ids = array('I', (pool_index[lemma] for lemma in lemmas))
+        pool_offsets = array('I', [0])
+        pool_offsets.extend(accumulate(len(lemma) for lemma in pool_lemmas))
+        return Lexicon(ranks, frequencies, parts_of_speech, lemma_ids, pool_offsets, "".join(pool_lemmas))
+
+    def _arrays(self) -> List[array]:
+        return [self.ranks, self.frequencies, self.parts_of_speech, self.lemma_ids, self.pool_offsets]
+
+    def save(self, path: Path, source: Path):
+        stat = source.stat()
+        pool = self.pool.encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_CACHE_HEADER.pack(
+                _CACHE_MAGIC, stat.st_size, stat.st_mtime_ns, len(self), len(self.pool_offsets) - 1, len(pool)
+            ))
+            for a in self._arrays():
+                a.tofile(f)
+            f.write(pool)
+
+    @staticmethod
+    def load(path: Path, source: Path) -> Optional['Lexicon']:
+        """The cached lexicon, or None if there is no cache, or it is stale or of another format"""
+        if not path.exists():
+            return None
+        stat = source.stat()
+        with open(path, 'rb') as f:
+            header = f.read(_CACHE_HEADER.size)
+            if len(header) != _CACHE_HEADER.size:
+                return None
+            magic, size, mtime_ns, n_entries, n_lemmas, pool_length = _CACHE_HEADER.unpack(header)
+            if magic != _CACHE_MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                return None
+            arrays = [array('I'), array('d'), array('B'), array('I'), array('I')]
+            for a, n in zip(arrays, [n_entries, n_entries, n_entries, n_entries, n_lemmas + 1]):
+                a.fromfile(f, n)
+            pool = f.read(pool_length).decode('utf-8')
+        return Lexicon(*arrays, pool)
+
+
+def cache_path(source: Path) -> Path:
+    return Path(__file__).parent / f"_lexicon_{source.stem}.bin"
+
+
+def read_lexicon(force: bool = False, path: Path = LEMMA_PATH) -> Lexicon:
+    cached = cache_path(path)
+    lexicon = None if force else Lexicon.load(cached, path)
+    if lexicon is None:
+        lexicon = Lexicon.from_text(path)
+        lexicon.save(cached, path)
+    return lexicon
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    lexicon = Lexicon.from_text(LEMMA_PATH)
+    print(f"Parsed {len(lexicon)} entries in {time.perf_counter() - start:.3f}s")
+    lexicon.save(cache_path(LEMMA_PATH), LEMMA_PATH)
+    start = time.perf_counter()
+    lexicon = Lexicon.load(cache_path(LEMMA_PATH), LEMMA_PATH)
+    print(f"Loaded cache of {cache_path(LEMMA_PATH).stat().st_size / 1e3:.0f} KB in "
+          f"{time.perf_counter() - start:.3f}s")
+    print(lexicon.rank("сказать"), lexicon.frequency("что"), lexicon.top(5, PartOfSpeech.VERB))
+    print(f"сказать is in the top {lexicon.percentile('сказать', PartOfSpeech.VERB):.1%} of verb usage")
+    print(f"{lexicon.size_for_coverage(0.8, PartOfSpeech.VERB)} verbs cover 80% of verb usage")
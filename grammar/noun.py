@@ -1,6 +1,6 @@
-from pathlib import Path
 from typing import List
 
+from grammar.declension_store import read_declension_store
 from grammar.declinable import Declinable, SampleDeclinable
 from utils.types import checked_type
 
@@ -21,14 +21,7 @@ class SampleNoun(SampleDeclinable):
 
     @staticmethod
     def samples() -> List['SampleNoun']:
-        path = Path(__file__).parent.parent / "resources" / "nouns"
-        files = path.glob("*.txt")
-        files = sorted(files)
-        nouns = []
-        for file in files:
-            heading, terms = Declinable.parse_file(file)
-            nouns.append(SampleNoun(Noun(terms), heading))
-        return nouns
+        return [SampleNoun(Noun(terms), heading) for heading, terms in read_declension_store().tables_in("nouns")]
 
 if __name__ == '__main__':
     foo = SampleNoun.samples()
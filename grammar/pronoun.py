@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import List
 
+from grammar.declension_store import read_declension_store
 from grammar.declinable import Declinable, SampleDeclinable
 from utils.types import checked_type
 
@@ -48,33 +49,34 @@ class SamplePronoun(SampleDeclinable):
     @staticmethod
     def samples() -> List['SamplePronoun']:
         samples = []
+        store = read_declension_store()
 
-        def personal_pronoun(path):
-            heading, terms = Declinable.parse_file(path)
+        def personal_pronoun(source):
+            heading, terms = store.table(source)
             return SamplePronoun(PersonalPronoun(terms), heading)
-        def gendered_pronoun(path, deck):
-            heading, terms = Declinable.parse_file(path)
+        def gendered_pronoun(source, deck):
+            heading, terms = store.table(source)
             return SamplePronoun(GenderedPronoun(deck, terms), heading)
-        def all_genders_pronoun(path, deck):
-            heading, terms = Declinable.parse_file(path)
+        def all_genders_pronoun(source, deck):
+            heading, terms = store.table(source)
             return SamplePronoun(AllGendersPronoun(deck, terms), heading)
 
-        for path in (PRONOUNS_PATH / "interrogative").glob("*.txt"):
-            samples.append(all_genders_pronoun(path, "Interrogative"))
-        for path in (PRONOUNS_PATH / "demonstrative").glob("*.txt"):
-            samples.append(gendered_pronoun(path, "Demonstrative"))
-        for path in (PRONOUNS_PATH / "possessive").glob("*.txt"):
-            samples.append(gendered_pronoun(path, "Possessive"))
+        for heading, terms in store.tables_in("pronouns/interrogative"):
+            samples.append(SamplePronoun(AllGendersPronoun("Interrogative", terms), heading))
+        for heading, terms in store.tables_in("pronouns/demonstrative"):
+            samples.append(SamplePronoun(GenderedPronoun("Demonstrative", terms), heading))
+        for heading, terms in store.tables_in("pronouns/possessive"):
+            samples.append(SamplePronoun(GenderedPronoun("Possessive", terms), heading))
 
         samples.append(
-            gendered_pronoun(PRONOUNS_PATH / "reflexive" / "ones-own.txt", "Reflexive")
+            gendered_pronoun("pronouns/reflexive/ones-own.txt", "Reflexive")
         )
         samples.append(
-            all_genders_pronoun(PRONOUNS_PATH / "reflexive" / "self.txt", "Reflexive")
+            all_genders_pronoun("pronouns/reflexive/self.txt", "Reflexive")
         )
-        samples.append(gendered_pronoun(PRONOUNS_PATH / "all.txt", "Other"))
-        samples.append(gendered_pronoun(PRONOUNS_PATH / "emphatic.txt", "Other"))
-        samples.append(personal_pronoun(PRONOUNS_PATH / "personal.txt"))
+        samples.append(gendered_pronoun("pronouns/all.txt", "Other"))
+        samples.append(gendered_pronoun("pronouns/emphatic.txt", "Other"))
+        samples.append(personal_pronoun("pronouns/personal.txt"))
 
         return samples
 
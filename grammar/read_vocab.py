@@ -19,18 +19,22 @@ class Vocab:
         self.items: list[VocabItem] = checked_list_type(items, VocabItem)
 
 
+def parse_vocab_csv(path: Path) -> Vocab:
+    table = read_csv_file(path)
+    items = []
+    for i, row in enumerate(table):
+        russian, english = row[:2]
+        if len(row) >= 3:
+            notes = row[2].replace("|", "<br>")
+        else:
+            notes = ""
+        items.append(VocabItem(i, russian, english, notes))
+    return Vocab(items)
+
+
 def read_vocab_10000(force: bool) -> Vocab:
     key = "Vocab"
     with shelve.open(str(SHELF_PATH)) as shelf:
         if key not in shelf or force:
-            table = read_csv_file(VOCAB_CSV_PATH)
-            items = []
-            for i, row in enumerate(table):
-                russian, english = row[:2]
-                if len(row) >= 3:
-                    notes = row[2].replace("|", "<br>")
-                else:
-                    notes = ""
-                items.append(VocabItem(i, russian, english, notes))
-            shelf[key] = Vocab(items)
+            shelf[key] = parse_vocab_csv(VOCAB_CSV_PATH)
         return shelf[key]
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+A read-only dataset of tables published once into shared memory, for process pools whose workers would otherwise
+each unpickle their own copy of the conjugations and verb infos from the shelves.
+
+Each record is a table, the form in which Conjugation and WikipediaVerbInfo are written to and read from CSV. The
+segment holds no pickles: it is a pool of distinct UTF-8 strings, and arrays of unsigned 32 bit offsets into it,
+read in place through memoryviews. After a header of four counts and a JSON directory of the sections:
+
+    string_offsets  string count + 1    where each string starts in the pool, then where the pool ends
+    record_rows     record count + 1    the first row of each record
+    row_cells       row count + 1       the first cell of each row
+    cells           cell count          the string of each cell, or NO_STRING for a cell of None
+    pool            the strings, each stored once
+
+Records of a section are numbered from 0 in the order they were published. `value` reads one cell of a record
+without decoding any other, while `table` decodes a whole record, for `Conjugation.from_table` and the like.
+
+In a pool:
+
+    with SharedDataset.publish({"conjugations": [c.to_table() for c in conjugations]}) as dataset:
+        with ProcessPoolExecutor(initializer=attach_worker, initargs=(dataset.name,)) as executor:
+            ...
+
+and in a worker, `Conjugation.from_table(worker_dataset().table("conjugations", i))`.
+"""
+import json
+import struct
+from array import array
+from multiprocessing import shared_memory
+from typing import List, Dict, Optional, Tuple, Sequence, Iterator
+
+# String, row and cell counts, and the length of the JSON directory
+_HEADER = struct.Struct("<IIII")
+_OFFSET_SIZE = array("I").itemsize
+NO_STRING = 0xFFFFFFFF
+
+# Set in each worker process by `attach_worker`
+_DATASET: Optional['SharedDataset'] = None
+
+Table = List[List[Optional[str]]]
+
+
+def _aligned(position: int) -> int:
+    return -(-position // _OFFSET_SIZE) * _OFFSET_SIZE
+
+
+class SharedDataset:
+    """A view of a shared memory segment of tables. The process that publishes the segment owns it, and unlinks it
+    on close; other processes only detach"""
+
+    def __init__(self, segment: shared_memory.SharedMemory, owner: bool):
+        self.segment: shared_memory.SharedMemory = segment
+        self.owner: bool = owner
+        buffer = segment.buf
+        string_count, row_count, cell_count, directory_length = _HEADER.unpack_from(buffer)
+        directory = json.loads(bytes(buffer[_HEADER.size:_HEADER.size + directory_length]).decode('utf-8'))
+        # The first record and the number of records of each section
+        self.sections: Dict[str, Tuple[int, int]] = {name: tuple(span) for name, span in directory.items()}
+        record_count = sum(count for _, count in self.sections.values())
+        position = _aligned(_HEADER.size + directory_length)
+        self._views: List[memoryview] = []
+        self.string_offsets, position = self._offsets(position, string_count + 1)
+        self.record_rows, position = self._offsets(position, record_count + 1)
+        self.row_cells, position = self._offsets(position, row_count + 1)
+        self.cells, position = self._offsets(position, cell_count)
+        self.pool: memoryview = buffer[position:position + self.string_offsets[-1]].toreadonly()
+        self._views.append(self.pool)
+
+    def _offsets(self, position: int, count: int) -> Tuple[memoryview, int]:
+        end = position + count * _OFFSET_SIZE
+        view = self.segment.buf[position:end].toreadonly().cast("I")
+        self._views.append(view)
+        return view, end
+
+    @property
+    def name(self) -> str:
+        return self.segment.name
+
+    def __len__(self):
+        return len(self.record_rows) - 1
+
+    def __enter__(self) -> 'SharedDataset':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def section_size(self, section: str) -> int:
+        return self.sections.get(section, (0, 0))[1]
+
+    def _record(self, section: str, position: int) -> int:
+        first, count = self.sections[section]
+        if not 0 <= position < count:
+            raise IndexError(f"No record {position} in section {section} of {count}")
+        return first + position
+
+    def string(self, string_id: int) -> Optional[str]:
+        if string_id == NO_STRING:
+            return None
+        return str(self.pool[self.string_offsets[string_id]:self.string_offsets[string_id + 1]], 'utf-8')
+
+    def table(self, section: str, position: int) -> Table:
+        record = self._record(section, position)
+        cells, row_cells = self.cells, self.row_cells
+        return [
+            [self.string(cells[cell]) for cell in range(row_cells[row], row_cells[row + 1])]
+            for row in range(self.record_rows[record], self.record_rows[record + 1])
+        ]
+
+    def tables(self, section: str, positions: Optional[Sequence[int]] = None) -> Iterator[Table]:
+        """The tables of `section`, or those at `positions`, in order"""
+        if positions is None:
+            positions = range(self.section_size(section))
+        return (self.table(section, i) for i in positions)
+
+    def value(self, section: str, position: int, label: str) -> Optional[str]:
+        """The second cell of the first row of the record that starts with `label`, found by comparing the label's
+        bytes with the pool in place, so that only the value is decoded"""
+        record = self._record(section, position)
+        encoded = label.encode('utf-8')
+        cells, row_cells, offsets = self.cells, self.row_cells, self.string_offsets
+        for row in range(self.record_rows[record], self.record_rows[record + 1]):
+            first = row_cells[row]
+            if row_cells[row + 1] - first < 2:
+                continue
+            label_id = cells[first]
+            if label_id != NO_STRING and self.pool[offsets[label_id]:offsets[label_id + 1]] == encoded:
+                return self.string(cells[first + 1])
+        return None
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
+
+    @staticmethod
+    def publish(sections: Dict[str, Sequence[Table]], name: Optional[str] = None) -> 'SharedDataset':
+        """Writes the tables of each section into a new shared memory segment"""
+        string_ids: Dict[str, int] = {}
+        pool = bytearray()
+        string_offsets, record_rows, row_cells, cells = array("I", [0]), array("I"), array("I"), array("I")
+        directory = {}
+        for section, tables in sections.items():
+            directory[section] = (len(record_rows), len(tables))
+            for table in tables:
+                record_rows.append(len(row_cells))
+                for row in table:
+                    row_cells.append(len(cells))
+                    for text in row:
+                        string_id = NO_STRING if text is None else string_ids.get(text)
+                        if string_id is None:
+                            string_id = string_ids[text] = len(string_ids)
+                            pool += text.encode('utf-8')
+                            string_offsets.append(len(pool))
+                        cells.append(string_id)
+        record_rows.append(len(row_cells))
+        row_cells.append(len(cells))
+        directory_bytes = json.dumps(directory, ensure_ascii=False).encode('utf-8')
+        header = _HEADER.pack(len(string_ids), len(row_cells) - 1, len(cells), len(directory_bytes)) + directory_bytes
+        parts = [string_offsets, record_rows, row_cells, cells]
+        start = _aligned(len(header))
+        size = start + sum(len(part) * _OFFSET_SIZE for part in parts) + len(pool)
+        segment = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        try:
+            segment.buf[:len(header)] = header
+            position = start
+            for part in parts + [pool]:
+                data = part.tobytes() if isinstance(part, array) else part
+                segment.buf[position:position + len(data)] = data
+                position += len(data)
+        except BaseException:
+            segment.close()
+            segment.unlink()
+            raise
+        return SharedDataset(segment, owner=True)
+
+    @staticmethod
+    def attach(name: str) -> 'SharedDataset':
+        return SharedDataset(shared_memory.SharedMemory(name=name), owner=False)
+
+
+def attach_worker(name: str):
+    """Pool initializer that attaches the worker to the published dataset"""
+    global _DATASET
+    _DATASET = SharedDataset.attach(name)
+
+
+def worker_dataset() -> SharedDataset:
+    if _DATASET is None:
+        raise ValueError("Worker is not attached to a shared dataset")
+    return _DATASET
+
+
+if __name__ == '__main__':
+    import time
+    from grammar.conjugation import Conjugation
+    from grammar.conjugation_data import read_conjugations
+    from scraper.verb_info_shelf import read_verb_infos
+
+    conjugations = read_conjugations(force=False)
+    verb_infos = read_verb_infos(force=False)
+    start = time.perf_counter()
+    sections = {"conjugations": [c.to_table() for c in conjugations], "verb_infos": [v.to_table() for v in verb_infos]}
+    with SharedDataset.publish(sections) as dataset:
+        print(f"Published {len(dataset)} records, {dataset.segment.size / 1e6:.1f} MB, "
+              f"in {time.perf_counter() - start:.2f}s")
+        attached = SharedDataset.attach(dataset.name)
+        start = time.perf_counter()
+        loaded = [Conjugation.from_table(t) for t in attached.tables("conjugations")]
+        print(f"Decoded {len(loaded)} conjugations in {time.perf_counter() - start:.2f}s")
+        assert loaded == conjugations
+        start = time.perf_counter()
+        infinitives = [attached.value("verb_infos", i, "Infinitive") for i in range(len(verb_infos))]
+        print(f"Read {len(infinitives)} infinitives in place in {time.perf_counter() - start:.2f}s")
+        assert infinitives == [v.infinitive for v in verb_infos]
+        attached.close()
@@ -4,7 +4,7 @@ from typing import List, Optional
 
 from bs4 import BeautifulSoup, Tag, NavigableString
 
-from grammar.conjugation import Conjugation, Aspect, ZaliznyakClass, VerbType, \
+from grammar.conjugation import Conjugation, Aspect, intern_zaliznyak_class, VerbType, \
     Participle, ParticipleType, Tense, LongOrShort, PresentOrFutureConjugation, Imperative, \
     PastConjugation, Participles
 from utils.types import checked_type
@@ -52,7 +52,7 @@ class ConjugationParser:
             raise ValueError(f"Aspect not found in class text: {class_text}")
 
         return VerbType(
-            ZaliznyakClass(
+            intern_zaliznyak_class(
                 zaliznyak_class
             ),
             aspect=aspect,
@@ -0,0 +1,19 @@
+import shelve
+from pathlib import Path
+
+from wikipedia.wikipedia_verb_info import WikipediaVerbInfo
+
+SHELF_PATH = Path(__file__).parent / "_verb_info.shelf"
+PAGES_PATH = Path(__file__).parent / "wikipedia_pages"
+
+_KEY = "Verb Definitions"
+
+
+def read_verb_infos(force: bool) -> list[WikipediaVerbInfo]:
+    """The verbs parsed from the locally downloaded Wiktionary pages. The HTML parser is only imported when the
+    shelf has to be built, so reading the shelf doesn't pay for loading BeautifulSoup"""
+    with shelve.open(str(SHELF_PATH)) as shelf:
+        if _KEY not in shelf or force:
+            from scraper.wikipedia_verb_info_parser import WikipediaVerbInfoParser
+            shelf[_KEY] = WikipediaVerbInfoParser.from_pages(PAGES_PATH)
+        return shelf[_KEY]
@@ -1,15 +1,15 @@
-import shelve
+from itertools import chain
 from pathlib import Path
 from typing import Optional
 
 from bs4 import BeautifulSoup, Tag, PageElement, NavigableString
-from more_itertools.recipes import flatten
 
 from grammar.conjugation import Conjugation
 from wikipedia.verb.verb_identifier import VerbIdentifier
 from wikipedia.verb.verb_definition import QuoteAndTranslation, VerbDefinition
 from wikipedia.wikipedia_verb_info import WikipediaVerbInfo
 from scraper.conjugation_parser import ConjugationParser
+from scraper.verb_info_shelf import read_verb_infos
 from utils.types import checked_type, checked_list_type
 
 
@@ -134,7 +134,9 @@ class VerbDefinitionParser:
             texts = [t.text for t in definition_elements]
             text = "".join(texts)
             quote_tags = [t for t in quote_elements if isinstance(t, Tag)]
-            quotes_and_translations = flatten([QuoteAndTranslationParser.from_element(tag) for tag in quote_tags])
+            quotes_and_translations = chain.from_iterable(
+                [QuoteAndTranslationParser.from_element(tag) for tag in quote_tags]
+            )
             return VerbDefinition(text, list(quotes_and_translations))
 
 
@@ -148,7 +150,7 @@ class VerbIdentifierParser:
 
     @staticmethod
     def infinitive(section: list[PageElement]) -> str:
-        potential_matches = flatten(s.find_all(class_="Cyrl") for s in section if isinstance(s, Tag))
+        potential_matches = chain.from_iterable(s.find_all(class_="Cyrl") for s in section if isinstance(s, Tag))
 
         exact_matches = [c for c in potential_matches
                          if ParserUtils.is_tag_of_class(c, ["Cyrl", "headword"])
@@ -160,7 +162,7 @@ class VerbIdentifierParser:
 
     @staticmethod
     def aspect(section: list[PageElement]) -> str:
-        matches = list(flatten(s.find_all(class_="gender") for s in section if isinstance(s, Tag)))
+        matches = list(chain.from_iterable(s.find_all(class_="gender") for s in section if isinstance(s, Tag)))
         if len(matches) > 0:
             return matches[0].text
         raise ValueError("No aspect found")
@@ -332,21 +334,18 @@ class WikipediaVerbInfoParser:
         return WikipediaVerbInfoParser(path.stem, html).parse()
 
 
-    SHELF_PATH = Path(__file__).parent / "_verb_info.shelf"
+    @staticmethod
+    def from_pages(path: Path) -> list[WikipediaVerbInfo]:
+        html_files = list(path.glob('*.html'))
+        verbs_and_definitions = []
+        for i, f in enumerate(html_files):
+            print(f"Processing {i}, {f.stem}")
+            verbs_and_definitions += WikipediaVerbInfoParser.from_file(f)
+        return verbs_and_definitions
 
     @staticmethod
     def from_locally_downloaded_pages(force: bool) -> list[WikipediaVerbInfo]:
-        path = Path(__file__).parent / "wikipedia_pages"
-        key = "Verb Definitions"
-        with shelve.open(str(WikipediaVerbInfoParser.SHELF_PATH)) as shelf:
-            if key not in shelf or force:
-                html_files = list(path.glob('*.html'))
-                verbs_and_definitions = []
-                for i, f in enumerate(html_files):
-                    print(f"Processing {i}, {f.stem}")
-                    verbs_and_definitions += WikipediaVerbInfoParser.from_file(f)
-                shelf[key] = verbs_and_definitions
-            return shelf[key]
+        return read_verb_infos(force)
 
 if __name__ == '__main__':
     path = Path(__file__).parent / "wikipedia_pages" / "жать.html"
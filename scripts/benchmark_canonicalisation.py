@@ -0,0 +1,73 @@
+"""
+Times the text canonicalisation functions over every infinitive and conjugated form, and compares re-stripping
+infinitives on each pass with reading the keys precomputed on each Conjugation.
+
+Usage:
+  python -m scripts.benchmark_canonicalisation [--repeats 3] [--passes 5]
+"""
+import argparse
+import time
+from typing import Callable, List
+
+from grammar.conjugation_data import read_conjugations
+from grammar.form_index import conjugation_forms
+from utils.utils import sanitize_text, strip_stress_marks, stress_free_key, stress_free_keys, canonical_texts
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark text canonicalisation against the per-call functions.")
+    p.add_argument("--repeats", type=int, default=3, help="Timed runs per function, the best is reported (default: 3).")
+    p.add_argument("--passes", type=int, default=5,
+                   help="Passes over the infinitives, as made by separate callers in one run (default: 5).")
+    return p.parse_args()
+
+
+def best_time(f: Callable[[], object], repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    args = parse_args()
+    conjugations = read_conjugations(force=False)
+    infinitives = [c.infinitive for c in conjugations]
+    forms: List[str] = [form for c in conjugations for form, _ in conjugation_forms(c)]
+    print(f"{len(infinitives)} infinitives, {len(forms)} forms")
+
+    for name, texts in [("forms", forms), ("infinitives", infinitives)]:
+        print(f"\n{name}:")
+        timings = {
+            "sanitize_text": lambda: [sanitize_text(t) for t in texts],
+            "strip_stress_marks": lambda: [strip_stress_marks(t) for t in texts],
+            "stress_free_key": lambda: [stress_free_key(t) for t in texts],
+            "stress_free_keys": lambda: stress_free_keys(texts),
+            "canonical_texts": lambda: canonical_texts(texts),
+        }
+        for label, f in timings.items():
+            print(f"{label:>20}: {best_time(f, args.repeats) * 1e3:8.1f} ms")
+
+    # Each pass stands for a caller that needs every verb's stress free infinitive
+    def strip_each_pass():
+        for _ in range(args.passes):
+            [strip_stress_marks(c.infinitive) for c in conjugations]
+
+    def precomputed():
+        for _ in range(args.passes):
+            [c.infinitive_key for c in conjugations]
+
+    # The first run computes and caches each key, later runs only read them
+    first_elapsed = best_time(precomputed, 1)
+    strip_elapsed = best_time(strip_each_pass, args.repeats)
+    precomputed_elapsed = best_time(precomputed, args.repeats)
+    print(f"\n{args.passes} passes over the infinitives:")
+    print(f"{'strip_stress_marks':>20}: {strip_elapsed * 1e3:8.1f} ms")
+    print(f"{'infinitive_key':>20}: {precomputed_elapsed * 1e3:8.1f} ms, {first_elapsed * 1e3:.1f} ms on first use")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Times the grouping utilities in utils.utils against the previous group_into_dict, which copied each group's list
+on every append, over the conjugation corpus and over synthetic inputs of growing size.
+
+Usage:
+  python -m scripts.benchmark_grouping [--repeats 3] [--sizes 10000,100000,1000000]
+"""
+import argparse
+import random
+import time
+from typing import Callable, Iterable, Dict, List
+
+from grammar.conjugation_data import read_conjugations
+from utils.utils import group_into_dict, group_by_keys, group_sorted, count_by, first_by, last_by
+
+
+def copying_group_into_dict(iterable: Iterable, key_constructor: Callable) -> Dict[object, List]:
+    """group_into_dict as it was, quadratic in the size of each group"""
+    result = {}
+    for item in iterable:
+        key = key_constructor(item)
+        result[key] = result.get(key, []) + [item]
+    return result
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark grouping and aggregation utilities.")
+    p.add_argument("--repeats", type=int, default=3, help="Timed runs per function, the best is reported (default: 3).")
+    p.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=[10_000, 100_000, 1_000_000],
+                   help="Comma separated sizes of synthetic input (default: 10000,100000,1000000).")
+    p.add_argument("--copying-limit", type=int, default=100_000,
+                   help="Largest synthetic input to time the copying group_into_dict on (default: 100000).")
+    return p.parse_args()
+
+
+def best_time(f: Callable[[], object], repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(label: str, f: Callable[[], object], repeats: int):
+    print(f"{label:>28}: {best_time(f, repeats) * 1e3:9.1f} ms")
+
+
+def main():
+    args = parse_args()
+    conjugations = read_conjugations(force=False)
+    short_class = lambda c: c.short_class
+    short_stress = lambda c: c.short_stress
+    print(f"{len(conjugations)} conjugations, {len(count_by(conjugations, short_class))} short classes")
+    report("copying group_into_dict", lambda: copying_group_into_dict(conjugations, short_class), args.repeats)
+    report("group_into_dict", lambda: group_into_dict(conjugations, short_class), args.repeats)
+    report("group_by_keys", lambda: group_by_keys(conjugations, short_class, short_stress), args.repeats)
+    by_class = sorted(conjugations, key=short_class)
+    report("group_sorted", lambda: list(group_sorted(by_class, short_class)), args.repeats)
+    report("count_by", lambda: count_by(conjugations, short_class), args.repeats)
+    report("first_by", lambda: first_by(conjugations, short_class), args.repeats)
+    report("last_by", lambda: last_by(conjugations, short_class), args.repeats)
+
+    # Few keys, so groups grow with the input, as when grouping a corpus by class
+    random.seed(0)
+    identity = lambda k: k
+    for size in args.sizes:
+        items = [random.randrange(50) for _ in range(size)]
+        print(f"\n{size} items in 50 groups:")
+        if size <= args.copying_limit:
+            report("copying group_into_dict", lambda: copying_group_into_dict(items, identity), args.repeats)
+        report("group_into_dict", lambda: group_into_dict(items, identity), args.repeats)
+        report("count_by", lambda: count_by(items, identity), args.repeats)
+        ordered = sorted(items)
+        report("group_sorted", lambda: sum(len(g) for _, g in group_sorted(ordered, identity)), args.repeats)
+
+
+if __name__ == "__main__":
+    main()
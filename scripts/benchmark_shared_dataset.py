@@ -0,0 +1,137 @@
+"""
+Compares process pools whose workers each load the conjugations and verb infos from the shelves with pools whose
+workers attach to one copy published in shared memory, at several pool sizes.
+
+Each pool runs the same job, a pass over every conjugation and verb info split into chunks, and reports the time
+until every worker is ready, the time for the job, and the memory private to each worker, summed over the pool.
+Memory is read from /proc, so is only reported on Linux. The shared workers are run two ways:
+
+  shared    decode each record of a chunk into a Conjugation or WikipediaVerbInfo, and keep it until the pool
+            ends, as the shelf workers keep everything they load
+  in place  read only the infinitive of each record from the shared pages, decoding nothing else
+
+Usage:
+  python -m scripts.benchmark_shared_dataset [--workers 1,4,16] [--chunk-size 500]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+from grammar.conjugation import Conjugation
+from grammar.conjugation_data import read_conjugations
+from grammar.shared_dataset import SharedDataset, attach_worker, worker_dataset
+from scraper.verb_info_shelf import read_verb_infos
+from wikipedia.wikipedia_verb_info import WikipediaVerbInfo
+
+DECODERS = {"conjugations": Conjugation.from_table, "verb_infos": WikipediaVerbInfo.from_table}
+
+# Set in each worker of a shelf loading pool by `_load_shelves`
+_SHELF_DATA: Dict[str, list] = {}
+# The records each shared worker has decoded, kept so that its memory is comparable with a shelf worker's
+_DECODED: List[object] = []
+
+
+def private_memory_kb() -> Optional[int]:
+    """Memory private to this process, clean and dirty, in kB. None where /proc isn't available"""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            return sum(int(line.split()[1]) for line in f if line.startswith(("Private_Clean", "Private_Dirty")))
+    except OSError:
+        return None
+
+
+def _load_shelves():
+    _SHELF_DATA["conjugations"] = read_conjugations(force=False)
+    _SHELF_DATA["verb_infos"] = read_verb_infos(force=False)
+
+
+def _ready(_) -> int:
+    # Long enough that each worker takes one of these tasks
+    time.sleep(0.1)
+    return os.getpid()
+
+
+def _touch(items) -> int:
+    """Stands in for real work: a count that reads each item"""
+    return sum(len(getattr(item, "infinitive", "")) for item in items)
+
+
+def _shelf_chunk(section: str, start: int, stop: int) -> Tuple[int, int, Optional[int]]:
+    return os.getpid(), _touch(_SHELF_DATA[section][start:stop]), private_memory_kb()
+
+
+def _shared_chunk(section: str, start: int, stop: int) -> Tuple[int, int, Optional[int]]:
+    decode = DECODERS[section]
+    items = [decode(table) for table in worker_dataset().tables(section, range(start, stop))]
+    _DECODED.extend(items)
+    return os.getpid(), _touch(items), private_memory_kb()
+
+
+def _in_place_chunk(section: str, start: int, stop: int) -> Tuple[int, int, Optional[int]]:
+    dataset = worker_dataset()
+    count = sum(len(dataset.value(section, i, "Infinitive")) for i in range(start, stop))
+    return os.getpid(), count, private_memory_kb()
+
+
+def run_pool(workers: int, sizes: Dict[str, int], chunk_size: int, source: str, dataset: SharedDataset):
+    """Returns the seconds until every worker is ready, the seconds for the job, the job's result and the summed
+    private memory of the workers in MB"""
+    if source == "shelves":
+        initializer, initargs, chunk_function = _load_shelves, (), _shelf_chunk
+    else:
+        chunk_function = _shared_chunk if source == "shared" else _in_place_chunk
+        initializer, initargs = attach_worker, (dataset.name,)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as executor:
+        list(executor.map(_ready, range(workers)))
+        ready = time.perf_counter() - start
+        start = time.perf_counter()
+        futures = [
+            executor.submit(chunk_function, section, i, min(i + chunk_size, size))
+            for section, size in sizes.items()
+            for i in range(0, size, chunk_size)
+        ]
+        results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - start
+    # Memory grows as a worker runs, so the last report from each worker is kept
+    memory: Dict[int, Optional[int]] = {}
+    for pid, _, kb in results:
+        memory[pid] = kb
+    total_kb = None if None in memory.values() else sum(memory.values())
+    return ready, elapsed, sum(count for _, count, _ in results), None if total_kb is None else total_kb / 1e3
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark shelf loading workers against a shared memory dataset.")
+    p.add_argument("--workers", type=lambda s: [int(n) for n in s.split(",")], default=[1, 4, 16],
+                   help="Comma separated pool sizes (default: 1,4,16).")
+    p.add_argument("--chunk-size", type=int, default=500, help="Items per task (default: 500).")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    data = {"conjugations": read_conjugations(force=False), "verb_infos": read_verb_infos(force=False)}
+    sizes = {section: len(items) for section, items in data.items()}
+    print(", ".join(f"{size} {section}" for section, size in sizes.items()))
+    start = time.perf_counter()
+    tables = {section: [item.to_table() for item in items] for section, items in data.items()}
+    del data
+    with SharedDataset.publish(tables) as dataset:
+        print(f"Published {dataset.segment.size / 1e6:.1f} MB in {time.perf_counter() - start:.2f}s\n")
+        del tables
+        print(f"{'workers':>7} {'source':>8} {'ready':>9} {'job':>9} {'private MB':>11}")
+        results: List[int] = []
+        for workers in args.workers:
+            for source in ["shelves", "shared", "in place"]:
+                ready, elapsed, result, memory_mb = run_pool(workers, sizes, args.chunk_size, source, dataset)
+                results.append(result)
+                memory_text = f"{memory_mb:11.1f}" if memory_mb is not None else f"{'-':>11}"
+                print(f"{workers:>7} {source:>8} {ready:8.2f}s {elapsed:8.2f}s {memory_text}")
+        assert len(set(results)) == 1, "Pools disagree on the job's result"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Measures the cold start import time of each entry point with `python -X importtime`, and checks it against a
+baseline.
+
+Exits non-zero if loading an entry point imports one of the heavy optional dependencies, which should only be
+imported on the paths that need them, or if an entry point takes longer to import than its baseline allows.
+
+Usage:
+  python -m scripts.benchmark_startup
+  python -m scripts.benchmark_startup --write-baseline
+  python -m scripts.benchmark_startup --tolerance 1.5 --slack-ms 20 --top 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Dict, NamedTuple
+
+ROOT = Path(__file__).parent.parent
+BASELINE_PATH = Path(__file__).parent / "startup_baseline.json"
+
+ENTRY_POINTS = [
+    "anki.anki",
+    "anki.build",
+    "analysis.class_predictor",
+    "analysis.class_statistics",
+    "analysis.corpus_analyser",
+    "analysis.study_order",
+    "grammar.form_index",
+    "grammar.lexicon",
+    "scripts.write_verb_anki_deck",
+    "wikipedia.snapshot_diff",
+    "wikipedia.verb_graph",
+]
+
+# Optional dependencies that loading an entry point must not import
+HEAVY_MODULES = ["bs4", "lxml", "more_itertools", "numpy", "requests", "scipy", "tabulate"]
+
+
+class ImportTimes(NamedTuple):
+    # Cumulative import time of each top level import, in microseconds, in import order
+    top_level: Dict[str, int]
+    # Time spent importing each module, at any depth, not counting the modules it imports
+    self_us: Dict[str, int]
+
+    @property
+    def total_us(self) -> int:
+        return sum(self.top_level.values())
+
+    def by_package(self) -> Dict[str, int]:
+        """Time spent importing the modules of each top level package"""
+        totals: Dict[str, int] = {}
+        for name, us in self.self_us.items():
+            package = name.split(".")[0]
+            totals[package] = totals.get(package, 0) + us
+        return totals
+
+
+def import_times(statement: str) -> ImportTimes:
+    """Runs `statement` in a fresh interpreter and parses its `-X importtime` report, whose lines look like
+    'import time:      1201 |       3408 |   grammar.conjugation', indented by depth"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"'{statement}' failed:\n{result.stderr}")
+    top_level: Dict[str, int] = {}
+    self_us: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        self_us[name.strip()] = int(own)
+        # Top level imports are indented by one space
+        if not name.startswith("  "):
+            top_level[name.strip()] = int(cumulative)
+    return ImportTimes(top_level, self_us)
+
+
+def best_import_times(statement: str, repeats: int) -> ImportTimes:
+    return min((import_times(statement) for _ in range(repeats)), key=lambda t: t.total_us)
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark and check the import time of each entry point.")
+    p.add_argument("--repeats", type=int, default=5,
+                   help="Runs per entry point, the fastest is reported (default: 5).")
+    p.add_argument("--baseline", type=Path, default=BASELINE_PATH,
+                   help=f"JSON file of baseline import times in ms (default: {BASELINE_PATH.name}).")
+    p.add_argument("--write-baseline", action="store_true",
+                   help="Write the measured times as the new baseline rather than checking against it.")
+    p.add_argument("--tolerance", type=float, default=1.5,
+                   help="Allowed ratio of import time to baseline (default: 1.5).")
+    p.add_argument("--slack-ms", type=float, default=20.0,
+                   help="Allowed excess over the baseline ratio in ms, to absorb noise on fast imports "
+                        "(default: 20).")
+    p.add_argument("--top", type=int, default=3,
+                   help="Number of slowest packages to show per entry point (default: 3).")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Imports made by interpreter startup, before the statement runs, are subtracted from each entry point
+    startup = best_import_times("pass", args.repeats)
+    startup_packages = startup.by_package()
+    baseline: Dict[str, float] = {}
+    if args.baseline.exists() and not args.write_baseline:
+        baseline = json.loads(args.baseline.read_text())
+
+    measured: Dict[str, float] = {}
+    failures: List[str] = []
+    for module in ENTRY_POINTS:
+        times = best_import_times(f"import {module}", args.repeats)
+        ms = (times.total_us - startup.total_us) / 1e3
+        measured[module] = round(ms, 1)
+        packages = times.by_package()
+        heavy = sorted(set(packages) & set(HEAVY_MODULES))
+        slowest = sorted(
+            ((name, us - startup_packages.get(name, 0)) for name, us in packages.items()),
+            key=lambda item: -item[1],
+        )[:args.top]
+        limit = baseline[module] * args.tolerance + args.slack_ms if module in baseline else None
+        status = "ok"
+        if heavy:
+            status = f"FAIL imports {', '.join(heavy)}"
+            failures.append(module)
+        elif limit is not None and ms > limit:
+            status = f"FAIL over limit of {limit:.1f} ms"
+            failures.append(module)
+        baseline_text = f"{baseline[module]:8.1f}" if module in baseline else f"{'-':>8}"
+        print(f"{module:<30} {ms:8.1f} ms  baseline {baseline_text}  {status}")
+        for name, us in slowest:
+            print(f"    {name:<40} {us / 1e3:8.1f} ms")
+
+    if args.write_baseline:
+        args.baseline.write_text(json.dumps(measured, indent=2) + "\n")
+        print(f"Wrote baseline to {args.baseline}")
+        return
+    if failures:
+        print(f"{len(failures)} entry points regressed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Times construction of the full conjugation and vocab corpus under each runtime type-checking mode.
+
+Usage:
+  python -m scripts.benchmark_type_checks [--repeats 3]
+"""
+import argparse
+import time
+
+from grammar.conjugation import Conjugation
+from grammar.conjugation_data import CONJUGATIONS_CSV_PATH
+from grammar.read_vocab import VOCAB_CSV_PATH, parse_vocab_csv
+from utils.csv_utils import read_csv_file
+from utils.types import TypeCheckMode, type_checks
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark corpus construction time per type-checking mode.")
+    p.add_argument("--repeats", type=int, default=3, help="Timed runs per mode, the best is reported (default: 3).")
+    return p.parse_args()
+
+
+def construct_corpus(tables):
+    conjugations = [Conjugation.from_table(t) for t in tables]
+    vocab = parse_vocab_csv(VOCAB_CSV_PATH)
+    return conjugations, vocab
+
+
+def main():
+    args = parse_args()
+    # Read the CSV files up front, so only object construction is timed
+    csv_files = sorted(CONJUGATIONS_CSV_PATH.rglob('*.csv'))
+    tables = [read_csv_file(f) for f in csv_files]
+
+    timings = {}
+    for mode in TypeCheckMode:
+        best = None
+        with type_checks(mode):
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                construct_corpus(tables)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        timings[mode] = best
+
+    full = timings[TypeCheckMode.FULL]
+    print(f"Constructed {len(tables)} conjugations and the 10000 word vocab")
+    for mode, elapsed in timings.items():
+        print(f"{mode:>8}: {elapsed:.3f}s ({100 * (full - elapsed) / full:5.1f}% saving)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,89 @@
+import argparse
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import Optional
-
-from more_itertools import flatten
+from typing import Optional, Iterator
 
+from anki.apkg import write_anki_package, notes_from_import_lines
+from anki.incremental import write_incremental_package
+from anki.output import OUTPUT_DIR
+from anki.streaming import write_lines
 from grammar.conjugation import Aspect, PresentOrFutureConjugation
-from scraper.wikipedia_verb_info_parser import WikipediaVerbInfoParser
+from scraper.verb_info_shelf import read_verb_infos
 from utils.utils import group_into_dict
 from wikipedia.verb.verb_definition import VerbDefinition
 from wikipedia.wikipedia_verb_info import WikipediaVerbInfo
 
 
+# Templates for the HTML card fields, built once at import
+_CLEAN_TABLE = str.maketrans({";": ",", "\n": "<br>"})
+_REMOVE_NEW_LINES_TABLE = str.maketrans({";": ",", "\n": None})
+_LIST_TEMPLATE = "<ul>{}</ul>"
+_LIST_TERM_TEMPLATE = "<li>{}</li>"
+_EXAMPLE_TEMPLATE = "<em>{}</em> - {}"
+_EXAMPLES_HEADING = """<p style="text-align:left"><strong>Examples:</strong></p>"""
+_CORRESPONDENT_TEMPLATE = "<em>{}</em>"
+_CONJUGATION_ROW_TEMPLATE = "<tr><td>{}</td><td>{}</td></tr>"
+_CONJUGATION_TABLE_TEMPLATE = (
+    """<table><colgroup> <col span="1" style="width: 30%"> <col span="1" style="width: 70%"></colgroup>"""
+    "<tbody>{}</tbody></table>"
+)
+
+# Rendered fields are cached, keyed on the value being rendered, so that rebuilding decks, or building several
+# decks from the same verbs in one process, reuses the HTML
+RENDER_CACHE_SIZE = 16384
+
+
 def remove_new_lines(text: str) -> str:
-    return text.replace(";", ",").replace('\n', "")
+    return text.translate(_REMOVE_NEW_LINES_TABLE)
 
 
 def clean(text: str) -> str:
-    return text.replace(";", ",").replace('\n', "<br>")
+    return text.translate(_CLEAN_TABLE)
 
 
 def list_term(term: str) -> str:
-    return f"<li>{clean(term)}</li>"
+    return _LIST_TERM_TEMPLATE.format(clean(term))
 
 
 def ordered_list(terms: list[str]) -> str:
-    li_elements = [list_term(t) for t in terms]
-    li_term = "".join(li_elements)
-    return f"<ul>{li_term}</ul>"
+    return _LIST_TEMPLATE.format("".join([list_term(t) for t in terms]))
 
 
-def definitions_field(definitions: list[VerbDefinition]) -> str:
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _definitions_field(definitions: tuple[VerbDefinition, ...]) -> str:
     return ordered_list([d.meaning for d in definitions])
 
 
-def examples_field(definitions: list[VerbDefinition]) -> str:
-    terms = []
-    for d in definitions:
-        for q in d.quotes:
-            quote_and_trans = f"<em>{q.quote}</em> - {q.translation}"
-            terms.append(quote_and_trans)
+def definitions_field(definitions: list[VerbDefinition]) -> str:
+    return _definitions_field(tuple(definitions))
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _examples_field(definitions: tuple[VerbDefinition, ...]) -> str:
+    terms = [
+        _EXAMPLE_TEMPLATE.format(q.quote, q.translation)
+        for d in definitions
+        for q in d.quotes
+    ]
     if len(terms) == 0:
         return ""
-    heading = """<p style="text-align:left"><strong>Examples:</strong></p>"""
-    return f"{heading}{ordered_list(terms)}"
+    return _EXAMPLES_HEADING + ordered_list(terms)
 
 
-def correspondents_field(verb_aspect: str, correspondents: list[str]) -> str:
+def examples_field(definitions: list[VerbDefinition]) -> str:
+    return _examples_field(tuple(definitions))
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _correspondents_field(verb_aspect: str, correspondents: tuple[str, ...]) -> str:
     if len(correspondents) == 0:
         return ""
-    list_text = ", ".join([f"<em>{c}</em>" for c in correspondents])
+    list_text = ", ".join([_CORRESPONDENT_TEMPLATE.format(c) for c in correspondents])
     if verb_aspect == Aspect.PERFECTIVE:
         correspondent_aspect = "impf."
     elif verb_aspect == Aspect.IMPERFECTIVE:
@@ -57,24 +93,25 @@ def correspondents_field(verb_aspect: str, correspondents: list[str]) -> str:
     return f"({correspondent_aspect} {list_text})"
 
 
+def correspondents_field(verb_aspect: str, correspondents: list[str]) -> str:
+    return _correspondents_field(verb_aspect, tuple(correspondents))
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
 def conjugation_field(tense: PresentOrFutureConjugation) -> str:
     def term(text: Optional[str]) -> str:
         if text is None:
             return "-"
         return f"<em>{text}</em>"
-    def table_row(name, text):
-        return f"<tr><td>{name}</td><td>{term(text)}</td></tr>"
     rows = [
-        table_row(n, s)
+        _CONJUGATION_ROW_TEMPLATE.format(n, term(s))
         for n, s in [
             ("1s ", tense.first_person_singular),
             ("2s ", tense.second_person_singular),
             ("3p ", tense.third_person_plural)
         ]
     ]
-    rows_text = "".join(rows)
-    colgroup = """<colgroup> <col span="1" style="width: 30%"> <col span="1" style="width: 70%"></colgroup>"""
-    return f"<table>{colgroup}<tbody>{rows_text}</tbody></table>"
+    return _CONJUGATION_TABLE_TEMPLATE.format("".join(rows))
 
 
 def verb_as_text_row(infinitive: str, aspect: str, short_class: str, short_stress: str,
@@ -85,8 +122,10 @@ def verb_as_text_row(infinitive: str, aspect: str, short_class: str, short_stres
         short_class_for_deck = f"{int(short_class):02d}"
     verb_class = short_class + short_stress
     deck = f"3000 Verbs::{short_class_for_deck}::{short_stress}"
-    merged_definitions = list(flatten(v.definitions for v in verbs))
-    merged_correspondents = list(set(flatten(v.correspondents for v in verbs)))
+    merged_definitions = list(chain.from_iterable(v.definitions for v in verbs))
+    # In the order first seen, as a set's order depends on the hash seed, which would change the note's content hash
+    # from run to run
+    merged_correspondents = list(dict.fromkeys(chain.from_iterable(v.correspondents for v in verbs)))
 
     terms = [
         "3000 Verbs",
@@ -102,29 +141,115 @@ def verb_as_text_row(infinitive: str, aspect: str, short_class: str, short_stres
     return ";".join(terms)
 
 
-def write_anki_import_file(file_path: Path, verbs: list[WikipediaVerbInfo]):
-    with open(str(file_path), 'wt', newline='') as f:
-        f.write("#separator:;\n")
-        f.write("#notetype column:1\n")
-        f.write("#deck column:2\n")
+def verb_text_rows(verbs: list[WikipediaVerbInfo]) -> Iterator[str]:
+    grouped_verbs = group_into_dict(verbs, lambda verb: (
+        verb.infinitive, verb.aspect, verb.conjugation.short_class, verb.conjugation.short_stress,
+        verb.conjugation.present_or_future))
+    for (infinitive, aspect, short_class, short_stress, present_or_future), vs in grouped_verbs.items():
+        yield verb_as_text_row(infinitive, aspect, short_class, short_stress, present_or_future, vs)
+
 
-        grouped_verbs = group_into_dict(verbs, lambda verb: (
-            verb.infinitive, verb.aspect, verb.conjugation.short_class, verb.conjugation.short_stress,
-            verb.conjugation.present_or_future))
-        for (infinitive, aspect, short_class, short_stress, present_or_future), vs in grouped_verbs.items():
-            f.write(verb_as_text_row(infinitive, aspect, short_class, short_stress, present_or_future, vs) + "\n")
+def write_anki_import_file(file_path: Path, verbs: list[WikipediaVerbInfo], incremental: bool = False):
+    rows = verb_text_rows(verbs)
+    if incremental:
+        package_path = file_path.with_suffix(".apkg")
+        changes = write_incremental_package(package_path, notes_from_import_lines(rows, include_tag_column=False))
+        print(f"{package_path.name}: {changes}")
+        return
+    if file_path.suffix == ".apkg":
+        write_anki_package(file_path, notes_from_import_lines(rows, include_tag_column=False))
+        return
+    write_lines(file_path, ["#separator:;", "#notetype column:1", "#deck column:2"], rows)
 
 
-def create_deck(z_class: Optional[any]):
-    verbs = WikipediaVerbInfoParser.from_locally_downloaded_pages(force=False)
+def create_deck(z_class: Optional[any], incremental: bool = False):
+    verbs = read_verb_infos(force=False)
     if z_class is not None:
         verbs = [v for v in verbs if v.conjugation.short_class == f"{z_class}"]
-        path = Path(f"/Users/alex/tmp/verbs_{z_class}.csv")
+        path = OUTPUT_DIR / f"verbs_{z_class}.csv"
     else:
-        path = Path(f"/Users/alex/tmp/verbs.csv")
-    write_anki_import_file(path, verbs)
-
+        path = OUTPUT_DIR / "verbs.csv"
+    write_anki_import_file(path, verbs, incremental=incremental)
+
+
+def write_sharded_decks(
+        verbs: list[WikipediaVerbInfo],
+        output_dir: Path,
+        incremental: bool = False,
+        max_workers: Optional[int] = None,
+        suffix: str = ".csv",
+) -> dict[str, dict[str, int]]:
+    """Writes a `verbs_<class><suffix>` deck for every Zaliznyak class, from a single grouping of the verbs by class
+    and stress, rather than one `create_deck(z_class)` per class. Returns the number of verbs per class and
+    stress"""
+    shards: dict[str, list[WikipediaVerbInfo]] = {}
+    summary: dict[str, dict[str, int]] = {}
+    for v in verbs:
+        short_class = v.conjugation.short_class
+        shards.setdefault(short_class, []).append(v)
+        by_stress = summary.setdefault(short_class, {})
+        by_stress[v.conjugation.short_stress] = by_stress.get(v.conjugation.short_stress, 0) + 1
+
+    def write_shard(short_class: str):
+        path = output_dir / f"verbs_{short_class}{suffix}"
+        write_anki_import_file(path, shards[short_class], incremental=incremental)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(write_shard, shards.keys()))
+    return summary
+
+
+def create_sharded_decks(
+        output_dir: Path = OUTPUT_DIR,
+        incremental: bool = False,
+        max_workers: Optional[int] = None,
+) -> dict[str, dict[str, int]]:
+    return write_sharded_decks(read_verb_infos(force=False), output_dir, incremental, max_workers)
+
+
+def print_shard_summary(summary: dict[str, dict[str, int]], suffix: str = ".csv"):
+    for short_class, by_stress in summary.items():
+        stresses = ", ".join(f"{stress}: {n}" for stress, n in by_stress.items())
+        shard = f"verbs_{short_class}{suffix}"
+        print(f"{shard:<20}{sum(by_stress.values()):5d}  ({stresses})")
+
+
+def print_note_hashes():
+    """Prints the guid and content hash of each verb note, a line per note"""
+    notes = notes_from_import_lines(verb_text_rows(read_verb_infos(force=False)), include_tag_column=False)
+    for note in notes:
+        print(note.guid, note.content_hash)
+
+
+def check_hash_seeds(seeds: tuple[str, ...] = ("0", "1")) -> list[str]:
+    """Renders the verb notes in a process per hash seed, and returns the guids of those whose content hash
+    differs between seeds. Any such note would be reported as changed by every incremental build"""
+    hashes = []
+    for seed in seeds:
+        output = subprocess.run(
+            [sys.executable, "-m", "scripts.write_verb_anki_deck", "--print-note-hashes"],
+            env={**os.environ, "PYTHONHASHSEED": seed}, capture_output=True, text=True, check=True
+        ).stdout
+        hashes.append(dict(line.split() for line in output.splitlines()))
+    return sorted(guid for guid, content_hash in hashes[0].items() if any(h.get(guid) != content_hash for h in hashes))
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Write the verb deck.")
+    p.add_argument("--print-note-hashes", action="store_true", help="Print the content hash of each note instead.")
+    p.add_argument("--check-hash-seeds", action="store_true",
+                   help="Check that each note hashes the same under two hash seeds, and exit non-zero if not.")
+    return p.parse_args()
 
 
 if __name__ == '__main__':
-    create_deck(z_class=None)
+    args = parse_args()
+    if args.print_note_hashes:
+        print_note_hashes()
+    elif args.check_hash_seeds:
+        unstable = check_hash_seeds()
+        print(f"{len(unstable)} notes hash differently under different hash seeds")
+        if unstable:
+            sys.exit(1)
+    else:
+        create_deck(z_class=None)
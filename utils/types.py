@@ -1,4 +1,12 @@
+import os
+from contextlib import contextmanager
+from enum import StrEnum
+
 __all__ = [
+    "TypeCheckMode",
+    "type_check_mode",
+    "set_type_check_mode",
+    "type_checks",
     "checked_subclass",
     "checked_type",
     "checked_list_type",
@@ -8,12 +16,59 @@ __all__ = [
 ]
 
 
+class TypeCheckMode(StrEnum):
+    # Every value, and every element of every list or dict, is checked
+    FULL = "full"
+    # Values are checked, but only a bounded sample of the elements of each list or dict
+    SAMPLED = "sampled"
+    # No checks at all - for bulk loads of data that has already been validated
+    OFF = "off"
+
+
+# Number of elements checked by `checked_list_type` and `checked_dict_type` in sampled mode
+SAMPLE_SIZE = 8
+
+_mode = TypeCheckMode(os.environ.get("RUSSIAN_GRAMMAR_TYPE_CHECKS", TypeCheckMode.FULL))
+
+
+def type_check_mode() -> TypeCheckMode:
+    return _mode
+
+
+def set_type_check_mode(mode: TypeCheckMode) -> TypeCheckMode:
+    """Sets the process-wide checking mode, returning the previous one"""
+    global _mode
+    previous = _mode
+    _mode = TypeCheckMode(mode)
+    return previous
+
+
+@contextmanager
+def type_checks(mode: TypeCheckMode):
+    previous = set_type_check_mode(mode)
+    try:
+        yield
+    finally:
+        set_type_check_mode(previous)
+
+
+def _sample(items: list) -> list:
+    if _mode == TypeCheckMode.FULL or len(items) <= SAMPLE_SIZE:
+        return items
+    step = len(items) // SAMPLE_SIZE
+    return items[::step][:SAMPLE_SIZE - 1] + items[-1:]
+
+
 def checked_subclass(obj_type, parent_type):
+    if _mode == TypeCheckMode.OFF:
+        return obj_type
     assert issubclass(obj_type, parent_type), f"{obj_type} is not a subclass of {parent_type}"
     return obj_type
 
 
 def checked_type(obj, expected_type):
+    if _mode == TypeCheckMode.OFF:
+        return obj
     if isinstance(expected_type, (type, list, tuple)):
         assert isinstance(obj, expected_type), f"{obj} is of type {type(obj)}, expected {expected_type}"
         return obj
@@ -25,8 +80,10 @@ def checked_type(obj, expected_type):
 
 
 def checked_list_type(obj, expected_type):
+    if _mode == TypeCheckMode.OFF:
+        return obj
     assert isinstance(obj, list), f"{obj} is of type {type(obj)}, expected list"
-    for x in obj:
+    for x in _sample(obj):
         checked_type(x, expected_type)
     return obj
 
@@ -38,10 +95,13 @@ def checked_optional_type(obj, expected_type):
 
 
 def checked_dict_type(obj, key_type, value_type):
+    if _mode == TypeCheckMode.OFF:
+        return obj
     assert isinstance(obj, dict), f"{obj} is of type {type(obj)}, expected list"
-    for k, v in obj.items():
+    keys = obj.keys() if _mode == TypeCheckMode.FULL else _sample(list(obj.keys()))
+    for k in keys:
         checked_type(k, key_type)
-        checked_type(v, value_type)
+        checked_type(obj[k], value_type)
     return obj
 
 
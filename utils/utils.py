@@ -1,5 +1,6 @@
+import re
 import unicodedata
-from typing import Iterable, Callable, Dict, List, TypeVar
+from typing import Iterable, Callable, Dict, List, TypeVar, Iterator, Tuple
 
 T = TypeVar("T")
 R = TypeVar("R")
@@ -26,6 +27,76 @@ def strip_stress_marks(text: str) -> str:
     b = b.replace(b'\xcc\x81',b'').decode()
     return b
 
+
+# Accented Latin vowels that scraped text sometimes has in place of stressed Cyrillic ones. They become the
+# Cyrillic vowel followed by a combining acute, so the stress is kept
+_ACCENTED_LATIN = str.maketrans({
+    'á': 'а\u0301', 'é': 'е\u0301', 'ó': 'о\u0301', 'ý': 'у\u0301',
+    'Á': 'А\u0301', 'É': 'Е\u0301', 'Ó': 'О\u0301', 'Ý': 'У\u0301',
+})
+
+# Latin letters that look like Cyrillic ones
+_LATIN_LOOKALIKES = str.maketrans(
+    "aceopxyABCEHKMOPTXY",
+    "асеорхуАВСЕНКМОРТХУ",
+)
+
+# Grave stress marks, and the precomposed Cyrillic letters with a grave that NFC produces
+_GRAVE_STRESS = str.maketrans({'\u0300': None, 'ѐ': 'е', 'ѝ': 'и', 'Ѐ': 'Е', 'Ѝ': 'И'})
+
+# Annotation markers, and ё, which the frequency lists write as е
+_LOOKUP = str.maketrans({'△': None, '*': None, 'ё': 'е', 'Ё': 'Е'})
+
+# Combining marks other than the acute stress mark, e.g. a decomposed ё or й. Text without them is already NFC,
+# as an acute never composes with a Cyrillic vowel, so most text skips the comparatively slow normalisation
+_COMPOSABLE = re.compile("[\u0300\u0302-\u036f]")
+_LATIN_LETTER = re.compile("[A-Za-zÀ-ÿ]")
+_MIXED_WORD = re.compile(r"[\w\u0300\u0301]*[а-яёА-ЯЁ][\w\u0300\u0301]*")
+_GRAVE = re.compile("[\u0300ѐѝЀЍ]")
+
+
+def _fix_mixed_word(match: re.Match) -> str:
+    return match.group().translate(_ACCENTED_LATIN).translate(_LATIN_LOOKALIKES)
+
+
+def canonical_text(text: str) -> str:
+    """NFC normalised, with Latin look-alike letters in Cyrillic words replaced by their Cyrillic equivalents.
+    Stress marks are kept"""
+    if _COMPOSABLE.search(text):
+        text = unicodedata.normalize('NFC', text)
+    if _LATIN_LETTER.search(text):
+        text = _MIXED_WORD.sub(_fix_mixed_word, text)
+    return text
+
+
+def stress_free_key(text: str) -> str:
+    """The canonical text without stress marks. Unlike `sanitize_text`, ё and й are kept"""
+    key = canonical_text(text).replace('\u0301', '')
+    if _GRAVE.search(key):
+        key = key.translate(_GRAVE_STRESS)
+    return key
+
+
+def lookup_key(text: str) -> str:
+    """The key text is matched on, against frequency lists and user input: `stress_free_key` without the '△' and
+    '*' annotation markers of some scraped infinitives, e.g. дости́чь△, and with ё written as е"""
+    return stress_free_key(text).translate(_LOOKUP)
+
+
+def canonical_texts(texts: Iterable[str]) -> List[str]:
+    """`canonical_text` of each text. Repeated texts are only canonicalised once"""
+    texts = list(texts)
+    canonical = {t: canonical_text(t) for t in set(texts)}
+    return [canonical[t] for t in texts]
+
+
+def stress_free_keys(texts: Iterable[str]) -> List[str]:
+    """`stress_free_key` of each text. Repeated texts are only canonicalised once"""
+    texts = list(texts)
+    keys = {t: stress_free_key(t) for t in set(texts)}
+    return [keys[t] for t in texts]
+
+
 def group_into_dict(iterable: Iterable[T], key_constructor: Callable[[T], R]) -> Dict[R, List[T]]:
     """Builds a dict whose values are disjoint sub-lists of `iterable`, which share the same `property` value, the
     latter being the associated key.
@@ -35,8 +106,53 @@ def group_into_dict(iterable: Iterable[T], key_constructor: Callable[[T], R]) ->
     Equivalent to `groupBy` in the Scala collections library. Note that this is _not_ equivalent to `itertools.group_by`
     """
     result = {}
+    for item in iterable:
+        result.setdefault(key_constructor(item), []).append(item)
+    return result
+
+
+def group_by_keys(iterable: Iterable[T], *key_constructors: Callable[[T], object]) -> Dict[tuple, List[T]]:
+    """As `group_into_dict`, grouping by several keys at once. Each key is the tuple of the values of
+    `key_constructors`, so e.g. `group_by_keys(verbs, short_class, short_stress)` has keys like ('4', 'a')"""
+    result = {}
+    for item in iterable:
+        result.setdefault(tuple(k(item) for k in key_constructors), []).append(item)
+    return result
+
+
+def group_sorted(iterable: Iterable[T], key_constructor: Callable[[T], R]) -> Iterator[Tuple[R, List[T]]]:
+    """Yields each run of consecutive items with the same key, as (key, items). Only one group is held at a time,
+    so if `iterable` is sorted by key this streams the groups of `group_into_dict` in key order"""
+    group: List[T] = []
+    key = None
+    for item in iterable:
+        item_key = key_constructor(item)
+        if group and item_key != key:
+            yield key, group
+            group = []
+        key = item_key
+        group.append(item)
+    if group:
+        yield key, group
+
+
+def count_by(iterable: Iterable[T], key_constructor: Callable[[T], R]) -> Dict[R, int]:
+    """The number of items with each key, in order of first occurrence"""
+    result: Dict[R, int] = {}
     for item in iterable:
         key = key_constructor(item)
-        result[key] = result.get(key, []) + [item]
+        result[key] = result.get(key, 0) + 1
+    return result
 
+
+def first_by(iterable: Iterable[T], key_constructor: Callable[[T], R]) -> Dict[R, T]:
+    """The first item with each key"""
+    result: Dict[R, T] = {}
+    for item in iterable:
+        result.setdefault(key_constructor(item), item)
     return result
+
+
+def last_by(iterable: Iterable[T], key_constructor: Callable[[T], R]) -> Dict[R, T]:
+    """The last item with each key, with keys in order of first occurrence"""
+    return {key_constructor(item): item for item in iterable}
@@ -0,0 +1,234 @@
+"""
+Snapshots of parsed Wiktionary verbs, and the differences between two snapshots.
+
+Each verb is stored under its VerbIdentifier with a hash of its content, so that a diff only compares the fields
+of verbs whose hashes differ.
+
+Usage:
+  python -m wikipedia.snapshot_diff snapshot /tmp/before.json.gz
+  python -m wikipedia.snapshot_diff snapshot /tmp/after.json.gz --pages-dir /tmp/rescraped_pages --force
+  python -m wikipedia.snapshot_diff diff /tmp/before.json.gz /tmp/after.json.gz
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict
+
+from wikipedia.verb.verb_identifier import VerbIdentifier
+from wikipedia.wikipedia_verb_info import WikipediaVerbInfo
+
+# Fields compared between snapshots, in report order
+FIELDS = [
+    "class", "present/future", "past", "imperative", "participles",
+    "definitions", "examples", "correspondents", "derived_terms", "related_terms",
+]
+
+
+def verb_fields(verb: WikipediaVerbInfo) -> Dict[str, List[str]]:
+    conjugation = verb.conjugation
+    imperative = conjugation.imperative
+    return {
+        "class": [conjugation.verb_type.zaliznyak_class.class_name],
+        "present/future": [t or "" for t in conjugation.present_or_future.terms],
+        "past": [t or "" for t in conjugation.past.terms],
+        "imperative": [] if imperative is None else [imperative.singular or "", imperative.plural or ""],
+        "participles": [
+            f"{p.participle_type} {p.tense} {p.long_or_short}: {p.text}" for p in conjugation.participles.participles
+        ],
+        "definitions": [d.meaning for d in verb.definitions],
+        "examples": [f"{q.quote} | {q.translation}" for d in verb.definitions for q in d.quotes],
+        "correspondents": sorted(verb.correspondents),
+        "derived_terms": list(verb.derived_terms),
+        "related_terms": list(verb.related_terms),
+    }
+
+
+def _content_hash(fields: Dict[str, List[str]]) -> str:
+    return hashlib.sha1(json.dumps(fields, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _key(identifier: VerbIdentifier) -> str:
+    return f"{identifier.infinitive}|{identifier.aspect}"
+
+
+def _identifier(key: str) -> VerbIdentifier:
+    infinitive, aspect = key.rsplit("|", 1)
+    return VerbIdentifier(infinitive, aspect)
+
+
+class Snapshot:
+    def __init__(self, records: Dict[VerbIdentifier, Dict[str, List[str]]], hashes: Dict[VerbIdentifier, str]):
+        self.records: Dict[VerbIdentifier, Dict[str, List[str]]] = records
+        self.hashes: Dict[VerbIdentifier, str] = hashes
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def from_verb_infos(verbs: List[WikipediaVerbInfo]) -> 'Snapshot':
+        """Pages can hold more than one entry for the same verb, which are merged first. Entries for the same
+        infinitive and aspect with differing conjugations, e.g. alternative stress patterns, share one record"""
+        records: Dict[VerbIdentifier, Dict[str, List[str]]] = {}
+        for verb in WikipediaVerbInfo.merge(verbs):
+            identifier = VerbIdentifier(verb.infinitive, str(verb.aspect))
+            fields = verb_fields(verb)
+            existing = records.setdefault(identifier, fields)
+            if existing is not fields:
+                for field, values in fields.items():
+                    existing[field] += [v for v in values if v not in existing[field]]
+        return Snapshot(records, {identifier: _content_hash(f) for identifier, f in records.items()})
+
+    def save(self, path: Path):
+        data = {_key(i): {"hash": self.hashes[i], "fields": fields} for i, fields in self.records.items()}
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @staticmethod
+    def load(path: Path) -> 'Snapshot':
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        records = {}
+        hashes = {}
+        for key, record in data.items():
+            identifier = _identifier(key)
+            records[identifier] = record["fields"]
+            hashes[identifier] = record["hash"]
+        return Snapshot(records, hashes)
+
+
+class FieldChange:
+    def __init__(self, field: str, removed: List[str], added: List[str]):
+        self.field: str = field
+        # Values only in the old snapshot, and only in the new one. Both are empty if only the order changed
+        self.removed: List[str] = removed
+        self.added: List[str] = added
+
+    def __str__(self):
+        if not self.removed and not self.added:
+            return f"  {self.field}: reordered"
+        lines = [f"  {self.field}:"]
+        lines += [f"    - {v}" for v in self.removed]
+        lines += [f"    + {v}" for v in self.added]
+        return "\n".join(lines)
+
+    def as_json(self) -> dict:
+        return {"field": self.field, "removed": self.removed, "added": self.added}
+
+
+def field_changes(old: Dict[str, List[str]], new: Dict[str, List[str]]) -> List[FieldChange]:
+    changes = []
+    for field in FIELDS:
+        old_values, new_values = old.get(field, []), new.get(field, [])
+        if old_values != new_values:
+            new_set, old_set = set(new_values), set(old_values)
+            changes.append(FieldChange(
+                field,
+                [v for v in old_values if v not in new_set],
+                [v for v in new_values if v not in old_set],
+            ))
+    return changes
+
+
+class SnapshotDiff:
+    def __init__(
+            self,
+            added: List[VerbIdentifier],
+            removed: List[VerbIdentifier],
+            changed: Dict[VerbIdentifier, List[FieldChange]],
+            unchanged: int,
+    ):
+        self.added: List[VerbIdentifier] = added
+        self.removed: List[VerbIdentifier] = removed
+        self.changed: Dict[VerbIdentifier, List[FieldChange]] = changed
+        self.unchanged: int = unchanged
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        return (f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed, "
+                f"{self.unchanged} unchanged")
+
+    def __str__(self):
+        lines = [self.summary()]
+        lines += [f"+ {i.infinitive} ({i.aspect})" for i in self.added]
+        lines += [f"- {i.infinitive} ({i.aspect})" for i in self.removed]
+        for identifier, changes in self.changed.items():
+            lines.append(f"~ {identifier.infinitive} ({identifier.aspect})")
+            lines += [str(c) for c in changes]
+        return "\n".join(lines)
+
+    def as_json(self) -> dict:
+        return {
+            "added": [_key(i) for i in self.added],
+            "removed": [_key(i) for i in self.removed],
+            "changed": {_key(i): [c.as_json() for c in changes] for i, changes in self.changed.items()},
+            "unchanged": self.unchanged,
+        }
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> SnapshotDiff:
+    added = sorted((i for i in new.records if i not in old.records), key=_key)
+    removed = sorted((i for i in old.records if i not in new.records), key=_key)
+    changed = {}
+    unchanged = 0
+    for identifier in sorted((i for i in new.records if i in old.records), key=_key):
+        if old.hashes[identifier] == new.hashes[identifier]:
+            unchanged += 1
+        else:
+            changed[identifier] = field_changes(old.records[identifier], new.records[identifier])
+    return SnapshotDiff(added, removed, changed, unchanged)
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Snapshot parsed Wiktionary verbs, and diff two snapshots.")
+    sub = p.add_subparsers(dest="command", required=True)
+    snapshot = sub.add_parser("snapshot", help="Write a snapshot of the parsed verbs.")
+    snapshot.add_argument("output", type=Path,
+                          help="Snapshot file to write (gzipped JSON).")
+    snapshot.add_argument("--pages-dir", type=Path,
+                          help="Directory of Wiktionary pages to parse (default: the locally downloaded pages, via "
+                               "the shelf cache).")
+    snapshot.add_argument("--force", action="store_true",
+                          help="Re-parse the locally downloaded pages rather than reading the shelf.")
+    diff = sub.add_parser("diff", help="Report verbs added, removed and changed between two snapshots.")
+    diff.add_argument("old", type=Path, help="Earlier snapshot.")
+    diff.add_argument("new", type=Path, help="Later snapshot.")
+    diff.add_argument("--json", action="store_true",
+                      help="Write the diff as JSON rather than text.")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    if args.command == "snapshot":
+        if args.pages_dir is None:
+            from scraper.verb_info_shelf import read_verb_infos
+            verbs = read_verb_infos(force=args.force)
+        else:
+            from scraper.wikipedia_verb_info_parser import WikipediaVerbInfoParser
+            verbs = WikipediaVerbInfoParser.from_pages(args.pages_dir)
+        snapshot = Snapshot.from_verb_infos(verbs)
+        snapshot.save(args.output)
+        print(f"Wrote {len(snapshot)} verbs to {args.output} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return
+    result = diff_snapshots(Snapshot.load(args.old), Snapshot.load(args.new))
+    if args.json:
+        json.dump(result.as_json(), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(result)
+    print(f"Diffed in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    if not result.is_empty:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,9 +12,20 @@ class QuoteAndTranslation:
     def __repr__(self):
         return self.__str__()
 
+    def __eq__(self, other):
+        return self.quote == other.quote and self.translation == other.translation
+
+    def __hash__(self):
+        return hash((self.quote, self.translation))
+
 
 class VerbDefinition:
     def __init__(self, meaning: str, quotes: list[QuoteAndTranslation]):
         self.meaning: str = checked_type(meaning, str)
         self.quotes: list[QuoteAndTranslation] = checked_list_type(quotes, QuoteAndTranslation)
 
+    def __eq__(self, other):
+        return self.meaning == other.meaning and self.quotes == other.quotes
+
+    def __hash__(self):
+        return hash((self.meaning, tuple(self.quotes)))
@@ -1,5 +1,3 @@
-from scipy.optimize import anderson
-
 from utils.types import checked_type
 
 
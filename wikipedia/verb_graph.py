@@ -0,0 +1,217 @@
+import gzip
+import pickle
+import time
+from array import array
+from enum import StrEnum
+from pathlib import Path
+from typing import List, Dict, Iterable, Tuple, Optional, TypeVar, Callable
+
+from utils.utils import lookup_key
+from wikipedia.wikipedia_verb_info import WikipediaVerbInfo
+
+GRAPH_PATH = Path(__file__).parent / "_verb_graph.pickle.gz"
+
+# Saved with each graph, and bumped whenever `node_key` changes, as nodes are merged by key when the graph is built
+_GRAPH_FORMAT = 2
+
+T = TypeVar("T")
+
+
+class EdgeKind(StrEnum):
+    ASPECT = "aspect"
+    DERIVED = "derived"
+    RELATED = "related"
+
+
+# Edge kinds that join verbs into one derivational family. Related terms are left out, as they link across
+# unrelated roots too readily
+FAMILY_EDGE_KINDS = [EdgeKind.ASPECT, EdgeKind.DERIVED]
+
+
+def node_key(term: str) -> str:
+    """Terms are matched by `lookup_key`, so that 'нести́' and 'нести' are the same node, but 'пойти' and 'поити'
+    are not"""
+    return lookup_key(term).strip().lower()
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parents = list(range(size))
+
+    def find(self, i: int) -> int:
+        root = i
+        while self.parents[root] != root:
+            root = self.parents[root]
+        while self.parents[i] != root:
+            self.parents[i], i = root, self.parents[i]
+        return root
+
+    def union(self, i: int, j: int):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parents[max(root_i, root_j)] = min(root_i, root_j)
+
+
+class _Adjacency:
+    """Neighbours of each node in compressed sparse row form: the neighbours of node i are
+    `targets[offsets[i]:offsets[i + 1]]`"""
+
+    def __init__(self, offsets: array, targets: array):
+        self.offsets: array = offsets
+        self.targets: array = targets
+
+    def neighbours(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    @staticmethod
+    def from_edges(n_nodes: int, edges: Iterable[Tuple[int, int]]) -> '_Adjacency':
+        neighbours: List[Dict[int, None]] = [{} for _ in range(n_nodes)]
+        for a, b in edges:
+            if a != b:
+                neighbours[a][b] = None
+                neighbours[b][a] = None
+        offsets = array('I', [0])
+        targets = array('I')
+        for ns in neighbours:
+            targets.extend(sorted(ns))
+            offsets.append(len(targets))
+        return _Adjacency(offsets, targets)
+
+
+class VerbGraph:
+    """Verbs and the terms they link to, with an adjacency index for each kind of edge, and the derivational
+    family of each node. Every term is a node, but only parsed verbs have outgoing links"""
+
+    def __init__(self, nodes: List[str], adjacency: Dict[EdgeKind, _Adjacency], families: array):
+        # Display form of each node, with stress marks where any source had them
+        self.nodes: List[str] = nodes
+        self.adjacency: Dict[EdgeKind, _Adjacency] = adjacency
+        # The family of each node, as the lowest node id in its family
+        self.families: array = families
+        self.node_ids: Dict[str, int] = {node_key(n): i for i, n in enumerate(nodes)}
+        self._members: Dict[int, List[int]] = {}
+        for i, family in enumerate(families):
+            self._members.setdefault(family, []).append(i)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, term: str):
+        return node_key(term) in self.node_ids
+
+    def _id(self, term: str) -> int:
+        node_id = self.node_ids.get(node_key(term))
+        if node_id is None:
+            raise ValueError(f"No verb or term {term} in graph")
+        return node_id
+
+    def neighbours(self, term: str, kind: EdgeKind) -> List[str]:
+        return [self.nodes[i] for i in self.adjacency[kind].neighbours(self._id(term))]
+
+    def aspect_partners(self, term: str) -> List[str]:
+        return self.neighbours(term, EdgeKind.ASPECT)
+
+    def family_id(self, term: str) -> int:
+        return self.families[self._id(term)]
+
+    def family(self, term: str) -> List[str]:
+        """Every verb and term linked to `term` through aspect partners and derived terms"""
+        return [self.nodes[i] for i in self._members[self.family_id(term)]]
+
+    def families_by_size(self) -> List[List[str]]:
+        """All families, largest first"""
+        members = sorted(self._members.values(), key=lambda ms: (-len(ms), ms[0]))
+        return [[self.nodes[i] for i in ms] for ms in members]
+
+    def group_by_family(self, items: Iterable[T], infinitive: Callable[[T], str]) -> List[T]:
+        """Reorders items so that members of a family are adjacent, with families in the order of their first
+        member, and items within a family in their original order. Items not in the graph are their own family"""
+        groups: Dict[object, List[T]] = {}
+        for item in items:
+            node_id = self.node_ids.get(node_key(infinitive(item)))
+            key = ("family", self.families[node_id]) if node_id is not None else ("term", infinitive(item))
+            groups.setdefault(key, []).append(item)
+        return [item for group in groups.values() for item in group]
+
+    @staticmethod
+    def from_verb_infos(verbs: List[WikipediaVerbInfo]) -> 'VerbGraph':
+        nodes: List[str] = []
+        node_ids: Dict[str, int] = {}
+
+        def node(term: str) -> int:
+            key = node_key(term)
+            node_id = node_ids.get(key)
+            if node_id is None:
+                node_id = node_ids[key] = len(nodes)
+                nodes.append(term)
+            elif term != key and nodes[node_id] == key:
+                # Prefer a display form with stress marks
+                nodes[node_id] = term
+            return node_id
+
+        edges: Dict[EdgeKind, List[Tuple[int, int]]] = {kind: [] for kind in EdgeKind}
+        for verb in verbs:
+            source = node(verb.infinitive)
+            for kind, terms in [(EdgeKind.ASPECT, verb.correspondents),
+                                (EdgeKind.DERIVED, verb.derived_terms),
+                                (EdgeKind.RELATED, verb.related_terms)]:
+                for term in terms:
+                    edges[kind].append((source, node(term)))
+
+        adjacency = {kind: _Adjacency.from_edges(len(nodes), kind_edges) for kind, kind_edges in edges.items()}
+        union_find = _UnionFind(len(nodes))
+        for kind in FAMILY_EDGE_KINDS:
+            for a, b in edges[kind]:
+                union_find.union(a, b)
+        families = array('I', (union_find.find(i) for i in range(len(nodes))))
+        return VerbGraph(nodes, adjacency, families)
+
+    def save(self, path: Path):
+        adjacency = {str(kind): (a.offsets.tobytes(), a.targets.tobytes()) for kind, a in self.adjacency.items()}
+        with gzip.open(path, 'wb') as f:
+            pickle.dump((_GRAPH_FORMAT, self.nodes, adjacency, self.families.tobytes()), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: Path) -> Optional['VerbGraph']:
+        """The saved graph, or None if it was saved in an older format"""
+        def from_bytes(data: bytes) -> array:
+            a = array('I')
+            a.frombytes(data)
+            return a
+
+        with gzip.open(path, 'rb') as f:
+            saved = pickle.load(f)
+        if len(saved) != 4 or saved[0] != _GRAPH_FORMAT:
+            return None
+        _, nodes, adjacency, families = saved
+        return VerbGraph(
+            nodes,
+            {EdgeKind(kind): _Adjacency(from_bytes(o), from_bytes(t)) for kind, (o, t) in adjacency.items()},
+            from_bytes(families),
+        )
+
+
+def read_verb_graph(force: bool, verbs: Optional[List[WikipediaVerbInfo]] = None) -> VerbGraph:
+    graph = VerbGraph.load(GRAPH_PATH) if GRAPH_PATH.exists() and not force else None
+    if graph is not None:
+        return graph
+    if verbs is None:
+        from scraper.verb_info_shelf import read_verb_infos
+        verbs = read_verb_infos(force=force)
+    graph = VerbGraph.from_verb_infos(verbs)
+    graph.save(GRAPH_PATH)
+    return graph
+
+
+if __name__ == '__main__':
+    from scraper.verb_info_shelf import read_verb_infos
+    verb_infos = read_verb_infos(force=False)
+    start = time.perf_counter()
+    graph = VerbGraph.from_verb_infos(verb_infos)
+    print(f"Built graph of {len(graph)} nodes in {time.perf_counter() - start:.2f}s")
+    graph.save(GRAPH_PATH)
+    print(f"Saved {GRAPH_PATH.stat().st_size / 1e3:.0f} KB")
+    print(graph.aspect_partners("нести"))
+    print(graph.family("нести"))
+    print([len(f) for f in graph.families_by_size()[:10]])
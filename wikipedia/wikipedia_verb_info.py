@@ -1,13 +1,17 @@
-from more_itertools import flatten
+from itertools import chain
 
 from grammar.conjugation import Conjugation, Aspect
 from utils.utils import group_into_dict
 from wikipedia.verb.verb_identifier import VerbIdentifier
-from wikipedia.verb.verb_definition import VerbDefinition
+from wikipedia.verb.verb_definition import VerbDefinition, QuoteAndTranslation
 from utils.types import checked_type, checked_list_type
 
 
 class WikipediaVerbInfo:
+    CORRESPONDENT = "Correspondent"
+    DERIVED_TERM = "Derived Term"
+    RELATED_TERM = "Related Term"
+
     def __init__(
             self,
             conjugation: Conjugation,
@@ -30,15 +34,48 @@ class WikipediaVerbInfo:
     def aspect(self) -> Aspect:
         return self.conjugation.verb_type.aspect
 
+    def to_table(self) -> list[list[str]]:
+        """The conjugation's table, then a row per term. Each definition is a `DEF:<i>` row of its meaning, then a
+        `DEF:<i>:QUOTE` row per quote, of the quote and its translation"""
+        table = self.conjugation.to_table()
+        table += [[self.CORRESPONDENT, c] for c in self.correspondents]
+        table += [[self.DERIVED_TERM, t] for t in self.derived_terms]
+        table += [[self.RELATED_TERM, t] for t in self.related_terms]
+        for i, definition in enumerate(self.definitions):
+            table.append([f"DEF:{i}", definition.meaning])
+            table += [[f"DEF:{i}:QUOTE", q.quote, q.translation] for q in definition.quotes]
+        return table
+
+    @staticmethod
+    def from_table(table: list[list[str]]) -> 'WikipediaVerbInfo':
+        terms = {WikipediaVerbInfo.CORRESPONDENT: [], WikipediaVerbInfo.DERIVED_TERM: [],
+                 WikipediaVerbInfo.RELATED_TERM: []}
+        definitions: list[VerbDefinition] = []
+        for row in table:
+            if row[0] in terms:
+                terms[row[0]].append(row[1])
+            elif row[0].startswith("DEF:"):
+                if row[0].endswith(":QUOTE"):
+                    definitions[-1].quotes.append(QuoteAndTranslation(row[1], row[2]))
+                else:
+                    definitions.append(VerbDefinition(row[1], []))
+        return WikipediaVerbInfo(
+            Conjugation.from_table(table),
+            terms[WikipediaVerbInfo.CORRESPONDENT],
+            definitions,
+            terms[WikipediaVerbInfo.DERIVED_TERM],
+            terms[WikipediaVerbInfo.RELATED_TERM]
+        )
+
     @staticmethod
     def merge(verbs: list['WikipediaVerbInfo']) -> 'list[WikipediaVerbInfo]':
         grouped = group_into_dict(verbs, lambda verb: verb.conjugation)
         merged = []
         for conj, group in grouped.items():
-            merged_correspondents = list(set(flatten([v.correspondents for v in group])))
-            merged_definitions = list(flatten([v.definitions for v in group]))
-            merged_derived_terms = list(flatten([v.derived_terms for v in group]))
-            merged_related_terms = list(flatten([v.related_terms for v in group]))
+            merged_correspondents = list(dict.fromkeys(chain.from_iterable([v.correspondents for v in group])))
+            merged_definitions = list(chain.from_iterable([v.definitions for v in group]))
+            merged_derived_terms = list(chain.from_iterable([v.derived_terms for v in group]))
+            merged_related_terms = list(chain.from_iterable([v.related_terms for v in group]))
             merged.append(
                 WikipediaVerbInfo(
                     conj,